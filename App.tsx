@@ -1,11 +1,20 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, lazy, Suspense } from 'react';
+import { Loader2 } from 'lucide-react';
 import Layout from './components/Layout';
 import LandingPage from './views/Landing';
 import Register from './views/Register';
-import UserDashboard from './views/UserDashboard';
-import DriverDashboard from './views/DriverDashboard';
 import { AppView, User, Driver } from './types';
 
+// Dashboards pull in Leaflet and the realtime feeds; load them only when their view opens
+const UserDashboard = lazy(() => import('./views/UserDashboard'));
+const DriverDashboard = lazy(() => import('./views/DriverDashboard'));
+
+const ViewLoader: React.FC = () => (
+  <div className="flex justify-center items-center h-[calc(100vh-64px)]">
+    <Loader2 className="animate-spin text-brand-yellow" size={40} />
+  </div>
+);
+
 const App: React.FC = () => {
   const [view, setView] = useState<AppView>('landing');
   const [currentUser, setCurrentUser] = useState<User | null>(null);
@@ -61,13 +70,15 @@ const App: React.FC = () => {
         <Register type="driver" onSuccess={handleDriverLogin} onCancel={() => setView('landing')} />
       )}
 
-      {view === 'user-dashboard' && currentUser && (
-        <UserDashboard user={currentUser} />
-      )}
+      <Suspense fallback={<ViewLoader />}>
+        {view === 'user-dashboard' && currentUser && (
+          <UserDashboard user={currentUser} />
+        )}
 
-      {view === 'driver-dashboard' && currentDriver && (
-        <DriverDashboard driver={currentDriver} />
-      )}
+        {view === 'driver-dashboard' && currentDriver && (
+          <DriverDashboard driver={currentDriver} />
+        )}
+      </Suspense>
     </Layout>
   );
 };
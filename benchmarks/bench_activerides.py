@@ -0,0 +1,121 @@
+# قياس البحث عن الرحلة الحالية مع نمو الأرشيف إلى عشرات الملايين:
+# جدول rides واحد بدون فهارس (كما اليوم)، الجزء النشط المفهرس + rides_archive (مخطط tuktuk.dal)،
+# وسجل ActiveRides في الذاكرة. كل الاستعلامات على SQLite بنفس شكل checkRide
+# التشغيل من جذر المشروع: python -m benchmarks.bench_activerides --active 5000 --history 1000000,10000000,30000000
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from tuktuk.activerides import ActiveRides
+from tuktuk.dal import SQLITE_SCHEMA
+from tuktuk.metrics import percentile
+
+CHECK_RIDE = (
+    "SELECT * FROM {table} WHERE passenger_id = ? AND status IN ('pending', 'accepted', 'on_the_way') "
+    "ORDER BY created_at DESC LIMIT 1"
+)
+FLAT_SCHEMA = """
+CREATE TABLE rides_flat (
+    id TEXT PRIMARY KEY, passenger_id TEXT, driver_id TEXT, pickup TEXT, destination TEXT,
+    status TEXT, price REAL, distance REAL, created_at TEXT
+);
+"""
+PLACE = '{"lat": 30.0444, "lng": 31.2357}'
+
+
+def active_rides(n, passengers, rng):
+    return [
+        {
+            "id": f"a{i}",
+            "passenger_id": f"p{rng.randrange(passengers)}",
+            "driver_id": f"d{i}",
+            "pickup": PLACE,
+            "destination": PLACE,
+            "status": rng.choice(("pending", "accepted", "on_the_way")),
+            "price": 20.0,
+            "distance": 5.0,
+            "created_at": f"2026-01-01T00:{i % 60:02d}:00Z",
+        }
+        for i in range(n)
+    ]
+
+
+# صفوف منتهية مولدة داخل SQLite (أسرع بكثير من executemany بهذه الأحجام)
+def add_history(conn, table, start, count, passengers):
+    conn.execute(
+        f"""
+        WITH RECURSIVE seq(n) AS (SELECT ? UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+        INSERT INTO {table} SELECT 'h' || n, 'p' || (n % ?), 'd' || (n % 5000), ?, ?, 'finished', 20, 5,
+            '2025-' || printf('%02d', 1 + n % 12) || '-01T00:00:00Z' FROM seq
+        """,
+        (start, start + count - 1, passengers, PLACE, PLACE),
+    )
+    conn.commit()
+
+
+def time_queries(conn, table, passenger_ids):
+    sql = CHECK_RIDE.format(table=table)
+    times = []
+    for passenger_id in passenger_ids:
+        start = time.perf_counter()
+        conn.execute(sql, (passenger_id,)).fetchone()
+        times.append((time.perf_counter() - start) * 1e6)
+    return times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--active", type=int, default=5000, help="رحلات غير منتهية")
+    parser.add_argument("--passengers", type=int, default=200_000)
+    parser.add_argument("--history", default="100000,1000000,5000000", help="أحجام الأرشيف، مفصولة بفواصل")
+    parser.add_argument("--flat-queries", type=int, default=20, help="المسح الكامل بطيء: عدد قليل")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    active = active_rides(args.active, args.passengers, rng)
+    registry = ActiveRides()
+    registry.load(active)
+    lookups = [f"p{rng.randrange(args.passengers)}" for _ in range(args.queries)]
+    lookups[::2] = [ride["passenger_id"] for ride in rng.sample(active, len(lookups[::2]))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "rides.db"))
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(FLAT_SCHEMA + SQLITE_SCHEMA)
+        columns = ", ".join("?" * 9)
+        rows = [tuple(ride.values()) for ride in active]
+        conn.executemany(f"INSERT INTO rides_flat VALUES ({columns})", rows)
+        conn.executemany(f"INSERT INTO rides VALUES ({columns})", rows)
+        conn.commit()
+
+        # التحقق: نفس الرحلة من الطرق الثلاث
+        sample = lookups[:200]
+        expected = [registry.for_passenger(p) for p in sample]
+        for table in ("rides_flat", "rides"):
+            found = [conn.execute(CHECK_RIDE.format(table=table), (p,)).fetchone() for p in sample]
+            same = all((e is None and f is None) or (e and f and e["id"] == f[0]) for e, f in zip(expected, found))
+            print(f"التطابق {table}: {'نعم' if same else 'لا'}")
+
+        size = 0
+        for target in (int(x) for x in args.history.split(",")):
+            start = time.perf_counter()
+            add_history(conn, "rides_flat", size, target - size, args.passengers)
+            add_history(conn, "rides_archive", size, target - size, args.passengers)
+            size = target
+            print(f"\nالأرشيف {size:,} رحلة منتهية (تجهيز {time.perf_counter() - start:.1f}s):")
+
+            flat = time_queries(conn, "rides_flat", lookups[: args.flat_queries])
+            partitioned = time_queries(conn, "rides", lookups)
+            memory = []
+            for p in lookups:
+                t = time.perf_counter()
+                registry.for_passenger(p)
+                memory.append((time.perf_counter() - t) * 1e6)
+            for label, us in (("جدول واحد بلا فهارس", flat), ("جزء نشط مفهرس", partitioned), ("ActiveRides", memory)):
+                print(f"  {label:>20}: p50 {percentile(us, 50):>12,.1f}µs p99 {percentile(us, 99):>12,.1f}µs")
+        conn.close()
@@ -0,0 +1,63 @@
+# محاكاة بث الرحلات: قناة واحدة لكل المدينة مقابل قنوات الخلايا الجغرافية
+# الكثافة ثابتة والمدينة تكبر؛ المقسم يجب أن يبقي رسائل كل سائق ثابتة تقريبا
+# التشغيل من جذر المشروع: python -m benchmarks.bench_broadcast
+import argparse
+import math
+import random
+
+from tuktuk.broadcast import ChannelHub, DriverSubscription, RideBroadcaster
+from tuktuk.dispatch import KM_PER_DEG
+
+CENTER = (30.0444, 31.2357)
+
+
+def simulate(side_km, drivers_per_km2, rides_per_km2, steps, rng):
+    half_lat = side_km / 2 / KM_PER_DEG
+    half_lng = half_lat / math.cos(math.radians(CENTER[0]))
+    area = side_km * side_km
+    n_drivers = int(area * drivers_per_km2)
+
+    def point():
+        return CENTER[0] + rng.uniform(-half_lat, half_lat), CENTER[1] + rng.uniform(-half_lng, half_lng)
+
+    hub = ChannelHub()
+    broadcaster = RideBroadcaster(hub)
+    positions = [point() for _ in range(n_drivers)]
+    subscriptions = [DriverSubscription() for _ in range(n_drivers)]
+    churn = 0
+
+    rides = 0
+    for _ in range(steps):
+        # كل سائق يتحرك حتى ~200 متر بين الخطوات ثم يحدث اشتراكاته
+        for d, (lat, lng) in enumerate(positions):
+            lat += rng.uniform(-0.0018, 0.0018)
+            lng += rng.uniform(-0.0018, 0.0018)
+            positions[d] = (lat, lng)
+            join, leave = subscriptions[d].update(lat, lng)
+            churn += len(join) + len(leave)
+            for channel in join:
+                hub.join(d, channel)
+            for channel in leave:
+                hub.leave(d, channel)
+        for _ in range(int(area * rides_per_km2)):
+            lat, lng = point()
+            broadcaster.publish({"pickup": {"lat": lat, "lng": lng}, "status": "pending"})
+            rides += 1
+
+    partitioned = sum(hub.delivered.values()) / n_drivers
+    return n_drivers, rides, partitioned, churn / n_drivers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sides", type=float, nargs="+", default=[5, 10, 20, 40], help="طول ضلع المدينة بالكم")
+    parser.add_argument("--drivers-per-km2", type=float, default=5)
+    parser.add_argument("--rides-per-km2", type=float, default=0.2, help="رحلات جديدة لكل كم² في كل خطوة")
+    parser.add_argument("--steps", type=int, default=30)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    print(f"{'المدينة':>10} {'سائقون':>8} {'رحلات':>8} {'قناة واحدة/سائق':>16} {'خلايا/سائق':>12} {'تبديل قنوات/سائق':>16}")
+    for side in args.sides:
+        n, rides, partitioned, churn = simulate(side, args.drivers_per_km2, args.rides_per_km2, args.steps, rng)
+        print(f"{side:>8.0f}km {n:>8,} {rides:>8,} {rides:>16,.0f} {partitioned:>12,.1f} {churn:>16,.1f}")
@@ -0,0 +1,82 @@
+# قياس تجميع السائقين: لشاشة هاتف (400×800 بكسل) فوق القاهرة عند عدة مستويات تكبير، عدد الـ Marker
+# وحجم الرد مقارنة بإرسال كل السائقين المتاحين (fetchDrivers)، وزمن الاستعلام وزمن تحريك سائق
+# التشغيل من جذر المشروع: python -m benchmarks.bench_clusters --sizes 1000 10000 50000
+import argparse
+import json
+import math
+import random
+import time
+
+from benchmarks.bench_dal import person
+from tuktuk.clusters import DriverClusters
+from tuktuk.metrics import percentile
+
+CENTER = (30.0444, 31.2357)
+SCREEN = (400, 800)
+ZOOMS = (11, 13, 15, 17, 18)
+
+
+def screen_bbox(lat, lng, z):
+    deg_per_px = 360 / (256 * 2**z)
+    half_w = SCREEN[0] / 2 * deg_per_px
+    half_h = SCREEN[1] / 2 * deg_per_px * math.cos(math.radians(lat))
+    return lat - half_h, lng - half_w, lat + half_h, lng + half_w
+
+
+def driver_row(rng, i):
+    return {
+        **person(rng, i),
+        "id": f"driver-{i:06d}",
+        "tuktuk_number": f"TK-{i:05d}",
+        "status": "available",
+        "rating": round(rng.uniform(3.5, 5), 1),
+        "total_rides": rng.randrange(2000),
+        "location": {"lat": CENTER[0] + rng.gauss(0, 0.05), "lng": CENTER[1] + rng.gauss(0, 0.05)},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 50_000])
+    parser.add_argument("--moves", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        rows = [driver_row(rng, i) for i in range(size)]
+        clusters = DriverClusters()
+        start = time.perf_counter()
+        clusters.load(rows)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        move_us = []
+        for _ in range(args.moves):
+            row = rows[rng.randrange(size)]
+            loc = row["location"]
+            row["location"] = {"lat": loc["lat"] + rng.gauss(0, 0.0005), "lng": loc["lng"] + rng.gauss(0, 0.0005)}
+            t = time.perf_counter()
+            clusters.driver({"id": row["id"], "location": row["location"]})
+            move_us.append((time.perf_counter() - t) * 1e6)
+
+        total = clusters.view(0, -85, -180, 85, 180)
+        counted = sum(c["count"] for c in total["clusters"]) + len(total["points"])
+        print(f"\n{size:,} سائق: تحميل {load_ms:,.0f}ms، تحريك p50 {percentile(move_us, 50):.1f}µs "
+              f"p99 {percentile(move_us, 99):.1f}µs، العد الكلي {'صحيح' if counted == size else 'خطأ'}")
+        # fetchDrivers اليوم: كل الصفوف المتاحة ثم Marker لكل سائق
+        raw_bytes = len(json.dumps(rows).encode())
+        print(f"  بدون تجميع: {size:,} Marker، {raw_bytes / 1024:,.0f} KB")
+        print(f"  {'zoom':>5} {'مجموعات':>8} {'نقاط':>6} {'Marker':>7} {'الحجم':>9} {'الاستعلام p50':>14}")
+        for z in ZOOMS:
+            query_us = []
+            for _ in range(args.queries):
+                lat, lng = CENTER[0] + rng.gauss(0, 0.02), CENTER[1] + rng.gauss(0, 0.02)
+                bbox = screen_bbox(lat, lng, z)
+                t = time.perf_counter()
+                clusters.view(z, *bbox)
+                query_us.append((time.perf_counter() - t) * 1e6)
+            view = clusters.view(z, *screen_bbox(*CENTER, z))
+            markers = len(view["clusters"]) + len(view["points"])
+            print(f"  {z:>5} {len(view['clusters']):>8} {len(view['points']):>6} {markers:>7} "
+                  f"{len(json.dumps(view).encode()) / 1024:>7.1f}KB {percentile(query_us, 50):>12,.0f}µs")
@@ -0,0 +1,115 @@
+# قياس التخزين العمودي: الذاكرة لكل مليون سائق مقارنة بقواميس JSON، سرعة التحويل من/إلى JSON،
+# وحساب المسافات على أعمدة بدون نسخ مقارنة بحلقة على القواميس
+# التشغيل من جذر المشروع: python -m benchmarks.bench_columns --drivers 1000000
+import argparse
+import json
+import random
+import time
+import tracemalloc
+import uuid
+
+from tuktuk.columns import DRIVER_STATUS, DriverColumns
+from tuktuk.geo import EARTH_RADIUS_KM, haversine_km, np
+
+CHUNK = 50_000
+
+
+def make_drivers(count, rng):
+    for i in range(count):
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "status": rng.choice(["available", "busy"]),
+            "rating": 5.0,
+            "total_rides": rng.randrange(500),
+            "location": {"lat": 29.9 + rng.random() * 0.3, "lng": 31.1 + rng.random() * 0.3},
+            "created_at": "2025-11-20T12:34:56.123456+00:00",
+        }
+
+
+def chunks(count, rng):
+    batch = []
+    for obj in make_drivers(count, rng):
+        batch.append(obj)
+        if len(batch) == CHUNK:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def measure_columns(count):
+    # نبني الأعمدة على دفعات حتى لا تدخل قواميس الإدخال في القياس
+    tracemalloc.start()
+    columns = DriverColumns()
+    before = tracemalloc.get_traced_memory()[0]
+    for batch in chunks(count, random.Random(1)):
+        columns.extend(batch)
+    del batch
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return columns, used
+
+
+def measure_dicts(count):
+    wire = json.dumps(list(make_drivers(count, random.Random(1))))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = json.loads(wire)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return rows, used
+
+
+def nearest_available_dicts(rows, lat, lng):
+    best = min(
+        (r for r in rows if r["status"] == "available"),
+        key=lambda r: haversine_km(lat, lng, r["location"]["lat"], r["location"]["lng"]),
+    )
+    return best["id"]
+
+
+def nearest_available_columns(columns, lat, lng):
+    d_lat, d_lng, status = columns.arrays("lat", "lng", "status")
+    deg = np.pi / 180
+    a = np.sin((d_lat - lat) * deg / 2) ** 2 + np.cos(lat * deg) * np.cos(d_lat * deg) * np.sin((d_lng - lng) * deg / 2) ** 2
+    km = EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    km[status != DRIVER_STATUS.code("available")] = np.inf
+    return columns.record(int(np.argmin(km))).id
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drivers", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=100_000, help="عدد القواميس المقاسة (تكبر نسبيا)")
+    args = parser.parse_args()
+
+    columns, used = measure_columns(args.drivers)
+    per_million = used * 1_000_000 / args.drivers / 1e6
+    print(f"أعمدة: {args.drivers:,} سائق في {used / 1e6:.1f} MB ({per_million:.1f} MB لكل مليون، {used / args.drivers:.0f} بايت/سائق)")
+    del columns
+
+    rows, used = measure_dicts(args.sample)
+    print(f"قواميس JSON: {args.sample:,} سائق في {used / 1e6:.1f} MB (~{used * 1_000_000 / args.sample / 1e6:.0f} MB لكل مليون)")
+
+    sample = DriverColumns()
+    start = time.perf_counter()
+    sample.extend(rows)
+    elapsed = time.perf_counter() - start
+    print(f"تحميل من JSON: {len(rows) / elapsed:,.0f} صف/ث")
+    start = time.perf_counter()
+    sample.to_json()
+    elapsed = time.perf_counter() - start
+    print(f"تحويل إلى JSON: {len(rows) / elapsed:,.0f} صف/ث")
+
+    if np is None:
+        print("numpy غير مثبت: تخطي قياس الحساب المتجه")
+    else:
+        lat, lng = 30.05, 31.25
+        start = time.perf_counter()
+        expected = nearest_available_dicts(rows, lat, lng)
+        loop = time.perf_counter() - start
+        start = time.perf_counter()
+        found = nearest_available_columns(sample, lat, lng)
+        vector = time.perf_counter() - start
+        print(f"أقرب سائق متاح بين {args.sample:,}: حلقة قواميس {loop * 1000:.1f}ms | أعمدة numpy {vector * 1000:.1f}ms ({loop / vector:.0f}x)")
+        assert found == expected
@@ -0,0 +1,121 @@
+# قياس طبقة الوصول للبيانات: التسجيل بطريقة Register الحالية (بحث ثم إضافة أو تعديل) مقابل upsert واحد،
+# وصف لكل استعلام مقابل الدفعات متعددة الصفوف. --rtt-ms يضيف زمن شبكة لكل رحلة إلى القاعدة
+# التشغيل من جذر المشروع: python -m benchmarks.bench_dal --users 2000 --rtt-ms 2 [--database postgres://...]
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from tuktuk.dal import DRIVERS_TABLE, USERS_TABLE, connect
+
+
+# زمن شبكة مصطنع حول أي backend
+class Delayed:
+    def __init__(self, backend, rtt_ms):
+        self.backend = backend
+        self.dialect = backend.dialect
+        self.rtt = rtt_ms / 1000
+        self.round_trips = 0
+
+    def __getattr__(self, name):
+        call = getattr(self.backend, name)
+
+        async def delayed(*args):
+            self.round_trips += 1
+            await asyncio.sleep(self.rtt)
+            return await call(*args)
+
+        return delayed
+
+
+def person(rng, i):
+    return {
+        "name": f"راكب {i}",
+        "phone": f"011{i:08d}",
+        "location": {"lat": 30.0444 + rng.uniform(-0.05, 0.05), "lng": 31.2357 + rng.uniform(-0.05, 0.05)},
+    }
+
+
+# نفس خطوات Register.handleSubmit: select بالهاتف ثم update أو insert
+async def check_then_write(dal, table, row):
+    existing = await dal.fetch_one("select_phone", f"SELECT * FROM {table} WHERE phone = ?", (row["phone"],))
+    if existing:
+        await dal.execute("update_location", f"UPDATE {table} SET location = ? WHERE id = ?", (row["location"], existing["id"]))
+        return {**existing, "location": row["location"]}
+    return await dal.fetch_one(
+        "insert",
+        f"INSERT INTO {table} (id, name, phone, location) VALUES (?, ?, ?, ?) RETURNING *",
+        (str(uuid.uuid4()), row["name"], row["phone"], row["location"]),
+    )
+
+
+async def timed(label, trips, dal, fn, n):
+    before = trips.round_trips
+    start = time.perf_counter()
+    await fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:>28}: {n / elapsed:>9,.0f} صف/ث، {(trips.round_trips - before) / n:.3f} رحلة/صف")
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database or os.path.join(tmp, "tuktuk.db")
+        dal = await connect(url, create_schema=True)
+        trips = dal.backend = Delayed(dal.backend, args.rtt_ms)
+        run = f"{time.time_ns()}"[-6:]
+        rows = [person(rng, i) for i in range(args.users)]
+        for row in rows:
+            row["phone"] = f"{run}{row['phone']}"
+        # نصف التسجيلات لأشخاص مسجلين من قبل (دخول)
+        logins = rows[: args.users // 2]
+
+        print(f"تسجيل {args.users:,} راكب (نصفهم دخول متكرر)، rtt {args.rtt_ms}ms:")
+
+        async def old_way():
+            for row in rows + logins:
+                await check_then_write(dal, USERS_TABLE, row)
+
+        async def upsert_each():
+            for row in rows + logins:
+                await dal.register(USERS_TABLE, {**row, "phone": "u" + row["phone"]})
+
+        async def upsert_batch():
+            await dal.register_many(USERS_TABLE, [{**row, "phone": "b" + row["phone"]} for row in rows])
+            await dal.register_many(USERS_TABLE, [{**row, "phone": "b" + row["phone"]} for row in logins])
+
+        n = len(rows) + len(logins)
+        await timed("بحث ثم إضافة/تعديل", trips, dal, old_way, n)
+        await timed("upsert لكل صف", trips, dal, upsert_each, n)
+        await timed("upsert دفعات", trips, dal, upsert_batch, n)
+
+        drivers = await dal.register_many(DRIVERS_TABLE, [{**row, "phone": "d" + row["phone"]} for row in rows])
+        moves = [{"id": d["id"], "location": person(rng, 0)["location"]} for d in drivers]
+
+        print(f"تحديث مواقع {len(moves):,} سائق:")
+
+        async def update_each():
+            for move in moves:
+                await dal.execute(
+                    "update_one", f"UPDATE {DRIVERS_TABLE} SET location = ? WHERE id = ?", (move["location"], move["id"])
+                )
+
+        await timed("UPDATE لكل سائق", trips, dal, update_each, len(moves))
+        await timed("دفعة واحدة", trips, dal, lambda: dal.update_locations(moves), len(moves))
+
+        print("زمن الاستعلامات (ms):")
+        for name, stats in dal.metrics()["latency_ms"].items():
+            print(f"  {name:>20}: n={stats['count']:>6,} p50 {stats['p50']:.2f} p95 {stats['p95']:.2f} p99 {stats['p99']:.2f}")
+        await dal.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=2.0, help="زمن الشبكة المضاف لكل رحلة")
+    parser.add_argument("--database", help="postgres://... (بدونه ملف SQLite مؤقت)")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
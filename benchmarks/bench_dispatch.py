@@ -0,0 +1,69 @@
+# الفهرس المكاني مقابل الحلقة الخطية لإيجاد أقرب سائق متاح
+# التشغيل من جذر المشروع: python -m benchmarks.bench_dispatch --sizes 10000 100000 1000000
+import argparse
+import random
+import time
+
+from tuktuk.dispatch import DriverIndex, brute_force_nearest
+
+# مركز القاهرة ونطاق ~30 كم حوله
+CENTER = (30.0444, 31.2357)
+SPREAD = 0.3
+
+
+def random_point(rng):
+    return CENTER[0] + rng.uniform(-SPREAD, SPREAD), CENTER[1] + rng.uniform(-SPREAD, SPREAD)
+
+
+def per_query_us(fn, queries):
+    start = time.perf_counter()
+    for lat, lng in queries:
+        fn(lat, lng)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+# حجم خلية يجعل متوسط السائقين في الخلية قرابة 4
+def auto_cell_deg(size):
+    return max(0.0005, min(0.05, ((2 * SPREAD) ** 2 * 4 / size) ** 0.5))
+
+
+def run(size, queries, rng, cell_deg=None):
+    drivers = {f"d{i}": random_point(rng) for i in range(size)}
+    points = [random_point(rng) for _ in range(queries)]
+
+    start = time.perf_counter()
+    index = DriverIndex(cell_deg or auto_cell_deg(size))
+    for driver_id, (lat, lng) in drivers.items():
+        index.insert(driver_id, lat, lng)
+    build = time.perf_counter() - start
+
+    moves = [(f"d{rng.randrange(size)}", *random_point(rng)) for _ in range(10000)]
+    start = time.perf_counter()
+    for driver_id, lat, lng in moves:
+        index.move(driver_id, lat, lng)
+        drivers[driver_id] = (lat, lng)
+    move_us = (time.perf_counter() - start) / len(moves) * 1e6
+
+    # الحلقة الخطية بطيئة جدا مع مليون سائق، نكتفي بعدد أقل من الاستعلامات
+    brute_points = points[: max(3, queries * 10000 // size)]
+    for lat, lng in brute_points:
+        assert index.nearest(lat, lng)[0][0] == brute_force_nearest(drivers, lat, lng)[0]
+
+    print(f"\n{size:,} سائق (خلية {index.cell_deg:.4f}°، بناء {build:.2f}s، تحريك {move_us:.1f}µs)")
+    print(f"  brute force:        {per_query_us(lambda a, b: brute_force_nearest(drivers, a, b), brute_points):>12,.1f}µs")
+    print(f"  nearest k=1:        {per_query_us(lambda a, b: index.nearest(a, b), points):>12,.1f}µs")
+    print(f"  nearest k=5:        {per_query_us(lambda a, b: index.nearest(a, b, 5), points):>12,.1f}µs")
+    print(f"  within 1 km:        {per_query_us(lambda a, b: index.within(a, b, 1.0), points):>12,.1f}µs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--cell-deg", type=float, default=None, help="حجم الخلية (افتراضيا حسب الكثافة)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        run(size, args.queries, rng, args.cell_deg)
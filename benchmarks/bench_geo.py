@@ -0,0 +1,64 @@
+# تطابق tuktuk.geo مع utils/geo.ts (ملف geo_golden.json) ثم قياس الحساب المتجه
+# التشغيل من جذر المشروع: python -m benchmarks.bench_geo --rows 1000000
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from tuktuk.geo import batch_distance, batch_price, calculate_distance, calculate_price, distance_matrix, to_fixed
+
+GOLDEN = os.path.join(os.path.dirname(__file__), "geo_golden.json")
+
+
+def check_parity():
+    with open(GOLDEN, encoding="utf-8") as f:
+        golden = json.load(f)
+
+    for x, expected in golden["toFixed"]:
+        assert to_fixed(x) == expected, (x, to_fixed(x), expected)
+
+    trips = golden["trips"]
+    for trip in trips:
+        a, b = trip["pickup"], trip["destination"]
+        distance = calculate_distance({"lat": a[0], "lng": a[1]}, {"lat": b[0], "lng": b[1]})
+        assert distance == trip["distance"], (trip, distance)
+        assert calculate_price(distance) == trip["price"], (trip, calculate_price(distance))
+
+    pickups = np.array([t["pickup"] for t in trips])
+    destinations = np.array([t["destination"] for t in trips])
+    distances = batch_distance(pickups[:, 0], pickups[:, 1], destinations[:, 0], destinations[:, 1])
+    assert distances.tolist() == [t["distance"] for t in trips]
+    assert batch_price(distances).tolist() == [t["price"] for t in trips]
+    print(f"✅ تطابق تام مع utils/geo.ts في {len(trips)} رحلة")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    check_parity()
+
+    rng = np.random.default_rng(3)
+    lat1, lat2 = 30.0444 + rng.uniform(-0.3, 0.3, (2, args.rows))
+    lng1, lng2 = 31.2357 + rng.uniform(-0.3, 0.3, (2, args.rows))
+
+    start = time.perf_counter()
+    distances = batch_distance(lat1, lng1, lat2, lng2)
+    batch_price(distances)
+    vectorized = time.perf_counter() - start
+
+    sample = min(args.rows, 100000)
+    start = time.perf_counter()
+    for i in range(sample):
+        calculate_price(calculate_distance({"lat": lat1[i], "lng": lng1[i]}, {"lat": lat2[i], "lng": lng2[i]}))
+    scalar = (time.perf_counter() - start) * args.rows / sample
+
+    print(f"{args.rows:,} رحلة: متجه {vectorized:.3f}s | دالة بدالة ~{scalar:.2f}s | x{scalar / vectorized:.0f}")
+
+    pickups, drivers = 1000, 5000
+    start = time.perf_counter()
+    distance_matrix(lat1[:pickups], lng1[:pickups], lat2[:drivers], lng2[:drivers])
+    print(f"مصفوفة {pickups}×{drivers}: {time.perf_counter() - start:.3f}s")
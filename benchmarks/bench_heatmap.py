@@ -0,0 +1,95 @@
+# قياس الخريطة الحرارية: تكلفة كل حدث (تحديث البلاطات في كل المستويات)، ثم استعلام الشاشة
+# (zoom 15 فوق وسط القاهرة) مقابل المسار الحالي: قراءة صفوف rides وفك pickup وتجميعها عند كل استعلام.
+# مع نمو جدول الرحلات يبقى الاستعلام بعدد البلاطات الظاهرة بينما المسح يكبر مع الصفوف
+# التشغيل من جذر المشروع: python -m benchmarks.bench_heatmap --drivers 5000 --rides 200000
+import argparse
+import json
+import random
+import time
+
+from benchmarks.bench_surge import Clock, point
+from tuktuk.heatmap import GRID_ZOOM, MAX_ZOOM, SUB_BITS, DemandHeatmap, grid_of, tile_of
+from tuktuk.metrics import percentile
+
+VIEW = (30.02, 31.20, 30.08, 31.29)  # شاشة هاتف تقريبا عند zoom 15
+ZOOM = 15
+
+
+# المرجع: كل استعلام يمسح الصفوف كما تعيدها القاعدة (pickup نص JSON)
+def rescan(rows, min_lat, min_lng, max_lat, max_lng, z):
+    x0, y0 = tile_of(max_lat, min_lng, z)
+    x1, y1 = tile_of(min_lat, max_lng, z)
+    shift = GRID_ZOOM - z - SUB_BITS
+    counts = {}
+    for row in rows:
+        if row["status"] != "pending":
+            continue
+        pickup = json.loads(row["pickup"])
+        gx, gy = grid_of(pickup["lat"], pickup["lng"])
+        if x0 <= gx >> (shift + SUB_BITS) <= x1 and y0 <= gy >> (shift + SUB_BITS) <= y1:
+            cell = (gx >> shift, gy >> shift)
+            counts[cell] = counts.get(cell, 0) + 1
+    return counts
+
+
+def flatten(view):
+    side = 1 << view["sub_bits"]
+    return {(t["x"] * side + sx, t["y"] * side + sy): n for t in view["tiles"] for sx, sy, n in t["cells"]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drivers", type=int, default=5000)
+    parser.add_argument("--rides", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    clock = Clock()
+    heatmap = DemandHeatmap(clock=clock)
+
+    for i in range(args.drivers):
+        heatmap.driver({"id": f"d{i}", "status": "available", "location": point(rng)})
+
+    rows, open_rides, event_us = [], [], []
+    checkpoints = {args.rides // 100, args.rides // 10, args.rides}
+    step = 4 * 3600 / args.rides
+    print(f"{'الرحلات في الجدول':>18} {'معلقة':>7} {'بلاطات':>7} {'استعلام p50':>12} {'مسح الصفوف p50':>15} {'التطابق':>8}")
+    for n in range(1, args.rides + 1):
+        clock.now += step
+        ride = {"id": f"r{n}", "status": "pending", "pickup": point(rng, hot=rng.random() < 0.3)}
+        t = time.perf_counter()
+        heatmap.ride_requested(ride)
+        event_us.append((time.perf_counter() - t) * 1e6)
+        rows.append({"id": ride["id"], "status": "pending", "pickup": json.dumps(ride["pickup"])})
+        open_rides.append(len(rows) - 1)
+        # الطلبات تقبل بعد دقائق، والسائقون يتحركون بين الطلبات
+        while len(open_rides) > 400 or (open_rides and rng.random() < 0.5):
+            row = rows[open_rides.pop(rng.randrange(len(open_rides)))]
+            row["status"] = "finished"
+            t = time.perf_counter()
+            heatmap.ride_closed(row["id"])
+            event_us.append((time.perf_counter() - t) * 1e6)
+        t = time.perf_counter()
+        heatmap.driver({"id": f"d{rng.randrange(args.drivers)}", "status": rng.choice(("available", "busy")), "location": point(rng)})
+        event_us.append((time.perf_counter() - t) * 1e6)
+
+        if n in checkpoints:
+            view_us, scan_ms = [], []
+            for _ in range(args.queries):
+                t = time.perf_counter()
+                view = heatmap.view("pending", ZOOM, *VIEW)
+                view_us.append((time.perf_counter() - t) * 1e6)
+            for _ in range(max(3, args.queries // 50)):
+                t = time.perf_counter()
+                expected = rescan(rows, *VIEW, ZOOM)
+                scan_ms.append((time.perf_counter() - t) * 1000)
+            match = flatten(view) == expected
+            print(f"{n:>18,} {len(open_rides):>7} {len(view['tiles']):>7} {percentile(view_us, 50):>10,.0f}µs "
+                  f"{percentile(scan_ms, 50):>13,.1f}ms {'نعم' if match else 'لا':>8}")
+
+    m = heatmap.metrics()
+    print(f"الأحداث: {len(event_us):,}، p50 {percentile(event_us, 50):.1f}µs p99 {percentile(event_us, 99):.1f}µs، "
+          f"{m['cell_updates']:,} تحديث خلية")
+    for name, layer in m["layers"].items():
+        print(f"  {name:>12}: المجموع {layer['total']:,}، بلاطات z{MAX_ZOOM} {layer['tiles']:,}")
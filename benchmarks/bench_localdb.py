@@ -0,0 +1,128 @@
+# قياس خادم Supabase المحلي: استعلامات داخل العملية مع الفهارس الثانوية وبدونها، ثم طلبات HTTP/ث
+# التشغيل من جذر المشروع: python -m benchmarks.bench_localdb --drivers 5000 --rides 50000
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from tuktuk.localdb import LocalDB
+from tuktuk.localserver import LocalSupabase, serve
+from tuktuk.metrics import percentile
+
+STATUSES = ["pending", "accepted", "on_the_way", "finished"]
+
+
+# المسح الكامل القديم: كل فلتر غير المفتاح الأساسي يمر على كل الصفوف
+class ScanDB(LocalDB):
+    def _candidates(self, table, filters):
+        for op, column, value in filters:
+            if op == "eq" and column == "id":
+                row = self.tables[table].get(value)
+                return [row] if row is not None else []
+        return self.tables[table].values()
+
+
+def seed(db, drivers, rides, rng):
+    db.table("drivers").insert([
+        {"id": f"d{i}", "name": f"driver {i}", "status": rng.choice(["available", "busy", "offline"]),
+         "location": {"lat": 30 + rng.random(), "lng": 31 + rng.random()}}
+        for i in range(drivers)
+    ]).execute()
+    db.table("rides").insert([
+        {"id": f"r{i}", "passenger_id": f"p{rng.randrange(rides // 5)}", "driver_id": f"d{rng.randrange(drivers)}",
+         "status": "finished" if rng.random() < 0.97 else rng.choice(STATUSES[:3]), "price": 10.0}
+        for i in range(rides)
+    ]).execute()
+
+
+# نفس استعلامات الواجهات: السائقون المتاحون، رحلة الراكب الحالية، رحلة السائق الحالية، تحديث الموقع
+def workload(count, drivers, rides, rng):
+    ops = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.1:
+            ops.append(("available",))
+        elif kind < 0.4:
+            ops.append(("passenger", f"p{rng.randrange(rides // 5)}"))
+        elif kind < 0.6:
+            ops.append(("driver", f"d{rng.randrange(drivers)}"))
+        else:
+            ops.append(("ping", f"d{rng.randrange(drivers)}", 30 + rng.random(), 31 + rng.random()))
+    return ops
+
+
+def run_in_process(db, ops):
+    start = time.perf_counter()
+    for op in ops:
+        if op[0] == "available":
+            db.table("drivers").select("*").eq("status", "available").execute()
+        elif op[0] == "passenger":
+            db.table("rides").select("*").eq("passenger_id", op[1]).in_("status", STATUSES[:3]).order("created_at", ascending=False).limit(1).execute()
+        elif op[0] == "driver":
+            db.table("rides").select("*").eq("driver_id", op[1]).neq("status", "finished").execute()
+        else:
+            db.table("drivers").update({"location": {"lat": op[2], "lng": op[3]}}).eq("id", op[1]).execute()
+    return time.perf_counter() - start
+
+
+def as_request(op):
+    if op[0] == "available":
+        return "GET", "/rest/v1/drivers?select=*&status=eq.available", b""
+    if op[0] == "passenger":
+        return "GET", f"/rest/v1/rides?select=*&passenger_id=eq.{op[1]}&status=in.(pending,accepted,on_the_way)&order=created_at.desc&limit=1", b""
+    if op[0] == "driver":
+        return "GET", f"/rest/v1/rides?select=*&driver_id=eq.{op[1]}&status=neq.finished", b""
+    return "PATCH", f"/rest/v1/drivers?id=eq.{op[1]}", json.dumps({"location": {"lat": op[2], "lng": op[3]}}).encode()
+
+
+async def over_http(server, ops, port, clients=16):
+    listener = asyncio.create_task(serve(server, port=port))
+    await asyncio.sleep(0.1)
+    latencies = []
+
+    async def client(chunk):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for op in chunk:
+            method, path, body = as_request(op)
+            sent = time.perf_counter()
+            writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+            await reader.readline()
+            length = 0
+            while (line := await reader.readline()) != b"\r\n":
+                if line.lower().startswith(b"content-length"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - sent) * 1000)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(ops[c::clients]) for c in range(clients)))
+    elapsed = time.perf_counter() - start
+    listener.cancel()
+    return elapsed, latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drivers", type=int, default=5000)
+    parser.add_argument("--rides", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--port", type=int, default=54399)
+    args = parser.parse_args()
+
+    for label, cls in (("مسح كامل", ScanDB), ("فهارس ثانوية", LocalDB)):
+        db = cls()
+        seed(db, args.drivers, args.rides, random.Random(1))
+        ops = workload(args.queries if cls is LocalDB else args.queries // 20, args.drivers, args.rides, random.Random(2))
+        elapsed = run_in_process(db, ops)
+        print(f"{label:>12}: {len(ops):,} استعلام في {elapsed:.2f}s ({len(ops) / elapsed:,.0f} استعلام/ث)")
+
+    server = LocalSupabase()
+    seed(server.db, args.drivers, args.rides, random.Random(1))
+    # السائقون المتاحون وحدهم بضعة آلاف صف في كل استجابة، لذلك نقيسهم بنسبتهم فقط
+    ops = workload(args.queries, args.drivers, args.rides, random.Random(3))
+    elapsed, latencies = asyncio.run(over_http(server, ops, args.port))
+    print(f"HTTP: {len(ops):,} طلب في {elapsed:.2f}s ({len(ops) / elapsed:,.0f} طلب/ث)")
+    print(f"  زمن الطلب p50 {percentile(latencies, 50):.2f}ms p95 {percentile(latencies, 95):.2f}ms p99 {percentile(latencies, 99):.2f}ms")
@@ -0,0 +1,132 @@
+# إعادة تشغيل أثر طلبات: القاعدة الجشعة الحالية (أقرب سائق لحظة الطلب) مقابل المطابقة بالدفعات
+# التشغيل من جذر المشروع: python -m benchmarks.bench_matching --drivers 400 --rate 0.3 --seconds 1800
+import argparse
+import random
+import time
+
+from tuktuk.dispatch import DriverIndex
+from tuktuk.geo import haversine_km
+from tuktuk.matching import MatchingEngine, MemoryRides, greedy_assign
+from tuktuk.metrics import percentile
+
+CENTER = (30.0444, 31.2357)
+SPREAD = 0.08  # ~9 كم حول المركز
+SPEED_KMH = 20
+STEP = 0.25
+
+
+def make_trace(drivers, rate, seconds, rng):
+    def point():
+        return {"lat": CENTER[0] + rng.uniform(-SPREAD, SPREAD), "lng": CENTER[1] + rng.uniform(-SPREAD, SPREAD)}
+
+    fleet = {f"d{i}": point() for i in range(drivers)}
+    rides, t, n = [], 0.0, 0
+    while t < seconds:
+        t += rng.expovariate(rate)
+        rides.append({"id": f"r{n}", "at": t, "pickup": point(), "destination": point(), "status": "pending"})
+        n += 1
+    return fleet, rides
+
+
+# يعيد السائقين إلى الفهرس بعد انتهاء الرحلة (الوصول للراكب ثم التوصيل)
+class Fleet:
+    def __init__(self, fleet):
+        self.index = DriverIndex()
+        self.location = dict(fleet)
+        self.returning = []
+        for driver_id, loc in fleet.items():
+            self.index.insert(driver_id, loc["lat"], loc["lng"])
+
+    def dispatched(self, now, driver_id, ride, pickup_km):
+        dest = ride["destination"]
+        trip_km = haversine_km(ride["pickup"]["lat"], ride["pickup"]["lng"], dest["lat"], dest["lng"])
+        self.returning.append((now + (pickup_km + trip_km) / SPEED_KMH * 3600, driver_id, dest))
+
+    def release(self, now):
+        still = []
+        for at, driver_id, dest in self.returning:
+            if at <= now:
+                self.index.insert(driver_id, dest["lat"], dest["lng"])
+            else:
+                still.append((at, driver_id, dest))
+        self.returning = still
+
+
+def replay_greedy(fleet, rides, seconds):
+    state = Fleet(fleet)
+    queue, latencies, pickup = [], [], []
+    now, i = 0.0, 0
+    while now < seconds or queue:
+        state.release(now)
+        while i < len(rides) and rides[i]["at"] <= now:
+            queue.append(rides[i])
+            i += 1
+        waiting = []
+        for ride in queue:
+            found = greedy_assign(state.index, ride)
+            if found is None:
+                waiting.append(ride)
+                continue
+            latencies.append(now - ride["at"])
+            pickup.append(found[1])
+            state.dispatched(now, found[0], ride, found[1])
+        queue = waiting
+        now += STEP
+        if now > seconds * 3:
+            break
+    return latencies, pickup
+
+
+def replay_batched(fleet, rides, seconds, window):
+    state = Fleet(fleet)
+    store = MemoryRides()
+    now = [0.0]
+    engine = MatchingEngine(state.index, store.commit, window=window, max_km=None, clock=lambda: now[0])
+    latencies, pickup = [], []
+    i = 0
+    solve = 0.0
+    while now[0] < seconds or engine.pending:
+        state.release(now[0])
+        store.busy = {d for _, d, _ in state.returning}
+        while i < len(rides) and rides[i]["at"] <= now[0]:
+            store.add(rides[i])
+            engine.submit(rides[i])
+            i += 1
+        pending = dict(engine.pending)
+        start = time.perf_counter()
+        committed = engine.tick()
+        solve += time.perf_counter() - start
+        for ride_id, driver_id, km in committed:
+            ride = pending[ride_id][0]
+            latencies.append(now[0] - ride["at"])
+            pickup.append(km)
+            state.dispatched(now[0], driver_id, ride, km)
+        now[0] += STEP
+        if now[0] > seconds * 3:
+            break
+    return latencies, pickup, solve, engine.counters["batches"]
+
+
+def report(name, latencies, pickup):
+    print(
+        f"{name:>14}: {len(latencies):>6,} مطابقة | زمن الانتظار p50 {percentile(latencies, 50):5.2f}s "
+        f"p95 {percentile(latencies, 95):6.2f}s p99 {percentile(latencies, 99):6.2f}s | "
+        f"متوسط مسافة الوصول {sum(pickup) / max(len(pickup), 1):.3f} كم"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drivers", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=0.3, help="طلبات في الثانية")
+    parser.add_argument("--seconds", type=float, default=1800)
+    parser.add_argument("--windows", type=float, nargs="+", default=[1.0, 2.0])
+    args = parser.parse_args()
+
+    fleet, rides = make_trace(args.drivers, args.rate, args.seconds, random.Random(11))
+    print(f"{len(rides):,} طلب، {args.drivers} سائق")
+    report("جشع", *replay_greedy(fleet, rides, args.seconds))
+    for window in args.windows:
+        latencies, pickup, solve, batches = replay_batched(fleet, rides, args.seconds, window)
+        report(f"دفعات {window:g}s", latencies, pickup)
+        print(f"{'':>16}زمن الحل {solve * 1000 / max(batches, 1):.2f}ms لكل دفعة ({batches} دفعة)")
@@ -0,0 +1,84 @@
+# قياس ذاكرة الملفات الشخصية: كل حدث رحلة (عرض على عدة سائقين، قبول، في الطريق، انتهاء) يحتاج اسم الراكب
+# وبيانات السائق. نقارن استعلاما لكل حدث (مثل fetchPassenger اليوم) مع ProfileCache على SQLite بزمن شبكة
+# التشغيل من جذر المشروع: python -m benchmarks.bench_profiles --users 2000 --rides 3000 --rtt-ms 1
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_dal import Delayed, person
+from tuktuk.dal import DRIVERS_TABLE, USERS_TABLE, connect
+from tuktuk.profiles import DRIVER_FIELDS, USER_FIELDS, ProfileCache
+
+OFFERS_PER_RIDE = 6  # سائقون في الخلايا المجاورة يرون نفس الطلب
+BURST = 100  # أحداث تصل معا في نفس اللحظة
+
+
+def ride_events(rng, users, drivers, rides):
+    events = []
+    for _ in range(rides):
+        passenger, driver = rng.choice(users)["id"], rng.choice(drivers)["id"]
+        events += [("offer", passenger, None)] * OFFERS_PER_RIDE
+        # القبول والحالات التالية تصل للراكب والسائق معا، وأحيانا مكررة
+        for _ in range(3 + rng.randrange(2)):
+            events.append(("update", passenger, driver))
+    return events
+
+
+async def uncached(dal, event):
+    _, passenger, driver = event
+    await dal.fetch_one("passenger_name", f"SELECT name FROM {USERS_TABLE} WHERE id = ?", (passenger,))
+    if driver:
+        await dal.fetch_one("driver_row", f"SELECT * FROM {DRIVERS_TABLE} WHERE id = ?", (driver,))
+
+
+async def cached(users, drivers, event):
+    _, passenger, driver = event
+    await users.get(passenger)
+    if driver:
+        await drivers.get(driver)
+
+
+async def replay(events, handle):
+    start = time.perf_counter()
+    for i in range(0, len(events), BURST):
+        await asyncio.gather(*(handle(event) for event in events[i:i + BURST]))
+    return time.perf_counter() - start
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        dal = await connect(os.path.join(tmp, "tuktuk.db"), create_schema=True)
+        users = await dal.register_many(USERS_TABLE, [person(rng, i) for i in range(args.users)])
+        drivers = await dal.register_many(
+            DRIVERS_TABLE, [{**person(rng, i), "phone": f"010{i:08d}"} for i in range(args.users // 4)]
+        )
+        events = ride_events(rng, users, drivers, args.rides)
+        trips = dal.backend = Delayed(dal.backend, args.rtt_ms)
+
+        seconds = await replay(events, lambda e: uncached(dal, e))
+        plain_trips = trips.round_trips
+        print(f"{len(events):,} حدث، rtt {args.rtt_ms}ms")
+        print(f"  استعلام لكل حدث: {len(events) / seconds:>9,.0f} حدث/ث، {plain_trips:,} رحلة إلى القاعدة")
+
+        user_cache = ProfileCache.for_table(dal, USERS_TABLE, USER_FIELDS)
+        driver_cache = ProfileCache.for_table(dal, DRIVERS_TABLE, DRIVER_FIELDS)
+        trips.round_trips = 0
+        seconds = await replay(events, lambda e: cached(user_cache, driver_cache, e))
+        print(f"  ProfileCache:    {len(events) / seconds:>9,.0f} حدث/ث، {trips.round_trips:,} رحلة إلى القاعدة")
+        for label, cache in (("الركاب", user_cache), ("السائقون", driver_cache)):
+            m = cache.metrics()
+            print(f"  {label}: hit rate {m['hit_rate']:.1%}، مشتركة {m['shared']:,}، دفعات {m['batches']:,}، حجم {m['size']:,}")
+        await dal.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--rides", type=int, default=3000)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
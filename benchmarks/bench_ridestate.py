@@ -0,0 +1,104 @@
+# اختبار ضغط لآلة حالات الرحلة: عدة سائقين يقبلون نفس الطلب في نفس اللحظة، ثم ضغطات مكررة على
+# "تم الوصول" و"إنهاء". نقارن التحديث غير المشروط (acceptRide القديم) مع compare-and-set في tuktuk.ridestate
+# التشغيل من جذر المشروع: python -m benchmarks.bench_ridestate --rides 2000 --contenders 8
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_dal import person
+from tuktuk.dal import DRIVERS_TABLE, RIDES_TABLE, USERS_TABLE, connect
+from tuktuk.ridestate import IllegalTransition, RideStateMachine
+
+WAVE = 400  # طلبات متزامنة في كل موجة
+
+
+async def waves(calls):
+    results = []
+    for i in range(0, len(calls), WAVE):
+        results += await asyncio.gather(*(call() for call in calls[i:i + WAVE]))
+    return results
+
+
+async def setup(dal, rng, rides, drivers):
+    passengers = await dal.register_many(USERS_TABLE, [person(rng, i) for i in range(rides)])
+    fleet = await dal.register_many(
+        DRIVERS_TABLE, [{**person(rng, i), "phone": f"010{i:08d}"} for i in range(drivers)]
+    )
+    created = await dal.create_rides([{"passenger_id": p["id"], "pickup": p["location"]} for p in passengers])
+    return created, [d["id"] for d in fleet]
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("unconditional", "cas"):
+            dal = await connect(os.path.join(tmp, f"{mode}.db"), create_schema=True, size=args.pool)
+            rides, fleet = await setup(dal, rng, args.rides, args.rides)
+            contenders = {ride["id"]: rng.sample(fleet, args.contenders) for ride in rides}
+            machine = RideStateMachine(dal)
+
+            if mode == "unconditional":
+                async def accept(ride_id, driver_id):
+                    changed = await dal.execute(
+                        "accept_unconditional",
+                        f"UPDATE {RIDES_TABLE} SET driver_id = ?, status = 'accepted' WHERE id = ?",
+                        (driver_id, ride_id),
+                    )
+                    return driver_id if changed else None
+            else:
+                async def accept(ride_id, driver_id):
+                    row = await machine.accept(ride_id, driver_id)
+                    return row and row["driver_id"]
+
+            pairs = [(ride_id, driver_id) for ride_id, drivers in contenders.items() for driver_id in drivers]
+            rng.shuffle(pairs)
+            start = time.perf_counter()
+            winners = await waves([lambda r=r, d=d: accept(r, d) for r, d in pairs])
+            seconds = time.perf_counter() - start
+
+            stored = {row["id"]: row["driver_id"] for row in await dal.active_rides()}
+            claimed = sum(1 for w in winners if w is not None)
+            # سائق يظن أنه فاز بينما الرحلة مسجلة لغيره = فوز وهمي
+            phantom = sum(1 for (r, d), w in zip(pairs, winners) if w is not None and stored.get(r) != d)
+            print(f"{mode}: {len(pairs):,} قبول متزامن على {len(rides):,} رحلة في {seconds:.2f}s "
+                  f"({len(pairs) / seconds:,.0f}/ث)، فائزون {claimed:,}، فوز وهمي {phantom:,}")
+
+            if mode == "cas":
+                # الفائز يضغط "تم الوصول" و"إنهاء" مرتين، والخاسرون يحاولون أيضا
+                steps = []
+                for ride_id, drivers in contenders.items():
+                    for driver_id in drivers:
+                        steps.append(lambda r=ride_id, d=driver_id: machine.arrive(r, d))
+                    steps.append(lambda r=ride_id: machine.arrive(r, stored[r]))
+                start = time.perf_counter()
+                arrived = sum(1 for row in await waves(steps) if row)
+                finishes = [lambda r=ride_id: machine.finish(r, stored[r]) for ride_id in contenders] * 2
+                finished = sum(1 for row in await waves(finishes) if row)
+                seconds = time.perf_counter() - start
+                illegal = 0
+                for ride_id in list(contenders)[:100]:
+                    try:
+                        await machine.transition(ride_id, "finished", "pending", stored[ride_id])
+                    except IllegalTransition:
+                        illegal += 1
+                archived = await dal.fetch("archived", "SELECT COUNT(*) AS n FROM rides_archive")
+                print(f"  تقدم الحالات: {len(steps) + len(finishes):,} محاولة في {seconds:.2f}s، "
+                      f"وصل {arrived:,}، انتهى {finished:,}، في الأرشيف {archived[0]['n']:,}، مرفوض {illegal}")
+                m = machine.metrics()
+                print(f"  التنافس: {m['conflicts']:,} خاسر من {m['attempts'] - m['illegal']:,} ({m['conflict_rate']:.1%})، "
+                      f"CAS p50 {m['cas_ms']['p50']:.2f}ms p99 {m['cas_ms']['p99']:.2f}ms")
+                for name, stats in m["transitions"].items():
+                    print(f"    {name:>22}: نجح {stats['applied']:,} خسر {stats['conflicts']:,}")
+            await dal.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rides", type=int, default=2000)
+    parser.add_argument("--contenders", type=int, default=8, help="سائقون يقبلون نفس الطلب")
+    parser.add_argument("--pool", type=int, default=8, help="اتصالات SQLite")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,72 @@
+# قياس ذاكرة المسافات بين الخلايا: طلبات متكررة بين أحياء مزدحمة على مدينة اصطناعية
+# نسبة الإصابة، زمن التقدير مقارنة بمحرك الطرق مباشرة، خطأ التقريب، والبدء الدافئ من ملف
+# التشغيل من جذر المشروع: python -m benchmarks.bench_routecache --size 100 --requests 50000
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_routing import write_city_osm
+from tuktuk.metrics import percentile
+from tuktuk.routecache import RouteCache
+from tuktuk.routing import ContractionHierarchy, Router, load_osm
+
+
+def make_requests(graph, count, hotspots, rng):
+    centres = [rng.randrange(graph.n) for _ in range(hotspots)]
+    weights = [1 / (i + 1) for i in range(hotspots)]  # قلة من الأحياء تأخذ معظم الطلبات
+
+    def point():
+        v = rng.choices(centres, weights)[0]
+        return {"lat": graph.lat[v] + rng.gauss(0, 0.0015), "lng": graph.lng[v] + rng.gauss(0, 0.0015)}
+
+    return [(point(), point()) for _ in range(count)]
+
+
+def run(fn, requests):
+    times, results = [], []
+    for a, b in requests:
+        start = time.perf_counter()
+        results.append(fn(a, b))
+        times.append((time.perf_counter() - start) * 1e6)
+    return times, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100, help="حجم المدينة الاصطناعية")
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--hotspots", type=int, default=40)
+    parser.add_argument("--capacity", type=int, default=50_000)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        osm = os.path.join(tmp, "city.osm")
+        write_city_osm(osm, args.size, rng)
+        graph = load_osm(osm)
+        router = Router(graph, ContractionHierarchy.build(graph))
+        requests = make_requests(graph, args.requests, args.hotspots, rng)
+
+        direct_us, exact = run(router.route, requests[: args.requests // 10])
+        cache = RouteCache(router, capacity=args.capacity)
+        cached_us, approx = run(cache.route, requests)
+        m = cache.metrics()
+        half = len(cached_us) // 2
+        print(f"محرك الطرق مباشرة: p50 {percentile(direct_us, 50):,.0f}µs p99 {percentile(direct_us, 99):,.0f}µs")
+        print(f"مع الذاكرة:       p50 {percentile(cached_us, 50):,.1f}µs p99 {percentile(cached_us, 99):,.0f}µs، متوسط {sum(cached_us) / len(cached_us):,.0f}µs")
+        print(f"  النصف الثاني (بعد الإحماء): متوسط {sum(cached_us[half:]) / (len(cached_us) - half):,.0f}µs")
+        print(f"  إصابة {m['hit_rate']:.1%} | حجم {m['size']:,} | طرد {m['evictions']:,} | نفس الخلية {m['same_cell']:,}")
+
+        errors = [abs(y[0] - x[0]) / x[0] for x, y in zip(exact, approx) if x and y and x[0] > 0.5]
+        print(f"خطأ المسافة: متوسط {sum(errors) / len(errors):.1%}، p95 {percentile(errors, 95):.1%}")
+
+        warm = os.path.join(tmp, "routes.json")
+        saved = cache.save(warm)
+        restarted = RouteCache(router, capacity=args.capacity)
+        start = time.perf_counter()
+        loaded = restarted.load(warm)
+        elapsed = time.perf_counter() - start
+        run(restarted.route, requests[: args.requests // 10])
+        print(f"بدء دافئ: {saved:,} مدخل في {os.path.getsize(warm) / 1e6:.1f} MB، تحميل {elapsed * 1000:.0f}ms، إصابة بعده {restarted.metrics()['hit_rate']:.1%}")
@@ -0,0 +1,121 @@
+# قياس محرك الطرق على مدينة اصطناعية (شبكة شوارع بها اتجاه واحد وشوارع مقطوعة) تكتب كملف OSM:
+# زمن التحميل والتجهيز، صحة contraction hierarchies مقارنة بـ A*، وزمن الاستعلام لكل نوع
+# التشغيل من جذر المشروع: python -m benchmarks.bench_routing --size 150 --queries 2000
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from tuktuk.geo import haversine_km
+from tuktuk.metrics import percentile
+from tuktuk.routing import ContractionHierarchy, Router, load_osm
+
+SPACING_DEG = 0.0011  # ~120 متر بين التقاطعات
+
+
+def write_city_osm(path, size, rng, origin=(30.0, 31.2)):
+    def node_id(r, c):
+        return r * size + c + 1
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<osm version="0.6">\n')
+        for r in range(size):
+            for c in range(size):
+                lat = origin[0] + r * SPACING_DEG + rng.uniform(-0.2, 0.2) * SPACING_DEG
+                lng = origin[1] + c * SPACING_DEG + rng.uniform(-0.2, 0.2) * SPACING_DEG
+                f.write(f' <node id="{node_id(r, c)}" lat="{lat:.7f}" lon="{lng:.7f}"/>\n')
+        way = 1
+        for horizontal in (True, False):
+            for line in range(size):
+                main = line % 8 == 0
+                oneway = not main and rng.random() < 0.3
+                cells = [(line, k) if horizontal else (k, line) for k in range(size)]
+                # شوارع جانبية مقطوعة عشوائيا إلى أجزاء
+                segment = [cells[0]]
+                for cell in cells[1:]:
+                    if not main and rng.random() < 0.06:
+                        if len(segment) > 1:
+                            f.write(_way(way, segment, main, oneway, node_id))
+                            way += 1
+                        segment = []
+                    segment.append(cell)
+                if len(segment) > 1:
+                    f.write(_way(way, segment, main, oneway, node_id))
+                    way += 1
+        f.write("</osm>\n")
+
+
+def _way(way_id, cells, main, oneway, node_id):
+    refs = "".join(f'  <nd ref="{node_id(r, c)}"/>\n' for r, c in cells)
+    tags = f'  <tag k="highway" v="{"primary" if main else "residential"}"/>\n'
+    if oneway:
+        tags += '  <tag k="oneway" v="yes"/>\n'
+    return f' <way id="{way_id}">\n{refs}{tags} </way>\n'
+
+
+def random_point(graph, rng):
+    v = rng.randrange(graph.n)
+    return {"lat": graph.lat[v] + rng.uniform(-3e-4, 3e-4), "lng": graph.lng[v] + rng.uniform(-3e-4, 3e-4)}
+
+
+def timed(fn, items):
+    times, results = [], []
+    for item in items:
+        start = time.perf_counter()
+        results.append(fn(*item))
+        times.append((time.perf_counter() - start) * 1e6)
+    return times, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=150, help="عدد التقاطعات في كل اتجاه")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        osm = os.path.join(tmp, "city.osm")
+        write_city_osm(osm, args.size, rng)
+        start = time.perf_counter()
+        graph = load_osm(osm)
+        print(f"الرسم: {graph.n:,} عقدة، {len(graph.targets):,} حافة، تحميل {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        ch = ContractionHierarchy.build(graph)
+        print(f"التجهيز: {time.perf_counter() - start:.1f}s، {len(ch.up[1]) + len(ch.down[1]):,} حافة صاعدة")
+
+        saved = os.path.join(tmp, "city.graph")
+        Router(graph, ch).save(saved)
+        start = time.perf_counter()
+        router = Router.load(saved)
+        print(f"الملف {os.path.getsize(saved) / 1e6:.1f} MB، تحميل {time.perf_counter() - start:.2f}s")
+
+    plain = Router(graph)
+    pairs = [(random_point(graph, rng), random_point(graph, rng)) for _ in range(args.queries)]
+
+    snap_us, _ = timed(lambda a, b: router.snapper.snap(a["lat"], a["lng"]), pairs)
+    ch_us, ch_results = timed(router.route, pairs)
+    checked = pairs[: max(1, args.queries // 10)]
+    astar_us, astar_results = timed(plain.route, checked)
+
+    mismatches = sum(
+        1 for x, y in zip(ch_results, astar_results)
+        if (x is None) != (y is None) or (x and abs(x[1] - y[1]) > 1e-3 * max(1.0, y[1]))
+    )
+    print(f"التطابق مع A*: {len(checked) - mismatches}/{len(checked)}")
+    for label, us in (("التقاط", snap_us), ("CH نقطة لنقطة", ch_us), ("A* نقطة لنقطة", astar_us)):
+        print(f"  {label:>14}: p50 {percentile(us, 50):,.0f}µs p99 {percentile(us, 99):,.0f}µs")
+
+    many = [(pairs[i][0], [p[1] for p in pairs[i + 1:i + 9]]) for i in range(0, min(len(pairs) - 9, 500))]
+    many_us, _ = timed(router.one_to_many, many)
+    print(f"  {'CH واحد لثمانية':>14}: p50 {percentile(many_us, 50):,.0f}µs p99 {percentile(many_us, 99):,.0f}µs")
+
+    ratios = [
+        found[0] / haversine_km(a["lat"], a["lng"], b["lat"], b["lng"])
+        for (a, b), found in zip(pairs, ch_results)
+        if found and haversine_km(a["lat"], a["lng"], b["lat"], b["lng"]) > 0.5
+    ]
+    print(f"مسافة الطريق ÷ الخط المستقيم: متوسط {sum(ratios) / len(ratios):.2f}، p95 {percentile(ratios, 95):.2f}")
@@ -0,0 +1,102 @@
+# قياس التسعير الديناميكي: ساعة محاكاة من أحداث السائقين والطلبات مع منطقة ازدحام،
+# تكلفة التحديث التدريجي لكل حدث، صحته مقارنة بإعادة الحساب الكامل، وعدد العروض في الثانية
+# التشغيل من جذر المشروع: python -m benchmarks.bench_surge --drivers 5000 --events 200000 --quotes 100000
+import argparse
+import random
+import time
+
+from tuktuk.metrics import percentile
+from tuktuk.surge import SurgeGrid, surge_multiplier
+
+CENTER = (30.0444, 31.2357)
+HOTSPOT = (30.0600, 31.2500)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def point(rng, hot=False):
+    lat, lng = HOTSPOT if hot else CENTER
+    spread = 0.01 if hot else 0.08
+    return {"lat": lat + rng.gauss(0, spread), "lng": lng + rng.gauss(0, spread)}
+
+
+# المرجع: إعادة الحساب من الجداول كلها
+def rescan(grid):
+    cells = set()
+    for i, j in list(grid.demand) + list(grid.supply):
+        cells.update((i + a, j + b) for a in (-1, 0, 1) for b in (-1, 0, 1))
+    expected = {}
+    for i, j in cells:
+        demand = sum(grid.demand.get((i + a, j + b), 0) for a in (-1, 0, 1) for b in (-1, 0, 1))
+        supply = sum(grid.supply.get((i + a, j + b), 0) for a in (-1, 0, 1) for b in (-1, 0, 1))
+        value = surge_multiplier(demand, supply) if demand else 1.0
+        if value > 1.0:
+            expected[(i, j)] = value
+    return expected
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drivers", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--quotes", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    clock = Clock()
+    grid = SurgeGrid(clock=clock)
+
+    drivers = [f"d{i}" for i in range(args.drivers)]
+    for driver_id in drivers:
+        grid.driver({"id": driver_id, "status": "available", "location": point(rng)})
+
+    open_rides, next_ride, event_us, peak = [], 0, [], None
+    step = 3600 / args.events
+    for _ in range(args.events):
+        clock.now += step
+        roll = rng.random()
+        # في منتصف الساعة يرتفع الطلب في منطقة واحدة
+        hot = 1200 < clock.now < 2400 and rng.random() < 0.6
+        start = time.perf_counter()
+        if roll < 0.6:
+            status = "available" if rng.random() < 0.7 else rng.choice(("busy", "offline"))
+            grid.driver({"id": rng.choice(drivers), "status": status, "location": point(rng, hot)})
+        elif roll < 0.8 or not open_rides:
+            grid.ride_requested({"id": next_ride, "pickup": point(rng, hot)})
+            open_rides.append(next_ride)
+            next_ride += 1
+        else:
+            grid.ride_closed(open_rides.pop(rng.randrange(len(open_rides))))
+        event_us.append((time.perf_counter() - start) * 1e6)
+        if peak is None and clock.now > 1800:
+            peak = grid.metrics()
+
+    print(f"الأحداث: {args.events:,}، p50 {percentile(event_us, 50):.1f}µs p99 {percentile(event_us, 99):.1f}µs، "
+          f"{args.events / (sum(event_us) / 1e6):,.0f} حدث/ث")
+    print(f"ذروة الازدحام: {peak['surging_cells']} خلية بزيادة، أعلى معامل {peak['max_surge']:.1f}")
+    print(f"التطابق مع إعادة الحساب الكامل: {'نعم' if rescan(grid) == grid.multipliers else 'لا'}")
+
+    # عروض الأسعار بعد موجة طلبات جديدة في منطقة الازدحام
+    for i in range(2000):
+        grid.ride_requested({"id": f"peak{i}", "pickup": point(rng, True)})
+    pickups = [point(rng, rng.random() < 0.3) for _ in range(args.quotes)]
+    dests = [point(rng) for _ in range(args.quotes)]
+    lat1, lng1 = [p["lat"] for p in pickups], [p["lng"] for p in pickups]
+    lat2, lng2 = [p["lat"] for p in dests], [p["lng"] for p in dests]
+
+    start = time.perf_counter()
+    single = [grid.quote(a, b)["price"] for a, b in zip(pickups, dests)]
+    single_s = time.perf_counter() - start
+    start = time.perf_counter()
+    _, _, surge, prices = grid.quote_batch(lat1, lng1, lat2, lng2)
+    batch_s = time.perf_counter() - start
+
+    print(f"عرض واحد كل مرة: {args.quotes / single_s:,.0f} عرض/ث")
+    print(f"دفعة واحدة: {args.quotes / batch_s:,.0f} عرض/ث ({single_s / batch_s:.0f}x)")
+    print(f"عروض بزيادة: {(surge > 1).mean():.0%}، الأسعار متطابقة: {'نعم' if prices.tolist() == single else 'لا'}")
@@ -0,0 +1,129 @@
+# قياس مخزن البلاطات: ملء MBTiles لمنطقة الخدمة من مجلد بلاطات محلي، ثم جلسات خريطة عبر HTTP
+# (شاشة هاتف عند zoom 15 مع تحريك) على خادم البلاطات: زمن الرد، نسبة الإصابة، البايتات في الزيارة الأولى
+# مقابل الزيارات التالية، وعدد الطلبات التي كانت ستذهب إلى tile.openstreetmap.org.
+# المتصفح يحترم Cache-Control: داخل max-age لا يرسل طلبا أصلا، وبعدها يعيد التحقق بـ If-None-Match (304)
+# التشغيل من جذر المشروع: python -m benchmarks.bench_tiles --sessions 200
+import argparse
+import asyncio
+import http.client
+import os
+import random
+import tempfile
+import threading
+import time
+
+from tuktuk.heatmap import tiles_in_bbox
+from tuktuk.metrics import percentile
+from tuktuk.tiles import SERVICE_AREA, TileServer, TileStore, directory_source, prefetch, serve
+
+CENTER = (30.0444, 31.2357)
+SCREEN_DEG = (0.0086, 0.0172)  # شاشة 400×800 بكسل عند zoom 15 تقريبا (lng، lat)
+
+
+# مصدر محلي بديل لخادم بلاطات حقيقي: ملفات بأحجام بلاطات PNG المعتادة
+def write_tiles(root, bbox, zooms, rng, tile_kb):
+    count = 0
+    for z in range(zooms[0], zooms[1] + 1):
+        for x, y in tiles_in_bbox(*bbox, z):
+            os.makedirs(os.path.join(root, str(z), str(x)), exist_ok=True)
+            with open(os.path.join(root, str(z), str(x), f"{y}.png"), "wb") as f:
+                f.write(rng.randbytes(int(tile_kb * 1024 * rng.uniform(0.3, 1.7))))
+            count += 1
+    return count
+
+
+# max-age من Cache-Control (0 إن لم يوجد)
+def max_age_of(response):
+    for part in (response.getheader("Cache-Control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name == "max-age":
+            return int(value)
+    return 0
+
+
+# جلسة واحدة عند الوقت now (ثوان): الشاشة الأولى حول مكان الجهاز المعتاد ثم عدة تحريكات.
+# ذاكرة المتصفح {المسار: (ETag، ينتهي عند)}: الصالح لا يطلب، المنتهي يعاد التحقق منه
+def session(conn, rng, device, now, zoom=15, pans=4):
+    cache = device["cache"]
+    lat, lng = device["home"][0] + rng.gauss(0, 0.002), device["home"][1] + rng.gauss(0, 0.002)
+    latencies, bytes_in, cached = [], 0, 0
+    for _ in range(pans + 1):
+        view = (lat - SCREEN_DEG[1] / 2, lng - SCREEN_DEG[0] / 2, lat + SCREEN_DEG[1] / 2, lng + SCREEN_DEG[0] / 2)
+        for x, y in tiles_in_bbox(*view, zoom):
+            path = f"/{zoom}/{x}/{y}.png"
+            entry = cache.get(path)
+            if entry is not None and now < entry[1]:
+                cached += 1
+                continue
+            headers = {"If-None-Match": entry[0]} if entry is not None else {}
+            t = time.perf_counter()
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            latencies.append((time.perf_counter() - t) * 1000)
+            bytes_in += len(body)
+            if response.status in (200, 304):
+                cache[path] = (response.getheader("ETag"), now + max_age_of(response))
+        lat += rng.gauss(0, SCREEN_DEG[1] / 2)
+        lng += rng.gauss(0, SCREEN_DEG[0] / 2)
+    return latencies, bytes_in, cached
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zooms", nargs=2, type=int, default=(10, 15))
+    parser.add_argument("--tile-kb", type=float, default=12)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--gap-days", type=float, default=5, help="متوسط الأيام بين زيارتين لنفس الجهاز")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        written = write_tiles(os.path.join(tmp, "source"), SERVICE_AREA, args.zooms, rng, args.tile_kb)
+        store = TileStore(os.path.join(tmp, "cairo.mbtiles"))
+        start = time.perf_counter()
+        result = prefetch(store, directory_source(os.path.join(tmp, "source")), SERVICE_AREA, args.zooms)
+        seconds = time.perf_counter() - start
+        print(f"الملء: {result['fetched']:,} بلاطة ({result['bytes'] / 1e6:,.1f} MB) في {seconds:.2f}s "
+              f"({result['fetched'] / seconds:,.0f} بلاطة/ث)، من {written:,} في المصدر")
+        start = time.perf_counter()
+        again = prefetch(store, directory_source(os.path.join(tmp, "source")), SERVICE_AREA, args.zooms)
+        print(f"إعادة الملء: {again['skipped']:,} موجودة، {again['fetched']} جديدة في {time.perf_counter() - start:.2f}s")
+
+        server = TileServer(store)
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=lambda: loop.run_until_complete(serve(server, "127.0.0.1", args.port)), daemon=True).start()
+        time.sleep(0.3)
+
+        conn = http.client.HTTPConnection("127.0.0.1", args.port)
+        # كل جهاز يحتفظ بذاكرته ومكانه المعتاد ووقت زيارته الأخيرة؛ نصف الجلسات من أجهزة رجعت للتطبيق
+        # بعد فترة عشوائية (متوسطها --gap-days)، بعضها داخل max-age وبعضها بعده
+        devices = [
+            {"home": (CENTER[0] + rng.gauss(0, 0.03), CENTER[1] + rng.gauss(0, 0.03)), "cache": {}, "now": 0.0}
+            for _ in range(max(1, args.sessions // 2))
+        ]
+        first, repeat = ({"ms": [], "bytes": 0, "n": 0, "cached": 0} for _ in range(2))
+        for i in range(args.sessions):
+            device = devices[i % len(devices)]
+            bucket = repeat if device["cache"] else first
+            if device["cache"]:
+                device["now"] += rng.expovariate(1 / (args.gap_days * 86400))
+            latencies, bytes_in, cached = session(conn, rng, device, device["now"])
+            bucket["ms"] += latencies
+            bucket["bytes"] += bytes_in
+            bucket["cached"] += cached
+            bucket["n"] += 1
+        for name, bucket in (("زيارة أولى", first), ("زيارة متكررة", repeat)):
+            if bucket["n"]:
+                print(f"{name}: {bucket['n']} جلسة، {len(bucket['ms']) / bucket['n']:.0f} طلب/جلسة "
+                      f"+ {bucket['cached'] / bucket['n']:.0f} بلاطة من ذاكرة المتصفح، "
+                      f"{bucket['bytes'] / bucket['n'] / 1024:,.0f} KB/جلسة، p50 {percentile(bucket['ms'], 50):.2f}ms "
+                      f"p99 {percentile(bucket['ms'], 99):.2f}ms")
+        conn.request("GET", "/metrics")
+        print(f"الخادم: {conn.getresponse().read().decode()}")
+        m = server.metrics()
+        print(f"طلبات لم تذهب إلى tile.openstreetmap.org: {m['hits'] + m['not_modified']:,} من {m['requests']:,} "
+              f"(إصابة {m['hit_rate']:.1%})، {m['not_modified']:,} رد 304 بدون بيانات")
+        store.close()
@@ -0,0 +1,121 @@
+# قياس مخزن المسارات على أسبوع محاكى من نبضات السائقين (كل 10 ثوان أثناء الوردية):
+# نسبة الضغط مقارنة بـ JSON وبثلاثة أعمدة خام، سرعة الإضافة، سرعة المسح الكامل،
+# وزمن استعلام مسار سائق لساعة واستعلام منطقة لساعة
+# التشغيل من جذر المشروع: python -m benchmarks.bench_trajectory --drivers 300 --days 7
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from tuktuk import trajectory
+from tuktuk.metrics import percentile
+from tuktuk.trajectory import SCALE, TrajectoryStore, _varints, decode_block
+
+CENTER = (30.0444, 31.2357)
+PING_SECONDS = 10
+SHIFT_HOURS = 10
+WEEK_START = 1_767_225_600  # 2026-01-01
+
+
+# وردية واحدة يوميا لكل سائق، حركة عشوائية بسرعة التوك توك مع توقفات
+def simulate(drivers, days, rng):
+    states = [
+        {
+            "id": f"driver-{i:05d}",
+            "lat": CENTER[0] + rng.gauss(0, 0.03),
+            "lng": CENTER[1] + rng.gauss(0, 0.03),
+            "heading": rng.uniform(-1, 1),
+            "start": rng.uniform(5, 14) * 3600,
+        }
+        for i in range(drivers)
+    ]
+    for day in range(days):
+        base = WEEK_START + day * 86400
+        for t in range(0, SHIFT_HOURS * 3600 + 14 * 3600, PING_SECONDS):
+            for state in states:
+                offset = t - state["start"]
+                if not 0 <= offset < SHIFT_HOURS * 3600:
+                    continue
+                if rng.random() < 0.7:
+                    state["heading"] += rng.gauss(0, 0.3)
+                    step = rng.uniform(0, 0.0005)
+                    state["lat"] += step * (1 if state["heading"] > 0 else -1) * rng.random()
+                    state["lng"] += step * (1 if abs(state["heading"]) < 1 else -1) * rng.random()
+                yield state["id"], state["lat"], state["lng"], base + t + rng.randrange(2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drivers", type=int, default=300)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TrajectoryStore(os.path.join(tmp, "trajectories"))
+        json_bytes = points = 0
+        sample = []
+        start = time.perf_counter()
+        for driver_id, lat, lng, ts in simulate(args.drivers, args.days, rng):
+            store.append(driver_id, lat, lng, ts)
+            points += 1
+            if points % 97 == 0:
+                # حجم النبضة كما تكتب اليوم: {"id": ..., "location": {...}} لكل تحديث
+                json_bytes += 97 * len(json.dumps({"id": driver_id, "location": {"lat": lat, "lng": lng}, "ts": ts}))
+            if driver_id == "driver-00000":
+                sample.append((ts, round(lat * SCALE) / SCALE, round(lng * SCALE) / SCALE))
+        store.flush()
+        write_s = time.perf_counter() - start
+        m = store.metrics()
+        print(f"{points:,} نبضة لـ {args.drivers} سائق × {args.days} يوم، إضافة {points / write_s:,.0f} نبضة/ث (مع التوليد)")
+        print(f"الحجم: {m['bytes'] / 1e6:.1f} MB في {m['segments']} segment و{m['blocks']:,} كتلة، "
+              f"{m['bytes_per_point']:.2f} بايت/نقطة")
+        print(f"الضغط: ×{m['compression_ratio']:.1f} مقابل 24 بايت خام، ×{json_bytes / m['bytes']:.0f} مقابل JSON")
+
+        track = store.track("driver-00000")
+        print(f"التطابق بعد الفك (مسار سائق كامل): {'نعم' if track == sample else 'لا'}")
+
+        # إعادة الفتح: الفهرس يبنى من الملفات
+        store.close()
+        start = time.perf_counter()
+        store = TrajectoryStore(os.path.join(tmp, "trajectories"))
+        print(f"إعادة الفتح وبناء الفهرس: {time.perf_counter() - start:.2f}s، {store.metrics()['points']:,} نقطة")
+
+        start = time.perf_counter()
+        scanned = sum(1 for _ in store.within(-90, -180, 90, 180))
+        scan_s = time.perf_counter() - start
+        print(f"مسح كامل: {scanned / scan_s / 1e6:.2f} مليون نقطة/ث")
+
+        entry = store._blocks[0]
+        payload = store._read(*entry[2:5])
+        start = time.perf_counter()
+        for _ in range(200):
+            _varints(payload)
+        python_us = (time.perf_counter() - start) / 200 * 1e6
+        start = time.perf_counter()
+        for _ in range(200):
+            decode_block(payload, entry[0])
+        numpy_us = (time.perf_counter() - start) / 200 * 1e6
+        print(f"فك كتلة {entry[5]} نقطة: numpy {numpy_us:.0f}µs، بايثون {python_us:.0f}µs")
+
+        end_ts = WEEK_START + args.days * 86400
+        track_us, area_us, area_points = [], [], []
+        for _ in range(args.queries):
+            hour = rng.randrange(WEEK_START, end_ts - 3600)
+            driver_id = f"driver-{rng.randrange(args.drivers):05d}"
+            t = time.perf_counter()
+            store.track(driver_id, hour, hour + 3600)
+            track_us.append((time.perf_counter() - t) * 1e6)
+            lat, lng = CENTER[0] + rng.gauss(0, 0.02), CENTER[1] + rng.gauss(0, 0.02)
+            t = time.perf_counter()
+            area_points.append(sum(1 for _ in store.within(lat - 0.005, lng - 0.005, lat + 0.005, lng + 0.005, hour, hour + 3600)))
+            area_us.append((time.perf_counter() - t) * 1e6)
+        print(f"مسار سائق لساعة: p50 {percentile(track_us, 50):,.0f}µs p99 {percentile(track_us, 99):,.0f}µs")
+        print(f"منطقة 1 كم² لساعة: p50 {percentile(area_us, 50):,.0f}µs p99 {percentile(area_us, 99):,.0f}µs، "
+              f"متوسط {sum(area_points) / len(area_points):,.0f} نقطة")
+        print(f"(numpy {'مستخدم' if trajectory.np is not None else 'غير مثبت'})")
+        store.close()
@@ -0,0 +1,62 @@
+# مقارنة محرك الكتابة الجماعية مع الحلقة التسلسلية القديمة
+# التشغيل من جذر المشروع: python -m benchmarks.bench_writer --copies 300
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import app
+
+
+# تكبير قاموس الملفات: نسخ المشروع داخل مجلدات فرعية متعددة
+def scaled_files(copies):
+    scaled = {}
+    for i in range(copies):
+        for path, content in app.files.items():
+            scaled[f"copy{i:04d}/{path}"] = content
+    return scaled
+
+
+# الحلقة التسلسلية كما كانت في create_project_structure قبل المحرك الجماعي
+def serial_write(entries, root):
+    for file_path, content in entries.items():
+        target = os.path.join(root, file_path)
+        directory = os.path.dirname(target)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(content.strip())
+
+
+def bulk_write(entries, root, workers=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.write_files([(p, c.strip()) for p, c in entries.items()], root, workers)
+
+
+def timed(write, entries, **kwargs):
+    root = tempfile.mkdtemp(prefix="tuktuk-bench-")
+    try:
+        start = time.perf_counter()
+        write(entries, root, **kwargs)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    entries = scaled_files(args.copies)
+    print(f"عدد الملفات: {len(entries)}")
+    serial = min(timed(serial_write, entries) for _ in range(args.repeat))
+    bulk = min(timed(bulk_write, entries, workers=args.workers) for _ in range(args.repeat))
+    print(f"تسلسلي: {serial:.3f}s ({len(entries) / serial:,.0f} ملف/ث)")
+    print(f"جماعي:  {bulk:.3f}s ({len(entries) / bulk:,.0f} ملف/ث)")
+    print(f"التسريع: x{serial / bulk:.2f}")
@@ -0,0 +1,43 @@
+// يولد benchmarks/geo_golden.json من utils/geo.ts نفسه (بعد حذف أنواع TypeScript)
+// التشغيل: node benchmarks/geo_golden.mjs
+import { readFileSync, writeFileSync } from 'fs';
+
+const here = new URL('.', import.meta.url);
+const source = readFileSync(new URL('../templates/utils/geo.ts', here), 'utf8')
+  .replace(/^import .*$/m, '')
+  .replace(/export /g, '')
+  .replace(/: (GeoLocation|number)/g, '');
+const { calculateDistance, calculatePrice } = new Function(`${source}\nreturn { calculateDistance, calculatePrice };`)();
+
+// مولد أرقام عشوائية ثابت حتى يبقى الملف مستقرا بين التشغيلات
+let seed = 42;
+const random = () => {
+  seed = (seed * 1103515245 + 12345) % 2147483648;
+  return seed / 2147483648;
+};
+
+const points = [
+  [[30.0444, 31.2357], [30.0444, 31.2357]],
+  [[30.0444, 31.2357], [30.0131, 31.2089]],
+  [[0, 0], [0, 180]],
+  [[90, 0], [-90, 0]],
+  [[-33.8688, 151.2093], [51.5074, -0.1278]],
+];
+for (let i = 0; i < 500; i++) {
+  const spread = i < 400 ? 0.3 : 60;
+  points.push([
+    [30.0444 + (random() * 2 - 1) * spread, 31.2357 + (random() * 2 - 1) * spread],
+    [30.0444 + (random() * 2 - 1) * spread, 31.2357 + (random() * 2 - 1) * spread],
+  ]);
+}
+
+const trips = points.map(([a, b]) => {
+  const distance = calculateDistance({ lat: a[0], lng: a[1] }, { lat: b[0], lng: b[1] });
+  return { pickup: a, destination: b, distance, price: calculatePrice(distance) };
+});
+
+// حالات تعادل toFixed التي يختلف فيها تقريب بايثون الافتراضي
+const toFixed = [0.125, 0.375, 2.675, 1.005, 0.005, 10.245, 3.14159, 0].map((x) => [x, parseFloat(x.toFixed(2))]);
+
+writeFileSync(new URL('geo_golden.json', here), JSON.stringify({ trips, toFixed }) + '\n');
+console.log(`wrote ${trips.length} trips`);
@@ -0,0 +1,21 @@
+/** @type {import('tailwindcss').Config} */
+// Same theme as the inline tailwind.config in the CDN profile's index.html
+export default {
+  content: ['./index.html', './*.tsx', './{components,services,utils,views}/**/*.{ts,tsx}'],
+  theme: {
+    extend: {
+      fontFamily: {
+        sans: ['Cairo', 'sans-serif'],
+      },
+      colors: {
+        brand: {
+          yellow: '#FFD700',
+          black: '#111111',
+          dark: '#1A1A1A',
+          gray: '#2D2D2D'
+        }
+      }
+    }
+  },
+  plugins: [],
+};
@@ -0,0 +1,71 @@
+import { defineConfig, loadEnv, Plugin } from 'vite';
+import react from '@vitejs/plugin-react';
+
+// Production profile (python app.py --profile production, generated into production/). Check the result with `npm run budget`
+const DEFAULT_SUPABASE_URL = 'https://oljxeosptnsmlcggzogw.supabase.co';
+
+// Long-lived vendor chunks: app releases don't invalidate them, and the map stack
+// is only fetched together with the lazy dashboards that use it
+const VENDOR_CHUNKS: Record<string, string[]> = {
+  react: ['react', 'react-dom', 'scheduler'],
+  map: ['leaflet', 'react-leaflet', '@react-leaflet/core'],
+  supabase: ['@supabase'],
+  motion: ['framer-motion', 'motion-dom', 'motion-utils'],
+  // lucide-react is side-effect-free ESM, so only the icons the views import end up here
+  icons: ['lucide-react'],
+};
+
+const vendorChunk = (id: string) => {
+  const match = id.match(/node_modules\/((?:@[^/]+\/)?[^/]+)/);
+  if (!match) return undefined;
+  for (const [chunk, packages] of Object.entries(VENDOR_CHUNKS)) {
+    if (packages.some(p => match[1] === p || match[1].startsWith(`${p}/`))) return `vendor-${chunk}`;
+  }
+  return 'vendor';
+};
+
+// Hints the browser can act on before the entry script runs: the Supabase connection
+// and the hashed Arabic font files the first paint needs
+const preloadHints = (supabaseUrl: string): Plugin => {
+  let base = '/';
+  return {
+    name: 'tuktuk-preload-hints',
+    enforce: 'post',
+    configResolved(config) {
+      base = config.base;
+    },
+    transformIndexHtml(_, ctx) {
+      const fonts = Object.keys(ctx.bundle || {}).filter(f => /cairo-arabic-(400|700)-normal-[^/]*\.woff2$/.test(f));
+      return [
+        { tag: 'link', attrs: { rel: 'preconnect', href: new URL(supabaseUrl).origin, crossorigin: '' }, injectTo: 'head-prepend' },
+        ...fonts.map(href => ({
+          tag: 'link',
+          attrs: { rel: 'preload', as: 'font', type: 'font/woff2', href: `${base}${href}`, crossorigin: '' },
+          injectTo: 'head' as const,
+        })),
+      ];
+    },
+  };
+};
+
+export default defineConfig(({ mode }) => {
+  const env = loadEnv(mode, process.cwd());
+  return {
+    plugins: [react(), preloadHints(env.VITE_SUPABASE_URL || DEFAULT_SUPABASE_URL)],
+    base: '/tuktuk/',
+    build: {
+      outDir: 'dist',
+      target: 'es2020',
+      cssCodeSplit: true,
+      rollupOptions: {
+        output: {
+          manualChunks: vendorChunk,
+        },
+      },
+    },
+    server: {
+      port: 3000,
+      host: true,
+    },
+  };
+});
@@ -0,0 +1,207 @@
+/// <reference types="vite/client" />
+import React, { useEffect, useState } from 'react';
+import { MapContainer, TileLayer, Marker, Popup, Rectangle, useMap, useMapEvents } from 'react-leaflet';
+import L from 'leaflet';
+import { GeoLocation, Driver } from '../types';
+import { HeatCell, HeatmapLayer, HEATMAP_URL, fetchHeatmap, heatCells } from '../utils/heatmap';
+import { CLUSTERS_URL, ClusterView, DriverPoint, clusterIcon, fetchClusters } from '../utils/driverClusters';
+
+// Tiles from the local MBTiles server (python -m tuktuk.tiles) when VITE_TILE_URL is set
+const TILE_URL = import.meta.env.VITE_TILE_URL || 'https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png';
+
+// Custom Icons
+const tuktukIcon = new L.DivIcon({
+  className: 'custom-icon',
+  html: `<div style="background-color: #FFD700; border: 2px solid black; padding: 5px; border-radius: 50%; width: 30px; height: 30px; display: flex; align-items: center; justify-content: center; box-shadow: 0 2px 5px rgba(0,0,0,0.5);">🛺</div>`,
+  iconSize: [30, 30],
+  iconAnchor: [15, 15]
+});
+
+const userIcon = new L.DivIcon({
+  className: 'custom-icon',
+  html: `<div style="background-color: black; border: 2px solid white; padding: 5px; border-radius: 50%; width: 20px; height: 20px; display: flex; align-items: center; justify-content: center; box-shadow: 0 2px 5px rgba(0,0,0,0.5);">👤</div>`,
+  iconSize: [20, 20],
+  iconAnchor: [10, 10]
+});
+
+const destIcon = new L.DivIcon({
+  className: 'custom-icon',
+  html: `<div style="background-color: red; border: 2px solid white; padding: 5px; border-radius: 50%; width: 20px; height: 20px; display: flex; align-items: center; justify-content: center; box-shadow: 0 2px 5px rgba(0,0,0,0.5);">🏁</div>`,
+  iconSize: [20, 20],
+  iconAnchor: [10, 10]
+});
+
+interface MapComponentProps {
+  center: GeoLocation;
+  drivers?: Driver[];
+  destination?: GeoLocation | null;
+  onLocationSelect?: (loc: GeoLocation) => void;
+  interactive?: boolean;
+  heatmap?: HeatmapLayer;
+}
+
+const MapUpdater: React.FC<{ center: GeoLocation }> = ({ center }) => {
+  const map = useMap();
+  useEffect(() => {
+    map.setView([center.lat, center.lng], map.getZoom());
+  }, [center, map]);
+  return null;
+};
+
+const LocationSelector: React.FC<{ onSelect?: (loc: GeoLocation) => void }> = ({ onSelect }) => {
+  useMapEvents({
+    click(e) {
+      if (onSelect) {
+        onSelect({ lat: e.latlng.lat, lng: e.latlng.lng });
+      }
+    },
+  });
+  return null;
+};
+
+const HEATMAP_REFRESH_MS = 15000;
+
+// Demand overlay: refetches the tiles in view after every pan/zoom and periodically
+const HeatmapOverlay: React.FC<{ layer: HeatmapLayer }> = ({ layer }) => {
+  const map = useMap();
+  const [cells, setCells] = useState<HeatCell[]>([]);
+  const [max, setMax] = useState(0);
+  const [moved, setMoved] = useState(0);
+  useMapEvents({ moveend: () => setMoved(n => n + 1) });
+
+  useEffect(() => {
+    let cancelled = false;
+    const load = () => {
+      const b = map.getBounds();
+      fetchHeatmap(layer, map.getZoom(), [b.getSouth(), b.getWest(), b.getNorth(), b.getEast()])
+        .then(view => {
+          if (cancelled || !view) return;
+          setCells(heatCells(view));
+          setMax(view.max);
+        })
+        .catch(() => {});
+    };
+    load();
+    const timer = setInterval(load, HEATMAP_REFRESH_MS);
+    return () => {
+      cancelled = true;
+      clearInterval(timer);
+    };
+  }, [layer, map, moved]);
+
+  return (
+    <>
+      {cells.map(cell => (
+        <Rectangle
+          key={cell.bounds.join()}
+          bounds={cell.bounds}
+          pathOptions={{ stroke: false, fillColor: '#ef4444', fillOpacity: 0.15 + 0.5 * (cell.count / (max || 1)) }}
+        />
+      ))}
+    </>
+  );
+};
+
+const DriverMarker: React.FC<{ driver: DriverPoint }> = ({ driver }) => (
+  <Marker 
+    position={[driver.location.lat, driver.location.lng]} 
+    icon={tuktukIcon}
+  >
+    <Popup>
+      <div className="text-black text-right">
+        <p className="font-bold">{driver.name}</p>
+        <p>⭐ {driver.rating}</p>
+      </div>
+    </Popup>
+  </Marker>
+);
+
+const CLUSTERS_REFRESH_MS = 5000;
+
+// Server-side clusters for the current view; clicking a cluster zooms into it
+const ClusteredDrivers: React.FC = () => {
+  const map = useMap();
+  const [view, setView] = useState<ClusterView | null>(null);
+  const [moved, setMoved] = useState(0);
+  useMapEvents({ moveend: () => setMoved(n => n + 1) });
+
+  useEffect(() => {
+    let cancelled = false;
+    // Periodic refreshes keep the old view (no re-render) when no driver changed
+    const load = (force: boolean) => {
+      const b = map.getBounds();
+      fetchClusters(map.getZoom(), [b.getSouth(), b.getWest(), b.getNorth(), b.getEast()])
+        .then(next => {
+          if (!cancelled && next) setView(prev => (!force && prev && prev.version === next.version ? prev : next));
+        })
+        .catch(() => {});
+    };
+    load(true);
+    const timer = setInterval(() => load(false), CLUSTERS_REFRESH_MS);
+    return () => {
+      cancelled = true;
+      clearInterval(timer);
+    };
+  }, [map, moved]);
+
+  if (!view) return null;
+  return (
+    <>
+      {view.clusters.map(cluster => (
+        <Marker
+          key={`${cluster.lat}:${cluster.lng}`}
+          position={[cluster.lat, cluster.lng]}
+          icon={clusterIcon(cluster.count)}
+          eventHandlers={{ click: () => map.setView([cluster.lat, cluster.lng], map.getZoom() + 2) }}
+        />
+      ))}
+      {view.points.map(driver => <DriverMarker key={driver.id} driver={driver} />)}
+    </>
+  );
+};
+
+const MapComponent: React.FC<MapComponentProps> = ({ 
+  center, 
+  drivers = [], 
+  destination,
+  onLocationSelect,
+  interactive = true,
+  heatmap
+}) => {
+  return (
+    <MapContainer 
+      center={[center.lat, center.lng]} 
+      zoom={15} 
+      scrollWheelZoom={interactive}
+      style={{ height: '100%', width: '100%' }}
+    >
+      <TileLayer
+        attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
+        url={TILE_URL}
+      />
+      
+      <MapUpdater center={center} />
+      <LocationSelector onSelect={onLocationSelect} />
+      {heatmap && HEATMAP_URL && <HeatmapOverlay layer={heatmap} />}
+
+      {/* User Location */}
+      <Marker position={[center.lat, center.lng]} icon={userIcon}>
+        <Popup>موقعك الحالي</Popup>
+      </Marker>
+
+      {/* Destination */}
+      {destination && (
+        <Marker position={[destination.lat, destination.lng]} icon={destIcon}>
+           <Popup>الوجهة</Popup>
+        </Marker>
+      )}
+
+      {/* Drivers: clustered by the server when configured, otherwise one marker each */}
+      {CLUSTERS_URL
+        ? <ClusteredDrivers />
+        : drivers.map(driver => <DriverMarker key={driver.id} driver={driver} />)}
+    </MapContainer>
+  );
+};
+
+export default MapComponent;
\ No newline at end of file
@@ -0,0 +1,41 @@
+import { Driver, GeoLocation } from '../types';
+import { calculateDistance } from './geo';
+
+// Local keyed copy of the available drivers, updated from realtime payloads
+export type DriverMap = Record<string, Driver>;
+
+export const VIEW_RADIUS_KM = 5;
+
+const isVisible = (driver: Driver | undefined, center: GeoLocation, radiusKm: number): driver is Driver =>
+  !!driver &&
+  driver.status === 'available' &&
+  !!driver.location &&
+  calculateDistance(center, driver.location) <= radiusKm;
+
+export const toDriverMap = (drivers: Driver[], center: GeoLocation, radiusKm = VIEW_RADIUS_KM): DriverMap => {
+  const map: DriverMap = {};
+  drivers.forEach(d => {
+    if (isVisible(d, center, radiusKm)) map[d.id] = d;
+  });
+  return map;
+};
+
+// Apply one postgres_changes payload as a delta instead of refetching the table
+export const applyDriverChange = (
+  prev: DriverMap,
+  payload: { eventType: string; new: Partial<Driver>; old: Partial<Driver> },
+  center: GeoLocation,
+  radiusKm = VIEW_RADIUS_KM
+): DriverMap => {
+  const id = (payload.new && payload.new.id) || (payload.old && payload.old.id);
+  if (!id) return prev;
+
+  const merged = payload.eventType === 'DELETE' ? undefined : ({ ...prev[id], ...payload.new } as Driver);
+  if (isVisible(merged, center, radiusKm)) {
+    return { ...prev, [id]: merged };
+  }
+  if (!(id in prev)) return prev;
+  const next = { ...prev };
+  delete next[id];
+  return next;
+};
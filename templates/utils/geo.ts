@@ -0,0 +1,25 @@
+import { GeoLocation } from '../types';
+
+// Haversine formula to calculate distance between two points in km
+export const calculateDistance = (loc1: GeoLocation, loc2: GeoLocation): number => {
+  const R = 6371; // Radius of the earth in km
+  const dLat = deg2rad(loc2.lat - loc1.lat);
+  const dLon = deg2rad(loc2.lng - loc1.lng);
+  const a =
+    Math.sin(dLat / 2) * Math.sin(dLat / 2) +
+    Math.cos(deg2rad(loc1.lat)) * Math.cos(deg2rad(loc2.lat)) *
+    Math.sin(dLon / 2) * Math.sin(dLon / 2);
+  const c = 2 * Math.atan2(Math.sqrt(a), Math.sqrt(1 - a));
+  const d = R * c; // Distance in km
+  return parseFloat(d.toFixed(2));
+};
+
+const deg2rad = (deg: number): number => {
+  return deg * (Math.PI / 180);
+};
+
+export const calculatePrice = (distanceKm: number): number => {
+  const BASE_RATE = 5; // 5 EGP base
+  const PER_KM = 3; // 3 EGP per km
+  return Math.ceil(BASE_RATE + (distanceKm * PER_KM));
+};
\ No newline at end of file
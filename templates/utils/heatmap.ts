@@ -0,0 +1,57 @@
+/// <reference types="vite/client" />
+
+// Demand heatmap tiles from the aggregation service. Keep in sync with tuktuk/heatmap.py
+// The service keeps counts per map tile and zoom, so one request returns only the tiles in view.
+// Run it with `python -m tuktuk.heatmap` and set VITE_HEATMAP_URL=http://127.0.0.1:8788
+export const HEATMAP_URL: string | undefined = import.meta.env.VITE_HEATMAP_URL;
+
+export type HeatmapLayer = 'pending' | 'drivers' | 'requests_5m' | 'requests_1h';
+
+export interface HeatmapView {
+  layer: HeatmapLayer;
+  z: number;
+  sub_bits: number;
+  version: number;
+  max: number;
+  tiles: { x: number; y: number; cells: [number, number, number][] }[];
+}
+
+export interface HeatCell {
+  bounds: [[number, number], [number, number]];
+  count: number;
+}
+
+const tileLat = (y: number, z: number) => {
+  const n = Math.PI - (2 * Math.PI * y) / 2 ** z;
+  return (180 / Math.PI) * Math.atan(Math.sinh(n));
+};
+
+const tileLng = (x: number, z: number) => (x / 2 ** z) * 360 - 180;
+
+export const fetchHeatmap = async (
+  layer: HeatmapLayer,
+  zoom: number,
+  [minLat, minLng, maxLat, maxLng]: [number, number, number, number],
+): Promise<HeatmapView | null> => {
+  if (!HEATMAP_URL) return null;
+  const bbox = [minLat, minLng, maxLat, maxLng].map(v => v.toFixed(5)).join(',');
+  const response = await fetch(`${HEATMAP_URL}/heatmap/${layer}?z=${Math.round(zoom)}&bbox=${bbox}`);
+  if (!response.ok) throw new Error(`heatmap ${response.status}`);
+  return response.json();
+};
+
+// Each tile is a (2^sub_bits)^2 grid; cell (sx, sy) of tile (x, y) is tile (x*8+sx, y*8+sy) at z+sub_bits
+export const heatCells = (view: HeatmapView): HeatCell[] => {
+  const z = view.z + view.sub_bits;
+  const side = 1 << view.sub_bits;
+  return view.tiles.flatMap(({ x, y, cells }) =>
+    cells.map(([sx, sy, count]) => {
+      const cx = x * side + sx;
+      const cy = y * side + sy;
+      return {
+        bounds: [[tileLat(cy + 1, z), tileLng(cx, z)], [tileLat(cy, z), tileLng(cx + 1, z)]] as HeatCell['bounds'],
+        count,
+      };
+    }),
+  );
+};
@@ -0,0 +1,133 @@
+import { useEffect, useState } from 'react';
+import { Driver, User } from '../types';
+import { supabase, USERS_TABLE, DRIVERS_TABLE } from '../services/supabase';
+
+// Shared by-ID cache for passenger/driver profiles. Keep in sync with tuktuk/profiles.py
+// Lookups made in the same tick go out as one `in('id', ...)` query, concurrent lookups
+// of one ID share a promise (single-flight), and change-feed payloads refresh or drop entries.
+export type Profile = Pick<User, 'id' | 'name' | 'phone'> &
+  Partial<Pick<Driver, 'rating' | 'total_rides' | 'tuktuk_number'>>;
+
+const TTL_MS = 10 * 60 * 1000;
+
+export class ProfileCache {
+  private entries = new Map<string, { value: Profile | null; at: number }>();
+  private inflight = new Map<string, Promise<Profile | null>>();
+  private queued = new Map<string, (value: Profile | null | Error) => void>();
+  private stats = { hits: 0, misses: 0, shared: 0, batches: 0, invalidations: 0 };
+
+  private fields: string[];
+
+  constructor(private table: string, private columns: string, private ttlMs = TTL_MS) {
+    this.fields = columns.split(',');
+  }
+
+  // Keep only the profile columns; driver rows and change payloads also carry location, status, ...
+  private pick(row: Partial<Profile>): Partial<Profile> {
+    const picked: Record<string, unknown> = {};
+    this.fields.forEach(field => {
+      if (field in row) picked[field] = (row as Record<string, unknown>)[field];
+    });
+    return picked as Partial<Profile>;
+  }
+
+  private fresh(id: string) {
+    const entry = this.entries.get(id);
+    return entry && Date.now() - entry.at <= this.ttlMs ? entry : undefined;
+  }
+
+  // Synchronous read for first render; undefined means "not loaded yet"
+  peek(id: string): Profile | null | undefined {
+    return this.fresh(id)?.value;
+  }
+
+  get(id: string): Promise<Profile | null> {
+    const entry = this.fresh(id);
+    if (entry) {
+      this.stats.hits++;
+      return Promise.resolve(entry.value);
+    }
+    const pending = this.inflight.get(id);
+    if (pending) {
+      this.stats.shared++;
+      return pending;
+    }
+    this.stats.misses++;
+    const promise = new Promise<Profile | null>((resolve, reject) => {
+      this.queued.set(id, value => (value instanceof Error ? reject(value) : resolve(value)));
+    });
+    this.inflight.set(id, promise);
+    if (this.queued.size === 1) setTimeout(() => this.flush(), 0);
+    return promise;
+  }
+
+  private async flush() {
+    const batch = this.queued;
+    this.queued = new Map();
+    this.stats.batches++;
+    const ids = [...batch.keys()];
+    let result;
+    try {
+      result = await supabase.from(this.table).select(this.columns).in('id', ids);
+    } catch (e) {
+      // A rejected request (network error) must still settle every queued lookup
+      ids.forEach(id => {
+        this.inflight.delete(id);
+        batch.get(id)!(e instanceof Error ? e : new Error(String(e)));
+      });
+      return;
+    }
+    const { data, error } = result;
+    const rows = new Map(((data as unknown as Profile[]) || []).map(row => [row.id, row]));
+    ids.forEach(id => {
+      this.inflight.delete(id);
+      if (error) return batch.get(id)!(new Error(error.message));
+      const value = rows.get(id) || null;
+      this.entries.set(id, { value, at: Date.now() });
+      batch.get(id)!(value);
+    });
+  }
+
+  // Seed from rows a screen already has (e.g. the available-drivers snapshot)
+  prime(rows: Profile[]) {
+    rows.forEach(row => this.entries.set(row.id, { value: this.pick(row) as Profile, at: Date.now() }));
+  }
+
+  // Apply one postgres_changes payload: merge updates into cached rows, drop deleted ones
+  apply(payload: { eventType: string; new: Partial<Profile>; old: Partial<Profile> }) {
+    const id = (payload.new && payload.new.id) || (payload.old && payload.old.id);
+    const entry = id ? this.entries.get(id) : undefined;
+    if (!id || !entry) return;
+    this.stats.invalidations++;
+    if (payload.eventType === 'DELETE' || !entry.value) this.entries.delete(id);
+    else this.entries.set(id, { value: { ...entry.value, ...this.pick(payload.new) }, at: Date.now() });
+  }
+
+  metrics() {
+    const lookups = this.stats.hits + this.stats.misses + this.stats.shared;
+    return { ...this.stats, size: this.entries.size, hitRate: lookups ? (this.stats.hits + this.stats.shared) / lookups : 0 };
+  }
+}
+
+// Passenger profiles are refreshed by TTL only: names and phones rarely change, and a `users`
+// change feed on every driver's screen would cost more than the occasional stale name
+export const userProfiles = new ProfileCache(USERS_TABLE, 'id,name,phone');
+export const driverProfiles = new ProfileCache(DRIVERS_TABLE, 'id,name,phone,rating,total_rides,tuktuk_number');
+
+// Profile for an ID, re-rendering once it loads; no query when it is already cached
+export const useProfile = (cache: ProfileCache, id: string | null | undefined): Profile | null => {
+  const [profile, setProfile] = useState<Profile | null>(() => (id && cache.peek(id)) || null);
+
+  useEffect(() => {
+    if (!id) {
+      setProfile(null);
+      return;
+    }
+    let live = true;
+    setProfile(cache.peek(id) || null);
+    cache.get(id).then(p => live && setProfile(p), () => {});
+    return () => { live = false; };
+  }, [cache, id]);
+
+  return profile;
+};
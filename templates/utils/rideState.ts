@@ -0,0 +1,29 @@
+import { Ride } from '../types';
+import { supabase, RIDES_TABLE } from '../services/supabase';
+
+// Ride state machine. Keep in sync with tuktuk/ridestate.py
+// Statuses only move forward, so the expected current status doubles as the version:
+// the update applies only if nobody changed the ride first, and the loser learns it in the same round trip.
+export const NEXT_STATUS: Partial<Record<Ride['status'], Ride['status']>> = {
+  pending: 'accepted',
+  accepted: 'on_the_way',
+  on_the_way: 'finished',
+};
+
+export const canTransition = (from: Ride['status'], to: Ride['status']) => NEXT_STATUS[from] === to;
+
+// Returns the updated ride, or null when another driver or request got there first
+export const transitionRide = async (ride: Ride, to: Ride['status'], driverId: string): Promise<Ride | null> => {
+  if (!canTransition(ride.status, to)) throw new Error(`Illegal ride transition ${ride.status} -> ${to}`);
+
+  // Accepting claims the ride; later steps are only for the driver who holds it
+  const claiming = ride.status === 'pending';
+  const changes: Partial<Ride> = claiming ? { status: to, driver_id: driverId } : { status: to };
+  let query = supabase.from(RIDES_TABLE).update(changes).eq('id', ride.id).eq('status', ride.status);
+  // A pending ride may already be offered to one driver: only that driver (or anyone, if unassigned) can claim it
+  query = claiming ? query.or(`driver_id.is.null,driver_id.eq.${driverId}`) : query.eq('driver_id', driverId);
+
+  const { data, error } = await query.select();
+  if (error) throw error;
+  return data && data.length === 1 ? (data[0] as Ride) : null;
+};
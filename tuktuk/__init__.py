@@ -0,0 +1 @@
+# خدمات TukTuk Go الخلفية بلغة بايثون (التوزيع، الأسعار، البيانات الحية)
@@ -0,0 +1,106 @@
+# سجل الرحلات النشطة فقط (غير المنتهية) بالراكب والسائق: "الرحلة الحالية لفلان" في O(1)
+# بدلا من استعلام checkRide/checkActive على جدول rides الذي لا يتوقف عن النمو.
+# يتحدث تدريجيا من أحداث rides (postgres_changes)، والرحلة المنتهية تخرج إلى الأرشيف
+
+CLOSED = ("finished", "cancelled")
+
+
+class ActiveRides:
+    def __init__(self, archive=None):
+        # archive(ride) يستقبل كل رحلة منتهية (مثلا للكتابة في rides_archive)
+        self.archive = archive
+        self._rides = {}
+        # الراكب أو السائق → {معرف الرحلة: created_at}؛ عادة رحلة واحدة
+        self._by_passenger = {}
+        self._by_driver = {}
+        self.counters = {"events": 0, "opened": 0, "archived": 0, "lookups": 0, "found": 0}
+
+    def __len__(self):
+        return len(self._rides)
+
+    def __contains__(self, ride_id):
+        return ride_id in self._rides
+
+    @staticmethod
+    def _link(index, key, ride):
+        if key is not None:
+            index.setdefault(key, {})[ride["id"]] = ride.get("created_at") or ""
+
+    @staticmethod
+    def _unlink(index, key, ride_id):
+        rides = index.get(key)
+        if rides is not None:
+            rides.pop(ride_id, None)
+            if not rides:
+                del index[key]
+
+    def _drop(self, ride_id):
+        ride = self._rides.pop(ride_id, None)
+        if ride is not None:
+            self._unlink(self._by_passenger, ride.get("passenger_id"), ride_id)
+            self._unlink(self._by_driver, ride.get("driver_id"), ride_id)
+        return ride
+
+    # صف كامل أو تحديث جزئي لرحلة
+    def upsert(self, ride):
+        self.counters["events"] += 1
+        old = self._drop(ride["id"])
+        merged = {**old, **ride} if old is not None else dict(ride)
+        if merged.get("status") in CLOSED:
+            self.counters["archived"] += 1
+            if self.archive is not None:
+                self.archive(merged)
+            return merged
+        if old is None:
+            self.counters["opened"] += 1
+        self._rides[ride["id"]] = merged
+        self._link(self._by_passenger, merged.get("passenger_id"), merged)
+        self._link(self._by_driver, merged.get("driver_id"), merged)
+        return merged
+
+    def load(self, rides):
+        for ride in rides:
+            self.upsert(ride)
+        return len(self._rides)
+
+    def remove(self, ride_id):
+        self.counters["events"] += 1
+        return self._drop(ride_id)
+
+    # حدث postgres_changes من جدول rides
+    def apply(self, change):
+        if change.get("eventType") == "DELETE":
+            self.remove((change.get("old") or {}).get("id"))
+        elif (change.get("new") or {}).get("id"):
+            self.upsert(change["new"])
+
+    def _current(self, index, key):
+        self.counters["lookups"] += 1
+        rides = index.get(key)
+        if not rides:
+            return None
+        self.counters["found"] += 1
+        # الأحدث أولا كما في order('created_at', { ascending: false }).limit(1)
+        ride_id = next(iter(rides)) if len(rides) == 1 else max(rides, key=rides.get)
+        return self._rides[ride_id]
+
+    def for_passenger(self, passenger_id):
+        return self._current(self._by_passenger, passenger_id)
+
+    def for_driver(self, driver_id):
+        return self._current(self._by_driver, driver_id)
+
+    def get(self, ride_id):
+        return self._rides.get(ride_id)
+
+    def pending(self):
+        return [ride for ride in self._rides.values() if ride.get("status") == "pending"]
+
+    def metrics(self):
+        return {
+            **self.counters,
+            "active": len(self._rides),
+            "passengers": len(self._by_passenger),
+            "drivers": len(self._by_driver),
+        }
+
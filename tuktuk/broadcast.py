@@ -0,0 +1,79 @@
+import math
+
+# تقسيم بث الرحلات حسب الخلايا الجغرافية: الرحلة المعلقة تنشر على قناة خلية نقطة الانطلاق
+# والسائق يشترك في خليته والخلايا المجاورة لها، فيصله كل طلب داخل ~خلية واحدة منه مرة واحدة فقط
+# (لو نشرنا أيضا على عدة خلايا لوصلت الرحلة نفسها للسائق من أكثر من قناة)
+# يجب أن تبقى القيم مطابقة لـ utils/geocell.ts
+CELL_DEG = 0.02  # ~2.2 كم
+NEIGHBOUR_RING = 1  # 3×3 قنوات لكل سائق
+
+
+def cell_of(lat, lng, cell_deg=CELL_DEG):
+    return (math.floor(lat / cell_deg), math.floor(lng / cell_deg))
+
+
+def channel_name(cell):
+    return f"rides:cell:{cell[0]}:{cell[1]}"
+
+
+def neighbour_cells(lat, lng, ring=NEIGHBOUR_RING, cell_deg=CELL_DEG):
+    ci, cj = cell_of(lat, lng, cell_deg)
+    return {(i, j) for i in range(ci - ring, ci + ring + 1) for j in range(cj - ring, cj + ring + 1)}
+
+
+# اشتراكات سائق واحد: عند تغير خليته نرجع القنوات التي يجب الانضمام إليها ومغادرتها فقط
+class DriverSubscription:
+    def __init__(self, ring=NEIGHBOUR_RING, cell_deg=CELL_DEG):
+        self.ring = ring
+        self.cell_deg = cell_deg
+        self.cell = None
+        self.channels = set()
+
+    def update(self, lat, lng):
+        cell = cell_of(lat, lng, self.cell_deg)
+        if cell == self.cell:
+            return set(), set()
+        self.cell = cell
+        wanted = {channel_name(c) for c in neighbour_cells(lat, lng, self.ring, self.cell_deg)}
+        join, leave = wanted - self.channels, self.channels - wanted
+        self.channels = wanted
+        return join, leave
+
+
+# وسيط قنوات في الذاكرة للمحاكاة المحلية (بديل قنوات Supabase realtime)
+class ChannelHub:
+    def __init__(self):
+        self.members = {}
+        self.delivered = {}
+        self.published = 0
+
+    def join(self, member, channel):
+        self.members.setdefault(channel, set()).add(member)
+
+    def leave(self, member, channel):
+        members = self.members.get(channel)
+        if members:
+            members.discard(member)
+            if not members:
+                del self.members[channel]
+
+    def publish(self, channel, message):
+        self.published += 1
+        receivers = self.members.get(channel, ())
+        for member in receivers:
+            self.delivered[member] = self.delivered.get(member, 0) + 1
+        return len(receivers)
+
+
+# الناشر: يرسل الرحلة المعلقة على قناة خلية نقطة الانطلاق فقط
+class RideBroadcaster:
+    def __init__(self, hub, cell_deg=CELL_DEG):
+        self.hub = hub
+        self.cell_deg = cell_deg
+
+    def channel_for(self, ride):
+        pickup = ride["pickup"]
+        return channel_name(cell_of(pickup["lat"], pickup["lng"], self.cell_deg))
+
+    def publish(self, ride):
+        return self.hub.publish(self.channel_for(ride), ride)
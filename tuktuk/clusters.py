@@ -0,0 +1,169 @@
+import argparse
+import asyncio
+import json
+from urllib.parse import parse_qsl, urlsplit
+
+from . import httpd
+from .dal import connect
+from .heatmap import GRID_ZOOM, grid_of
+
+# تجميع السائقين على الخريطة حسب مستوى التكبير: لكل مستوى شبكة خلاياها 64 بكسل (ربع بلاطة)،
+# والخلية تحفظ العدد ومجموع الإحداثيات (المركز = المتوسط) ومعرفات السائقين فيها.
+# حركة السائق تعدل خلية أو اثنتين في كل مستوى (O(المستويات))، والاستعلام يقرأ خلايا الشاشة فقط،
+# فالعميل يستلم عشرات المجموعات بدل آلاف الـ Marker. الخلية بسائق واحد ترجع كنقطة كاملة
+# الواجهة تعرضها في MapComponent عبر utils/driverClusters.ts
+
+MIN_ZOOM = 10
+MAX_ZOOM = 17  # بعده تعرض كل النقاط منفردة
+CELL_BITS = 2  # 4×4 خلايا في البلاطة (256/4 = 64 بكسل)
+MAX_CELLS = 4096  # حد الخلايا في استعلام واحد (شاشة كبيرة عند أي تكبير)
+POINT_FIELDS = ("id", "name", "rating", "location")
+
+
+class DriverClusters:
+    def __init__(self):
+        # لكل مستوى {(cx, cy): [العدد، مجموع lat، مجموع lng، {المعرفات}]}
+        self.levels = {z: {} for z in range(MIN_ZOOM, MAX_ZOOM + 2)}
+        self._drivers = {}
+        self.version = 0
+        self.counters = {"events": 0, "moves": 0, "cell_changes": 0, "queries": 0}
+
+    def __len__(self):
+        return len(self._drivers)
+
+    def _cells(self, grid):
+        gx, gy = grid
+        return [(z, (gx >> (GRID_ZOOM - z - CELL_BITS), gy >> (GRID_ZOOM - z - CELL_BITS))) for z in self.levels]
+
+    def _add(self, driver_id, point, sign):
+        lat, lng = point["location"]["lat"], point["location"]["lng"]
+        for z, key in self._cells(point["grid"]):
+            cells = self.levels[z]
+            cell = cells.get(key)
+            if cell is None:
+                cell = cells[key] = [0, 0.0, 0.0, set()]
+                self.counters["cell_changes"] += 1
+            cell[0] += sign
+            cell[1] += sign * lat
+            cell[2] += sign * lng
+            if sign > 0:
+                cell[3].add(driver_id)
+            else:
+                cell[3].discard(driver_id)
+                if not cell[0]:
+                    del cells[key]
+                    self.counters["cell_changes"] += 1
+
+    # نفس قاعدة DriverFeed: المتاح بموقع يظهر، غيره يخرج
+    def driver(self, row):
+        self.counters["events"] += 1
+        driver_id = row["id"]
+        before = self._drivers.get(driver_id)
+        merged = {**before, **row} if before else row
+        if merged.get("status") != "available" or not merged.get("location"):
+            if before is not None:
+                self._add(driver_id, before, -1)
+                del self._drivers[driver_id]
+                self.version += 1
+            return
+        after = {field: merged.get(field) for field in POINT_FIELDS}
+        after["status"] = "available"
+        after["grid"] = grid_of(after["location"]["lat"], after["location"]["lng"])
+        if before is not None:
+            self.counters["moves"] += 1
+            self._add(driver_id, before, -1)
+        self._drivers[driver_id] = after
+        self._add(driver_id, after, 1)
+        self.version += 1
+
+    def load(self, drivers):
+        for row in drivers:
+            self.driver(row)
+
+    # حدث postgres_changes من جدول drivers
+    def apply(self, change):
+        if change.get("eventType") == "DELETE":
+            row = {"id": (change.get("old") or {}).get("id"), "status": None}
+        else:
+            row = change.get("new") or {}
+        if row.get("id"):
+            self.driver(row)
+
+    def _point(self, driver_id):
+        point = self._drivers[driver_id]
+        return {field: point[field] for field in POINT_FIELDS}
+
+    # المجموعات والنقاط داخل المستطيل عند z؛ بعد MAX_ZOOM كل السائقين نقاط منفردة
+    def view(self, z, min_lat, min_lng, max_lat, max_lng):
+        self.counters["queries"] += 1
+        z = max(MIN_ZOOM, z)
+        level = min(z, MAX_ZOOM + 1)
+        shift = GRID_ZOOM - level - CELL_BITS
+        x0, y0 = (v >> shift for v in grid_of(max_lat, min_lng))
+        x1, y1 = (v >> shift for v in grid_of(min_lat, max_lng))
+        # شاشة أوسع من الحد: نصغر المستوى حتى تكفي الخلايا
+        while (x1 - x0 + 1) * (y1 - y0 + 1) > MAX_CELLS and level > MIN_ZOOM:
+            level -= 1
+            x0, y0, x1, y1 = x0 >> 1, y0 >> 1, x1 >> 1, y1 >> 1
+        cells = self.levels[level]
+        # عند MIN_ZOOM قد يبقى المستطيل أكبر من الحد (العالم كله): نمر على خلايا المستوى الموجودة بدلا منه
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(cells):
+            found = [cell for (cx, cy), cell in cells.items() if x0 <= cx <= x1 and y0 <= cy <= y1]
+        else:
+            found = [cell for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1) if (cell := cells.get((cx, cy)))]
+        clusters, points = [], []
+        for count, sum_lat, sum_lng, ids in found:
+            if count == 1 or z > MAX_ZOOM:
+                points += [self._point(driver_id) for driver_id in ids]
+            else:
+                clusters.append({"lat": sum_lat / count, "lng": sum_lng / count, "count": count})
+        return {"z": z, "version": self.version, "clusters": clusters, "points": points}
+
+    def metrics(self):
+        return {
+            **self.counters,
+            "drivers": len(self._drivers),
+            "version": self.version,
+            "cells": {z: len(cells) for z, cells in self.levels.items()},
+        }
+
+
+# خادم HTTP بسيط:
+#   GET  /clusters?z=15&bbox=min_lat,min_lng,max_lat,max_lng
+#   POST /changes  (حدث postgres_changes من جدول drivers أو قائمة أحداث)
+#   GET  /metrics
+def route(clusters, method, target, body):
+    url = urlsplit(target)
+    if method == "POST" and url.path == "/changes":
+        payload = json.loads(body)
+        changes = payload if isinstance(payload, list) else [payload]
+        for change in changes:
+            if change.get("table", "drivers") == "drivers":
+                clusters.apply(change)
+        return "200 OK", {"applied": len(changes), "version": clusters.version}
+    if method == "GET" and url.path == "/metrics":
+        return "200 OK", clusters.metrics()
+    if method == "GET" and url.path == "/clusters":
+        params = dict(parse_qsl(url.query))
+        min_lat, min_lng, max_lat, max_lng = (float(v) for v in params["bbox"].split(","))
+        return "200 OK", clusters.view(int(params.get("z", 15)), min_lat, min_lng, max_lat, max_lng)
+    return "404 Not Found", {"error": "not found"}
+
+
+async def serve(clusters, host="127.0.0.1", port=8789, database=None):
+    if database:
+        dal = await connect(database)
+        clusters.load(await dal.available_drivers())
+        await dal.close()
+    await httpd.serve(httpd.json_routes(lambda *request: route(clusters, *request)), host, port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="خدمة تجميع السائقين على الخريطة")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8789)
+    parser.add_argument("--database", help="postgres://... أو مسار SQLite لتحميل السائقين المتاحين")
+    args = parser.parse_args()
+
+    print(f"تجميع السائقين على http://{args.host}:{args.port}")
+    asyncio.run(serve(DriverClusters(), args.host, args.port, args.database))
@@ -0,0 +1,382 @@
+import math
+import uuid
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from .geo import _require_numpy, np
+
+# تخزين عمودي مضغوط للسائقين والرحلات في المسار الساخن (المطابقة، التحليلات):
+# خط العرض والطول مصفوفات float64، الحالة رمز int8، والمعرفات 16 بايت داخل bytearray واحد
+# بدلا من قاموس JSON لكل صف. الأعمدة تقرأ بدون نسخ (memoryview / numpy) للحساب المتجه.
+# الحقول الباردة (name, phone, tuktuk_number) لا تخزن إلا مع keep_extra=True
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ID_SIZE = 16
+NULL_ID = bytes(ID_SIZE)
+EMPTY, DELETED = -1, -2
+
+
+# قيم enum محفوظة مرة واحدة؛ الصف يخزن رقمها فقط
+class Interned:
+    def __init__(self, values):
+        self.values = list(values)
+        self.codes = {v: i for i, v in enumerate(self.values)}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            if len(self.values) >= 127:
+                raise ValueError(f"قيم كثيرة جدا: {value}")
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def value(self, code):
+        return self.values[code]
+
+
+# نفس القيم في types.ts
+DRIVER_STATUS = Interned(("available", "busy", "offline"))
+RIDE_STATUS = Interned(("pending", "accepted", "on_the_way", "finished"))
+
+
+def to_micros(text):
+    if not text:
+        return 0
+    dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros):
+    return (EPOCH + timedelta(microseconds=micros)).isoformat() if micros else None
+
+
+class DriverRecord:
+    __slots__ = ("id", "lat", "lng", "status", "rating", "total_rides", "created_at")
+    WIRE_KEYS = frozenset(("id", "location", "status", "rating", "total_rides", "created_at"))
+
+    def __init__(self, id, lat, lng, status, rating=5.0, total_rides=0, created_at=0):
+        self.id = id
+        self.lat = lat
+        self.lng = lng
+        self.status = status
+        self.rating = rating
+        self.total_rides = total_rides
+        self.created_at = created_at
+
+    @classmethod
+    def from_json(cls, obj):
+        location = obj.get("location") or {}
+        return cls(
+            obj["id"],
+            location.get("lat", math.nan),
+            location.get("lng", math.nan),
+            obj.get("status") or "available",
+            obj.get("rating", 5.0),
+            obj.get("total_rides", 0),
+            to_micros(obj.get("created_at")),
+        )
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "rating": self.rating,
+            "total_rides": self.total_rides,
+            "location": None if math.isnan(self.lat) else {"lat": self.lat, "lng": self.lng},
+            "created_at": from_micros(self.created_at),
+        }
+
+
+class RideRecord:
+    __slots__ = (
+        "id", "passenger_id", "driver_id", "pickup_lat", "pickup_lng", "dest_lat", "dest_lng",
+        "status", "price", "distance", "created_at",
+    )
+    WIRE_KEYS = frozenset(("id", "passenger_id", "driver_id", "pickup", "destination", "status", "price", "distance", "created_at"))
+
+    def __init__(self, id, passenger_id, driver_id, pickup_lat, pickup_lng, dest_lat, dest_lng,
+                 status, price, distance, created_at=0):
+        self.id = id
+        self.passenger_id = passenger_id
+        self.driver_id = driver_id
+        self.pickup_lat = pickup_lat
+        self.pickup_lng = pickup_lng
+        self.dest_lat = dest_lat
+        self.dest_lng = dest_lng
+        self.status = status
+        self.price = price
+        self.distance = distance
+        self.created_at = created_at
+
+    @classmethod
+    def from_json(cls, obj):
+        pickup = obj["pickup"]
+        destination = obj.get("destination") or {}
+        return cls(
+            obj["id"],
+            obj["passenger_id"],
+            obj.get("driver_id"),
+            pickup["lat"],
+            pickup["lng"],
+            destination.get("lat", math.nan),
+            destination.get("lng", math.nan),
+            obj.get("status") or "pending",
+            obj.get("price", 0),
+            obj.get("distance", 0),
+            to_micros(obj.get("created_at")),
+        )
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "passenger_id": self.passenger_id,
+            "driver_id": self.driver_id,
+            "pickup": {"lat": self.pickup_lat, "lng": self.pickup_lng},
+            "destination": None if math.isnan(self.dest_lat) else {"lat": self.dest_lat, "lng": self.dest_lng},
+            "status": self.status,
+            "price": self.price,
+            "distance": self.distance,
+            "created_at": from_micros(self.created_at),
+        }
+
+
+# جدول عمودي عام: صفوف متراصة (الحذف ينقل آخر صف مكانه) وفهرس معرفات بعنونة مفتوحة
+# داخل array("i") بدلا من dict (القاموس وحده ~100 بايت لكل صف)
+class _Columns:
+    RECORD = None
+    ID_COLUMNS = ()
+    FIELDS = ()
+    ENUMS = {}
+
+    def __init__(self, keep_extra=False):
+        self.ids = bytearray()
+        self._names = {}
+        self._columns = []
+        for name in self.ID_COLUMNS:
+            setattr(self, name, bytearray())
+            self._columns.append((name, getattr(self, name), "id"))
+        for name, typecode in self.FIELDS:
+            setattr(self, name, array(typecode))
+            self._columns.append((name, getattr(self, name), self.ENUMS.get(name)))
+        self.extra = [] if keep_extra else None
+        self._slots = array("i", [EMPTY]) * 1024
+        self._used = 0
+
+    def __len__(self):
+        return len(self.ids) // ID_SIZE
+
+    def __contains__(self, id):
+        return self.index_of(id) is not None
+
+    # المعرفات بصيغة UUID تخزن كـ 16 بايت؛ غيرها يحول إلى uuid5 ويحفظ نصه الأصلي
+    def _key(self, text):
+        if text is None:
+            return NULL_ID
+        if len(text) == 36 and text[8] == text[13] == text[18] == text[23] == "-":
+            try:
+                key = bytes.fromhex(text.replace("-", ""))
+            except ValueError:
+                key = None
+            if key is not None and len(key) == ID_SIZE:
+                return key
+        key = uuid.uuid5(uuid.NAMESPACE_OID, text).bytes
+        self._names[key] = text
+        return key
+
+    def _text(self, key):
+        key = bytes(key)
+        if key == NULL_ID:
+            return None
+        name = self._names.get(key)
+        if name is not None:
+            return name
+        h = key.hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def _probe(self, key):
+        slots, ids = self._slots, self.ids
+        mask = len(slots) - 1
+        i = int.from_bytes(key[:8], "little") & mask
+        free = -1
+        while True:
+            row = slots[i]
+            if row == EMPTY:
+                return (i if free < 0 else free), -1
+            if row == DELETED:
+                if free < 0:
+                    free = i
+            elif ids[row * ID_SIZE:(row + 1) * ID_SIZE] == key:
+                return i, row
+            i = (i + 1) & mask
+
+    def _rehash(self, capacity):
+        size = 1024
+        while size < capacity * 2:
+            size *= 2
+        self._slots = array("i", [EMPTY]) * size
+        self._used = 0
+        mask = size - 1
+        ids = self.ids
+        for row in range(len(self)):
+            i = int.from_bytes(ids[row * ID_SIZE:row * ID_SIZE + 8], "little") & mask
+            while self._slots[i] != EMPTY:
+                i = (i + 1) & mask
+            self._slots[i] = row
+            self._used += 1
+
+    def index_of(self, id):
+        row = self._probe(self._key(id))[1]
+        return row if row >= 0 else None
+
+    # إضافة صف أو استبداله إذا كان المعرف موجودا؛ ترجع رقم الصف
+    def upsert(self, obj):
+        record = self.RECORD.from_json(obj)
+        key = self._key(record.id)
+        slot, row = self._probe(key)
+        if row < 0:
+            if (self._used + 1) * 2 > len(self._slots):
+                self._rehash(len(self) + 1)
+                slot = self._probe(key)[0]
+            row = len(self)
+            if self._slots[slot] == EMPTY:
+                self._used += 1
+            self._slots[slot] = row
+            self.ids += key
+        self._store(row, record)
+        if self.extra is not None:
+            extra = {k: v for k, v in obj.items() if k not in self.RECORD.WIRE_KEYS}
+            if row == len(self.extra):
+                self.extra.append(extra)
+            else:
+                self.extra[row] = extra
+        return row
+
+    def extend(self, objs):
+        objs = list(objs)
+        if (self._used + len(objs)) * 2 > len(self._slots):
+            self._rehash(len(self) + len(objs))
+        for obj in objs:
+            self.upsert(obj)
+        return len(objs)
+
+    def _store(self, row, record):
+        append = row == len(getattr(self, self.FIELDS[0][0]))
+        for name, column, kind in self._columns:
+            value = getattr(record, name)
+            if kind == "id":
+                column[row * ID_SIZE:(row + 1) * ID_SIZE] = self._key(value)
+                continue
+            if kind is not None:
+                value = kind.code(value)
+            if append:
+                column.append(value)
+            else:
+                column[row] = value
+
+    def record(self, row):
+        values = {}
+        for name, column, kind in self._columns:
+            if kind == "id":
+                values[name] = self._text(column[row * ID_SIZE:(row + 1) * ID_SIZE])
+            elif kind is not None:
+                values[name] = kind.value(column[row])
+            else:
+                values[name] = column[row]
+        return self.RECORD(self._text(self.ids[row * ID_SIZE:(row + 1) * ID_SIZE]), **values)
+
+    def get(self, id):
+        row = self.index_of(id)
+        return None if row is None else self.record(row)
+
+    def set(self, id, **values):
+        row = self.index_of(id)
+        if row is None:
+            raise KeyError(id)
+        for name, value in values.items():
+            kind = self.ENUMS.get(name)
+            getattr(self, name)[row] = kind.code(value) if kind else value
+        return row
+
+    # حذف بنقل آخر صف إلى مكان المحذوف حتى تبقى الأعمدة متراصة
+    def remove(self, id):
+        slot, row = self._probe(self._key(id))
+        if row < 0:
+            return False
+        self._slots[slot] = DELETED
+        last = len(self) - 1
+        if row != last:
+            moved_slot = self._probe(bytes(self.ids[last * ID_SIZE:]))[0]
+            self._slots[moved_slot] = row
+        for column in [self.ids] + [c for _, c, _ in self._columns]:
+            if isinstance(column, bytearray):
+                column[row * ID_SIZE:(row + 1) * ID_SIZE] = column[last * ID_SIZE:]
+                del column[last * ID_SIZE:]
+            else:
+                column[row] = column[last]
+                column.pop()
+        if self.extra is not None:
+            self.extra[row] = self.extra[last]
+            self.extra.pop()
+        return True
+
+    def to_json(self, rows=None):
+        out = []
+        for row in range(len(self)) if rows is None else rows:
+            obj = self.record(row).to_json()
+            if self.extra is not None:
+                obj.update(self.extra[row])
+            out.append(obj)
+        return out
+
+    # عرض بدون نسخ لعمود واحد؛ يمنع تغيير حجم العمود (append/remove) حتى يحرر
+    def view(self, name):
+        return memoryview(getattr(self, name))
+
+    def arrays(self, *names):
+        _require_numpy()
+        return tuple(np.asarray(self.view(name)) for name in names)
+
+    def nbytes(self):
+        total = len(self.ids) + self._slots.itemsize * len(self._slots)
+        for _, column, _ in self._columns:
+            total += len(column) if isinstance(column, bytearray) else column.itemsize * len(column)
+        return total
+
+
+class DriverColumns(_Columns):
+    RECORD = DriverRecord
+    FIELDS = (("lat", "d"), ("lng", "d"), ("status", "b"), ("rating", "d"), ("total_rides", "I"), ("created_at", "q"))
+    ENUMS = {"status": DRIVER_STATUS}
+
+    def move(self, id, lat, lng):
+        row = self.index_of(id)
+        if row is None:
+            raise KeyError(id)
+        self.lat[row] = lat
+        self.lng[row] = lng
+        return row
+
+    # أرقام صفوف السائقين بحالة معينة (مثلا المتاحين للمطابقة)
+    def rows_with_status(self, status):
+        code = DRIVER_STATUS.code(status)
+        if np is not None:
+            return np.flatnonzero(np.asarray(self.view("status")) == code)
+        return [row for row, value in enumerate(self.status) if value == code]
+
+
+class RideColumns(_Columns):
+    RECORD = RideRecord
+    ID_COLUMNS = ("passenger_id", "driver_id")
+    FIELDS = (
+        ("pickup_lat", "d"), ("pickup_lng", "d"), ("dest_lat", "d"), ("dest_lng", "d"),
+        ("status", "b"), ("price", "d"), ("distance", "d"), ("created_at", "q"),
+    )
+    ENUMS = {"status": RIDE_STATUS}
+
+    def assign(self, id, driver_id, status="accepted"):
+        row = self.set(id, status=status)
+        self.driver_id[row * ID_SIZE:(row + 1) * ID_SIZE] = self._key(driver_id)
+        return row
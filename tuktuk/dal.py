@@ -0,0 +1,481 @@
+import asyncio
+import datetime
+import json
+import re
+import sqlite3
+import time
+import uuid
+
+from .metrics import Histogram
+
+try:
+    import asyncpg
+except ImportError:  # SQLite يكفي للتجارب المحلية
+    asyncpg = None
+
+# طبقة الوصول للبيانات لخدمات بايثون (التوزيع، الاستقبال، الاختبارات) على جداول users/drivers/rides:
+# اتصالات مشتركة (pool)، استعلامات معدة مسبقا، upsert حقيقي بدل "ابحث ثم أضف أو عدل" في Register،
+# ودوال دفعات متعددة الصفوف. نفس الاستعلامات تعمل على Postgres (asyncpg) وعلى SQLite كبديل محلي.
+# كل استعلام مسمى ويقاس زمنه في مدرج تكراري خاص به
+
+USERS_TABLE = "users"
+DRIVERS_TABLE = "drivers"
+RIDES_TABLE = "rides"
+
+JSON_COLUMNS = ("location", "pickup", "destination")
+BATCH_ROWS = 500  # صفوف لكل جملة INSERT متعددة القيم
+
+# حقول التسجيل كما في Register.handleSubmit؛ عند تكرار الهاتف يتحدث الموقع فقط
+REGISTER_COLUMNS = {
+    USERS_TABLE: ("id", "name", "phone", "location"),
+    DRIVERS_TABLE: ("id", "name", "phone", "location", "tuktuk_number", "status"),
+}
+RIDE_COLUMNS = ("id", "passenger_id", "driver_id", "pickup", "destination", "status", "price", "distance")
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    phone TEXT UNIQUE NOT NULL,
+    location TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+CREATE TABLE IF NOT EXISTS drivers (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    phone TEXT UNIQUE NOT NULL,
+    tuktuk_number TEXT,
+    status TEXT DEFAULT 'available',
+    rating REAL DEFAULT 5,
+    total_rides INTEGER DEFAULT 0,
+    location TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+CREATE TABLE IF NOT EXISTS rides (
+    id TEXT PRIMARY KEY,
+    passenger_id TEXT REFERENCES users(id),
+    driver_id TEXT REFERENCES drivers(id),
+    pickup TEXT,
+    destination TEXT,
+    status TEXT DEFAULT 'pending',
+    price REAL,
+    distance REAL,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+CREATE TABLE IF NOT EXISTS rides_archive (
+    id TEXT PRIMARY KEY,
+    passenger_id TEXT,
+    driver_id TEXT,
+    pickup TEXT,
+    destination TEXT,
+    status TEXT,
+    price REAL,
+    distance REAL,
+    created_at TEXT
+);
+-- SQLite بدون partitions: الرحلة المنتهية تنتقل إلى rides_archive فيبقى rides صغيرا
+CREATE TRIGGER IF NOT EXISTS rides_finished AFTER UPDATE OF status ON rides WHEN new.status = 'finished' BEGIN
+    INSERT INTO rides_archive SELECT * FROM rides WHERE id = new.id;
+    DELETE FROM rides WHERE id = new.id;
+END;
+CREATE INDEX IF NOT EXISTS rides_status ON rides(status);
+CREATE INDEX IF NOT EXISTS rides_passenger ON rides(passenger_id, created_at);
+CREATE INDEX IF NOT EXISTS rides_driver ON rides(driver_id);
+CREATE INDEX IF NOT EXISTS rides_archive_passenger ON rides_archive(passenger_id, created_at);
+CREATE INDEX IF NOT EXISTS drivers_status ON drivers(status);
+"""
+
+POSTGRES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    name text,
+    phone text UNIQUE NOT NULL,
+    location jsonb,
+    created_at timestamptz DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS drivers (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    name text,
+    phone text UNIQUE NOT NULL,
+    tuktuk_number text,
+    status text DEFAULT 'available',
+    rating real DEFAULT 5,
+    total_rides integer DEFAULT 0,
+    location jsonb,
+    created_at timestamptz DEFAULT now()
+);
+-- مفتاح الجدول المقسم لا بد أن يضم status، فتفرد id عبر القسمين يحفظه ride_ids:
+-- كل رحلة جديدة تسجل فيه (المعرف المكرر يرفض)، والجداول الأخرى تشير إليه بدل rides
+CREATE TABLE IF NOT EXISTS ride_ids (
+    id uuid PRIMARY KEY
+);
+CREATE OR REPLACE FUNCTION register_ride_id() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO ride_ids (id) VALUES (NEW.id);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+-- الرحلات مقسمة حسب الحالة: تحديث status إلى finished ينقل الصف تلقائيا إلى rides_archive،
+-- واستعلامات الرحلة الحالية (status IN ... أو <> 'finished') تقرأ rides_active فقط
+CREATE TABLE IF NOT EXISTS rides (
+    id uuid NOT NULL DEFAULT gen_random_uuid() REFERENCES ride_ids(id),
+    passenger_id uuid REFERENCES users(id),
+    driver_id uuid REFERENCES drivers(id),
+    pickup jsonb,
+    destination jsonb,
+    status text NOT NULL DEFAULT 'pending',
+    price real,
+    distance real,
+    created_at timestamptz DEFAULT now(),
+    PRIMARY KEY (id, status)
+) PARTITION BY LIST (status);
+CREATE TABLE IF NOT EXISTS rides_archive PARTITION OF rides FOR VALUES IN ('finished');
+CREATE TABLE IF NOT EXISTS rides_active PARTITION OF rides DEFAULT;
+-- الرحلة تبدأ دائما في rides_active (pending)؛ النقل إلى الأرشيف لا يمر بهذا القسم فلا يسجل مرتين
+DROP TRIGGER IF EXISTS rides_register_id ON rides_active;
+CREATE TRIGGER rides_register_id BEFORE INSERT ON rides_active FOR EACH ROW EXECUTE FUNCTION register_ride_id();
+CREATE INDEX IF NOT EXISTS rides_active_status ON rides_active(status);
+CREATE INDEX IF NOT EXISTS rides_active_passenger ON rides_active(passenger_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS rides_active_driver ON rides_active(driver_id);
+CREATE INDEX IF NOT EXISTS rides_archive_passenger ON rides_archive(passenger_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS drivers_status ON drivers(status);
+"""
+
+
+def _values(n_rows, n_columns):
+    row = "(" + ", ".join("?" * n_columns) + ")"
+    return ", ".join([row] * n_rows)
+
+
+# آخر صف لكل هاتف: Postgres يرفض تعديل نفس الصف مرتين في جملة واحدة
+def _last_per_phone(rows):
+    return list({row["phone"]: row for row in rows}.values())
+
+
+class SQLiteBackend:
+    dialect = "sqlite"
+
+    def __init__(self, path=":memory:", size=4):
+        self.path = path
+        # قاعدة الذاكرة لا تتشارك بين الاتصالات: اتصال واحد
+        self.size = 1 if path == ":memory:" else size
+        self._pool = asyncio.Queue()
+        self._connections = []
+
+    async def open(self):
+        for _ in range(self.size):
+            # sqlite3 يحفظ الجمل المعدة لكل اتصال (cached_statements)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.execute("PRAGMA synchronous = NORMAL")
+            self._connections.append(conn)
+            self._pool.put_nowait(conn)
+        return self
+
+    async def _run(self, fn):
+        conn = await self._pool.get()
+        try:
+            return await asyncio.to_thread(fn, conn)
+        finally:
+            self._pool.put_nowait(conn)
+
+    @staticmethod
+    def _encode(args):
+        return [json.dumps(a) if isinstance(a, (dict, list)) else a for a in args]
+
+    @staticmethod
+    def _decode(row):
+        row = dict(row)
+        for column in JSON_COLUMNS:
+            if isinstance(row.get(column), str):
+                row[column] = json.loads(row[column])
+        return row
+
+    async def fetch(self, sql, args=()):
+        def run(conn):
+            with conn:
+                return [self._decode(r) for r in conn.execute(sql, self._encode(args)).fetchall()]
+
+        return await self._run(run)
+
+    async def execute(self, sql, args=()):
+        def run(conn):
+            with conn:
+                return conn.execute(sql, self._encode(args)).rowcount
+
+        return await self._run(run)
+
+    async def executemany(self, sql, rows):
+        def run(conn):
+            with conn:
+                conn.executemany(sql, [self._encode(args) for args in rows])
+            return len(rows)
+
+        return await self._run(run)
+
+    async def create_schema(self):
+        await self._run(lambda conn: conn.executescript(SQLITE_SCHEMA))
+
+    async def close(self):
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+
+
+class PostgresBackend:
+    dialect = "postgres"
+
+    # statement_cache_size=0 عند المرور عبر pgbouncer بوضع transaction (منفذ 6543 في Supabase)
+    def __init__(self, dsn, min_size=2, max_size=10, statement_cache_size=256):
+        if asyncpg is None:
+            raise RuntimeError("asyncpg غير مثبت: pip install asyncpg")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self._pool = None
+        self._sql = {}
+
+    async def _init(self, conn):
+        for kind in ("json", "jsonb"):
+            await conn.set_type_codec(kind, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+    async def open(self):
+        self._pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            statement_cache_size=self.statement_cache_size,
+            init=self._init,
+        )
+        return self
+
+    # الاستعلامات مكتوبة بعلامات ? وتتحول مرة واحدة إلى $1, $2 ...
+    def _translate(self, sql):
+        translated = self._sql.get(sql)
+        if translated is None:
+            counter = iter(range(1, sql.count("?") + 1))
+            translated = self._sql[sql] = re.sub(r"\?", lambda _: f"${next(counter)}", sql)
+        return translated
+
+    @staticmethod
+    def _decode(record):
+        row = dict(record)
+        for key, value in row.items():
+            if isinstance(value, uuid.UUID):
+                row[key] = str(value)
+            elif isinstance(value, datetime.datetime):
+                row[key] = value.isoformat()
+        return row
+
+    async def fetch(self, sql, args=()):
+        # asyncpg يعد كل جملة مرة واحدة لكل اتصال ويحفظها في statement cache
+        return [self._decode(r) for r in await self._pool.fetch(self._translate(sql), *args)]
+
+    async def execute(self, sql, args=()):
+        status = await self._pool.execute(self._translate(sql), *args)
+        return int(status.rsplit(" ", 1)[-1]) if status[-1:].isdigit() else 0
+
+    async def executemany(self, sql, rows):
+        await self._pool.executemany(self._translate(sql), rows)
+        return len(rows)
+
+    async def create_schema(self):
+        async with self._pool.acquire() as conn:
+            await conn.execute(POSTGRES_SCHEMA)
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+
+
+class DataAccess:
+    def __init__(self, backend):
+        self.backend = backend
+        self.latency = {}
+        self.counters = {"queries": 0, "rows": 0, "errors": 0}
+
+    async def _timed(self, name, call, sql, args):
+        start = time.perf_counter()
+        try:
+            result = await call(sql, args)
+        except Exception:
+            self.counters["errors"] += 1
+            raise
+        finally:
+            histogram = self.latency.get(name)
+            if histogram is None:
+                histogram = self.latency[name] = Histogram()
+            histogram.record((time.perf_counter() - start) * 1000)
+            self.counters["queries"] += 1
+        self.counters["rows"] += len(result) if isinstance(result, list) else result
+        return result
+
+    def fetch(self, name, sql, args=()):
+        return self._timed(name, self.backend.fetch, sql, args)
+
+    def execute(self, name, sql, args=()):
+        return self._timed(name, self.backend.execute, sql, args)
+
+    def executemany(self, name, sql, rows):
+        return self._timed(name, self.backend.executemany, sql, rows)
+
+    async def fetch_one(self, name, sql, args=()):
+        rows = await self.fetch(name, sql, args)
+        return rows[0] if rows else None
+
+    # تسجيل أو دخول في رحلة واحدة: INSERT ... ON CONFLICT (phone) يحدث الموقع ويرجع الصف الموجود
+    async def register(self, table, row):
+        rows = await self.register_many(table, [row])
+        return rows[0]
+
+    async def register_many(self, table, rows):
+        columns = REGISTER_COLUMNS[table]
+        rows = _last_per_phone(rows)
+        registered = []
+        for start in range(0, len(rows), BATCH_ROWS):
+            chunk = rows[start:start + BATCH_ROWS]
+            args = []
+            for row in chunk:
+                row = {"id": str(uuid.uuid4()), **({"status": "available"} if table == DRIVERS_TABLE else {}), **row}
+                args.extend(row.get(column) for column in columns)
+            sql = (
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES {_values(len(chunk), len(columns))} "
+                "ON CONFLICT (phone) DO UPDATE SET location = excluded.location RETURNING *"
+            )
+            registered += await self.fetch(f"register_{table}", sql, args)
+        order = {row["phone"]: i for i, row in enumerate(rows)}
+        return sorted(registered, key=lambda row: order[row["phone"]])
+
+    async def get(self, table, row_id):
+        return await self.fetch_one(f"get_{table}", f"SELECT * FROM {table} WHERE id = ?", (row_id,))
+
+    # عدة صفوف بالمعرف في استعلام واحد؛ الناتج بنفس ترتيب المعرفات (None للمفقود)
+    async def get_many(self, table, ids):
+        found = {}
+        for start in range(0, len(ids), BATCH_ROWS):
+            chunk = ids[start:start + BATCH_ROWS]
+            sql = f"SELECT * FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})"
+            for row in await self.fetch(f"get_many_{table}", sql, chunk):
+                found[row["id"]] = row
+        return [found.get(i) for i in ids]
+
+    async def available_drivers(self):
+        return await self.fetch("available_drivers", f"SELECT * FROM {DRIVERS_TABLE} WHERE status = 'available'")
+
+    # الرحلة الحالية كما في checkRide/checkActive: تقرأ الجزء النشط المفهرس فقط
+    async def active_rides(self):
+        return await self.fetch("active_rides", f"SELECT * FROM {RIDES_TABLE} WHERE status <> 'finished'")
+
+    async def active_ride_for_passenger(self, passenger_id):
+        return await self.fetch_one(
+            "active_ride_for_passenger",
+            f"SELECT * FROM {RIDES_TABLE} WHERE passenger_id = ? AND status <> 'finished' "
+            "ORDER BY created_at DESC LIMIT 1",
+            (passenger_id,),
+        )
+
+    async def active_ride_for_driver(self, driver_id):
+        return await self.fetch_one(
+            "active_ride_for_driver",
+            f"SELECT * FROM {RIDES_TABLE} WHERE driver_id = ? AND status <> 'finished' "
+            "ORDER BY created_at DESC LIMIT 1",
+            (driver_id,),
+        )
+
+    # السائق في رحلة مقبولة أو في الطريق (الرحلة المعلقة المعروضة عليه لا تشغله)
+    async def driver_on_ride(self, driver_id):
+        return await self.fetch_one(
+            "driver_on_ride",
+            f"SELECT id FROM {RIDES_TABLE} WHERE driver_id = ? AND status IN ('accepted', 'on_the_way') LIMIT 1",
+            (driver_id,),
+        )
+
+    # رحلة بالمعرف نشطة أو مؤرشفة (في SQLite الأرشيف جدول منفصل)
+    async def ride(self, ride_id):
+        if self.backend.dialect == "postgres":
+            return await self.get(RIDES_TABLE, ride_id)
+        return await self.fetch_one(
+            "ride",
+            f"SELECT * FROM {RIDES_TABLE} WHERE id = ? UNION ALL SELECT * FROM rides_archive WHERE id = ?",
+            (ride_id, ride_id),
+        )
+
+    async def pending_rides(self):
+        return await self.fetch(
+            "pending_rides", f"SELECT * FROM {RIDES_TABLE} WHERE status = 'pending' ORDER BY created_at"
+        )
+
+    # مواقع السائقين من خدمة الاستقبال: جملة معدة واحدة لكل الدفعة
+    async def update_locations(self, rows):
+        args = [(row["location"], row["id"]) for row in rows]
+        return await self.executemany(
+            "update_locations", f"UPDATE {DRIVERS_TABLE} SET location = ? WHERE id = ?", args
+        )
+
+    async def set_driver_status(self, driver_id, status):
+        return await self.execute(
+            "set_driver_status", f"UPDATE {DRIVERS_TABLE} SET status = ? WHERE id = ?", (status, driver_id)
+        )
+
+    async def create_ride(self, ride):
+        rides = await self.create_rides([ride])
+        return rides[0]
+
+    async def create_rides(self, rides):
+        created = []
+        for start in range(0, len(rides), BATCH_ROWS):
+            chunk = rides[start:start + BATCH_ROWS]
+            args = []
+            for ride in chunk:
+                ride = {"id": str(uuid.uuid4()), "status": "pending", **ride}
+                args.extend(ride.get(column) for column in RIDE_COLUMNS)
+            sql = (
+                f"INSERT INTO {RIDES_TABLE} ({', '.join(RIDE_COLUMNS)}) "
+                f"VALUES {_values(len(chunk), len(RIDE_COLUMNS))} RETURNING *"
+            )
+            created += await self.fetch("create_rides", sql, args)
+        return created
+
+    # compare-and-set في رحلة واحدة إلى القاعدة: يطبق فقط إذا كانت الحالة ما زالت current
+    # والرحلة غير مسندة لسائق آخر؛ الخاسر يحصل على None (انظر tuktuk.ridestate)
+    async def transition_ride(self, ride_id, current, target, driver_id):
+        return await self.fetch_one(
+            f"transition_{target}",
+            f"UPDATE {RIDES_TABLE} SET status = ?, driver_id = COALESCE(driver_id, ?) "
+            "WHERE id = ? AND status = ? AND (driver_id IS NULL OR driver_id = ?) RETURNING *",
+            (target, driver_id, ride_id, current, driver_id),
+        )
+
+    async def set_ride_status(self, ride_id, status):
+        return await self.fetch_one(
+            "set_ride_status", f"UPDATE {RIDES_TABLE} SET status = ? WHERE id = ? RETURNING *", (status, ride_id)
+        )
+
+    # مخرج لـ LocationIngest بدل postgrest_sink
+    def location_sink(self):
+        async def sink(rows):
+            await self.update_locations(rows)
+
+        return sink
+
+    def metrics(self):
+        return {**self.counters, "latency_ms": {name: h.snapshot() for name, h in sorted(self.latency.items())}}
+
+    async def close(self):
+        await self.backend.close()
+
+
+# postgres://... أو postgresql://... لـ Postgres، وغير ذلك مسار ملف SQLite (أو :memory:)
+async def connect(url=":memory:", create_schema=False, **options):
+    if url.startswith(("postgres://", "postgresql://")):
+        backend = PostgresBackend(url, **options)
+    else:
+        backend = SQLiteBackend(url.removeprefix("sqlite:///"), **options)
+    await backend.open()
+    if create_schema:
+        await backend.create_schema()
+    return DataAccess(backend)
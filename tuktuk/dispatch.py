@@ -0,0 +1,173 @@
+import heapq
+import math
+
+from .geo import EARTH_RADIUS_KM, haversine_km
+
+KM_PER_DEG = EARTH_RADIUS_KM * math.pi / 180
+
+# حجم خلية الشبكة بالدرجات (~1.1 كم عند خط العرض)
+DEFAULT_CELL_DEG = 0.01
+
+
+# فهرس مكاني للسائقين المتاحين: شبكة خلايا ثابتة الحجم على lat/lng
+# الإضافة والتحريك والحذف O(1)، والاستعلامات تزور الخلايا القريبة فقط
+class DriverIndex:
+    def __init__(self, cell_deg=DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._cells = {}
+        self._drivers = {}
+        # حدود الخلايا المشغولة (تتسع فقط) لإيقاف البحث بالحلقات
+        self._bounds = (math.inf, -math.inf, math.inf, -math.inf)
+
+    def __len__(self):
+        return len(self._drivers)
+
+    def __contains__(self, driver_id):
+        return driver_id in self._drivers
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def insert(self, driver_id, lat, lng):
+        if driver_id in self._drivers:
+            self.move(driver_id, lat, lng)
+            return
+        cell = self._cell(lat, lng)
+        self._drivers[driver_id] = (lat, lng, cell)
+        self._place(driver_id, lat, lng, cell)
+
+    def _place(self, driver_id, lat, lng, cell):
+        members = self._cells.get(cell)
+        if members is None:
+            members = self._cells[cell] = {}
+            lo_i, hi_i, lo_j, hi_j = self._bounds
+            self._bounds = (min(lo_i, cell[0]), max(hi_i, cell[0]), min(lo_j, cell[1]), max(hi_j, cell[1]))
+        members[driver_id] = (lat, lng)
+
+    def move(self, driver_id, lat, lng):
+        old = self._drivers.get(driver_id)
+        if old is None:
+            self.insert(driver_id, lat, lng)
+            return
+        cell = self._cell(lat, lng)
+        if cell != old[2]:
+            self._discard(driver_id, old[2])
+        self._drivers[driver_id] = (lat, lng, cell)
+        self._place(driver_id, lat, lng, cell)
+
+    def remove(self, driver_id):
+        old = self._drivers.pop(driver_id, None)
+        if old is not None:
+            self._discard(driver_id, old[2])
+
+    def _discard(self, driver_id, cell):
+        members = self._cells[cell]
+        del members[driver_id]
+        if not members:
+            del self._cells[cell]
+
+    # تطبيق صف من جدول drivers: المتاح يدخل الفهرس والمشغول يخرج منه
+    def sync(self, driver):
+        if driver.get("status") == "available" and driver.get("location"):
+            self.move(driver["id"], driver["location"]["lat"], driver["location"]["lng"])
+        else:
+            self.remove(driver["id"])
+
+    def location(self, driver_id):
+        entry = self._drivers.get(driver_id)
+        return entry and {"lat": entry[0], "lng": entry[1]}
+
+    def _ring(self, center, r):
+        ci, cj = center
+        if r == 0:
+            yield center
+            return
+        for j in range(cj - r, cj + r + 1):
+            yield (ci - r, j)
+            yield (ci + r, j)
+        for i in range(ci - r + 1, ci + r):
+            yield (i, cj - r)
+            yield (i, cj + r)
+
+    # أقل مسافة ممكنة لأي سائق خارج الحلقات 0..r (حد أدنى محافظ)
+    def _ring_bound_km(self, lat, r):
+        edge_lat = min(89.0, abs(lat) + (r + 1) * self.cell_deg)
+        return r * self.cell_deg * KM_PER_DEG * math.cos(math.radians(edge_lat)) * 0.999
+
+    # أقرب k سائقين: بحث بالحلقات حول خلية الراكب حتى يصبح الحد الأدنى أكبر من الأبعد
+    def nearest(self, lat, lng, k=1, max_km=None):
+        if not self._drivers:
+            return []
+        center = self._cell(lat, lng)
+        k = min(k, len(self._drivers))
+        best = []  # max-heap على المسافة: (-dist, id)
+        max_ring = self._max_ring(center, lat, max_km)
+        r = 0
+        while r <= max_ring:
+            # حلقة فيها خلايا فارغة أكثر من كل الخلايا المشغولة: أرخص أن نمسح المتبقي مباشرة
+            if 8 * r > len(self._cells):
+                ci, cj = center
+                cells = (c for c in self._cells if max(abs(c[0] - ci), abs(c[1] - cj)) >= r)
+                self._collect(cells, lat, lng, k, max_km, best)
+                break
+            self._collect(self._ring(center, r), lat, lng, k, max_km, best)
+            if len(best) == k and self._ring_bound_km(lat, r) >= -best[0][0]:
+                break
+            r += 1
+        return sorted(((driver_id, -neg) for neg, driver_id in best), key=lambda x: x[1])
+
+    def _collect(self, cells, lat, lng, k, max_km, best):
+        for cell in cells:
+            members = self._cells.get(cell)
+            if not members:
+                continue
+            for driver_id, (d_lat, d_lng) in members.items():
+                dist = haversine_km(lat, lng, d_lat, d_lng)
+                if max_km is not None and dist > max_km:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-dist, driver_id))
+                elif dist < -best[0][0]:
+                    heapq.heapreplace(best, (-dist, driver_id))
+
+    # عدد الحلقات التي تغطي نصف القطر، أو كل الخلايا المشغولة إن لم يحدد
+    def _max_ring(self, center, lat, max_km):
+        ci, cj = center
+        lo_i, hi_i, lo_j, hi_j = self._bounds
+        ring = max(ci - lo_i, hi_i - ci, cj - lo_j, hi_j - cj)
+        if max_km is not None:
+            ring = min(ring, self.cells_for_km(lat, max_km)[1])
+        return ring
+
+    # عدد الخلايا التي يغطيها نصف القطر على محوري lat و lng
+    def cells_for_km(self, lat, radius_km):
+        d_lat = math.ceil(radius_km / (self.cell_deg * KM_PER_DEG))
+        lng_scale = max(math.cos(math.radians(min(89.0, abs(lat) + radius_km / KM_PER_DEG))), 1e-6)
+        return d_lat, math.ceil(radius_km / (self.cell_deg * KM_PER_DEG * lng_scale))
+
+    # كل السائقين داخل نصف قطر معين، مرتبين بالمسافة
+    def within(self, lat, lng, radius_km):
+        ci, cj = self._cell(lat, lng)
+        d_lat, d_lng = self.cells_for_km(lat, radius_km)
+        found = []
+        for i in range(ci - d_lat, ci + d_lat + 1):
+            for j in range(cj - d_lng, cj + d_lng + 1):
+                members = self._cells.get((i, j))
+                if not members:
+                    continue
+                for driver_id, (d_lat_, d_lng_) in members.items():
+                    dist = haversine_km(lat, lng, d_lat_, d_lng_)
+                    if dist <= radius_km:
+                        found.append((driver_id, dist))
+        found.sort(key=lambda x: x[1])
+        return found
+
+
+# المقارنة: الحلقة الخطية كما في UserDashboard.requestRide
+def brute_force_nearest(drivers, lat, lng):
+    nearest, min_distance = None, math.inf
+    for driver_id, (d_lat, d_lng) in drivers.items():
+        dist = haversine_km(lat, lng, d_lat, d_lng)
+        if dist < min_distance:
+            nearest, min_distance = driver_id, dist
+    return nearest, min_distance
@@ -0,0 +1,142 @@
+import math
+
+from .dispatch import DriverIndex
+from .geo import haversine_km
+
+# موزع تحديثات السائقين: يطبق أحداث postgres_changes كفروقات على خريطة محلية
+# ويرسل لكل راكب فقط السائقين داخل نطاقه، مع لقطة كاملة عند الاشتراك أو فقدان رسالة
+
+
+class DriverFeed:
+    def __init__(self, cell_deg=0.01):
+        self.cell_deg = cell_deg
+        self.version = 0
+        self._drivers = {}
+        self._index = DriverIndex(cell_deg)
+        self._subscribers = {}
+        self._subscriber_cells = {}
+
+    def __len__(self):
+        return len(self._drivers)
+
+    # تحميل الجدول كاملا (عند بدء التشغيل أو إعادة الاتصال بقاعدة البيانات)
+    def load(self, drivers):
+        self._drivers = {}
+        self._index = DriverIndex(self.cell_deg)
+        for driver in drivers:
+            if driver.get("status") == "available" and driver.get("location"):
+                self._drivers[driver["id"]] = driver
+                self._index.sync(driver)
+        self.version += 1
+        return {sub_id: [self.snapshot(sub_id)] for sub_id in self._subscribers}
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def _covering_cells(self, lat, lng, radius_km):
+        ci, cj = self._cell(lat, lng)
+        d_lat, d_lng = self._index.cells_for_km(lat, radius_km)
+        return [(i, j) for i in range(ci - d_lat, ci + d_lat + 1) for j in range(cj - d_lng, cj + d_lng + 1)]
+
+    # اشتراك راكب بمركز ونصف قطر؛ يرجع لقطة بالسائقين داخل النطاق
+    def subscribe(self, sub_id, lat, lng, radius_km):
+        self.unsubscribe(sub_id)
+        cells = self._covering_cells(lat, lng, radius_km)
+        self._subscribers[sub_id] = {"lat": lat, "lng": lng, "radius_km": radius_km, "cells": cells, "seq": 0}
+        for cell in cells:
+            self._subscriber_cells.setdefault(cell, set()).add(sub_id)
+        return self.snapshot(sub_id)
+
+    def unsubscribe(self, sub_id):
+        sub = self._subscribers.pop(sub_id, None)
+        if sub is None:
+            return
+        for cell in sub["cells"]:
+            members = self._subscriber_cells[cell]
+            members.discard(sub_id)
+            if not members:
+                del self._subscriber_cells[cell]
+
+    def _next(self, sub_id, message):
+        sub = self._subscribers[sub_id]
+        sub["seq"] += 1
+        message["seq"] = sub["seq"]
+        message["version"] = self.version
+        return message
+
+    def snapshot(self, sub_id):
+        sub = self._subscribers[sub_id]
+        found = self._index.within(sub["lat"], sub["lng"], sub["radius_km"])
+        return self._next(sub_id, {"type": "snapshot", "drivers": [self._drivers[d] for d, _ in found]})
+
+    # العميل يرسل آخر seq استلمه؛ أي فجوة تعني لقطة جديدة بدل إعادة الفروقات
+    def resync(self, sub_id, last_seq):
+        if self._subscribers[sub_id]["seq"] == last_seq:
+            return None
+        return self.snapshot(sub_id)
+
+    def _inside(self, sub, driver):
+        if driver is None:
+            return False
+        loc = driver["location"]
+        return haversine_km(sub["lat"], sub["lng"], loc["lat"], loc["lng"]) <= sub["radius_km"]
+
+    # تطبيق حدث واحد من postgres_changes: {"eventType", "new", "old"}
+    # يرجع الرسائل لكل راكب متأثر فقط: {sub_id: [message, ...]}
+    def apply(self, change):
+        event = change.get("eventType")
+        row = change.get("new") or {}
+        driver_id = row.get("id") or (change.get("old") or {}).get("id")
+        if driver_id is None:
+            return {}
+
+        before = self._drivers.get(driver_id)
+        after = None
+        if event != "DELETE" and row.get("status") == "available" and row.get("location"):
+            after = {**before, **row} if before else row
+        if before is None and after is None:
+            return {}
+
+        self.version += 1
+        if after is None:
+            del self._drivers[driver_id]
+            self._index.remove(driver_id)
+        else:
+            self._drivers[driver_id] = after
+            self._index.sync(after)
+
+        candidates = set()
+        for driver in (before, after):
+            if driver is not None:
+                candidates |= self._subscriber_cells.get(self._cell(driver["location"]["lat"], driver["location"]["lng"]), set())
+
+        messages = {}
+        for sub_id in candidates:
+            sub = self._subscribers[sub_id]
+            if self._inside(sub, after):
+                messages[sub_id] = [self._next(sub_id, {"type": "upsert", "driver": after})]
+            elif self._inside(sub, before):
+                messages[sub_id] = [self._next(sub_id, {"type": "remove", "id": driver_id})]
+        return messages
+
+
+# جانب العميل: تطبيق رسائل الموزع على خريطة محلية، مع طلب لقطة عند اكتشاف فجوة
+class FeedClient:
+    def __init__(self):
+        self.drivers = {}
+        self.seq = 0
+        self.needs_snapshot = False
+
+    def receive(self, message):
+        if message["type"] == "snapshot":
+            self.drivers = {d["id"]: d for d in message["drivers"]}
+            self.needs_snapshot = False
+        elif self.needs_snapshot or message["seq"] != self.seq + 1:
+            self.needs_snapshot = True
+            return
+        elif message["type"] == "upsert":
+            self.drivers[message["driver"]["id"]] = message["driver"]
+        else:
+            self.drivers.pop(message["id"], None)
+        self.seq = message["seq"]
+
@@ -0,0 +1,101 @@
+import math
+from decimal import ROUND_HALF_UP, Decimal
+
+# نفس ثوابت utils/geo.ts
+EARTH_RADIUS_KM = 6371
+BASE_RATE = 5  # 5 EGP base
+PER_KM = 3  # 3 EGP per km
+
+
+# معادلة Haversine بدون تقريب، تستخدم للمقارنة والترتيب
+def haversine_km(lat1, lng1, lat2, lng2):
+    d_lat = math.radians(lat2 - lat1)
+    d_lng = math.radians(lng2 - lng1)
+    a = (
+        math.sin(d_lat / 2) * math.sin(d_lat / 2)
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2))
+        * math.sin(d_lng / 2) * math.sin(d_lng / 2)
+    )
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+# مطابقة لـ parseFloat(x.toFixed(digits)) في جافاسكربت: التقريب على القيمة الثنائية
+# الدقيقة مع كسر التعادل لأعلى (تنسيق بايثون يكسره للزوجي فيختلف عند 0.125 مثلا)
+def to_fixed(x, digits=2):
+    return float(Decimal(x).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+
+
+# مطابقة لـ calculateDistance: المسافة بالكيلومتر مقربة لرقمين عشريين
+def calculate_distance(loc1, loc2):
+    return to_fixed(haversine_km(loc1["lat"], loc1["lng"], loc2["lat"], loc2["lng"]))
+
+
+# مطابقة لـ calculatePrice
+def calculate_price(distance_km):
+    return math.ceil(BASE_RATE + distance_km * PER_KM)
+
+
+# النسخة المتجهة (NumPy) لحساب المسافات والأسعار لمصفوفات كاملة دفعة واحدة
+try:
+    import numpy as np
+except ImportError:  # numpy اختياري: الدوال العادية أعلاه تعمل بدونه
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("الحساب المتجه يحتاج numpy: pip install numpy")
+
+
+def _haversine_np(lat1, lng1, lat2, lng2):
+    # نفس ترتيب العمليات في calculateDistance حتى تتطابق أخطاء التقريب
+    deg = math.pi / 180
+    d_lat = (lat2 - lat1) * deg
+    d_lng = (lng2 - lng1) * deg
+    s_lat = np.sin(d_lat / 2)
+    s_lng = np.sin(d_lng / 2)
+    a = s_lat * s_lat + np.cos(lat1 * deg) * np.cos(lat2 * deg) * s_lng * s_lng
+    return EARTH_RADIUS_KM * (2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)))
+
+
+def _round_like_js(d, digits, recompute):
+    scale = 10.0 ** digits
+    y = d * scale
+    out = np.floor(y + 0.5) / scale
+    # القيم القريبة جدا من منتصف خانتين تحسب بالدالة العادية لضمان نفس نتيجة toFixed
+    near = np.abs(y - np.floor(y) - 0.5) < 1e-6
+    for idx in zip(*np.nonzero(near)):
+        out[idx] = recompute(idx)
+    return out
+
+
+# المسافة بين أزواج نقاط متقابلة (رحلات: pickup[i] → destination[i])، مقربة مثل calculateDistance
+def batch_distance(lat1, lng1, lat2, lng2, digits=2):
+    _require_numpy()
+    lat1, lng1, lat2, lng2 = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (lat1, lng1, lat2, lng2)))
+    raw = _haversine_np(lat1, lng1, lat2, lng2)
+    return _round_like_js(
+        raw, digits, lambda i: to_fixed(haversine_km(lat1[i], lng1[i], lat2[i], lng2[i]), digits)
+    )
+
+
+# مصفوفة المسافات بين كل راكب وكل سائق: الشكل (عدد الركاب، عدد السائقين)
+def distance_matrix(pickup_lat, pickup_lng, driver_lat, driver_lng, digits=2):
+    _require_numpy()
+    p_lat = np.asarray(pickup_lat, dtype=np.float64)[:, None]
+    p_lng = np.asarray(pickup_lng, dtype=np.float64)[:, None]
+    d_lat = np.asarray(driver_lat, dtype=np.float64)[None, :]
+    d_lng = np.asarray(driver_lng, dtype=np.float64)[None, :]
+    return batch_distance(p_lat, p_lng, d_lat, d_lng, digits)
+
+
+# مطابقة لـ calculatePrice على مصفوفة مسافات
+def batch_price(distance_km):
+    _require_numpy()
+    return np.ceil(BASE_RATE + np.asarray(distance_km, dtype=np.float64) * PER_KM)
+
+
+# إعادة تسعير رحلات تاريخية: ترجع (المسافات، الأسعار) كما كان التطبيق سيحسبها
+def reprice(pickup_lat, pickup_lng, dest_lat, dest_lng):
+    distance = batch_distance(pickup_lat, pickup_lng, dest_lat, dest_lng)
+    return distance, batch_price(distance)
@@ -0,0 +1,265 @@
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import time
+from collections import deque
+from urllib.parse import parse_qsl, urlsplit
+
+from . import httpd
+from .dal import connect
+
+# خريطة حرارية للطلب: نقاط الانطلاق ومواقع السائقين تجمع في بلاطات الخريطة (z/x/y مثل Leaflet)
+# لكل مستوى تكبير من MIN_ZOOM إلى MAX_ZOOM، وكل بلاطة شبكة 8×8 خلايا. كل حدث يعدل خلية واحدة
+# في كل مستوى (O(المستويات))، فالاستعلام يقرأ البلاطات الظاهرة فقط مهما كان عدد الرحلات.
+# الطبقات: pending (المعلق الآن)، drivers (المتاحون الآن)، وطلبات في نوافذ منزلقة
+# الواجهة تعرضها فوق MapComponent عبر utils/heatmap.ts
+
+MIN_ZOOM = 4  # 16×16 بلاطة تغطي العالم كله، فأي مستطيل يكفيه MAX_TILES عند مستوى ما
+MAX_ZOOM = 18
+SUB_BITS = 3  # 8×8 خلايا في البلاطة
+GRID_ZOOM = MAX_ZOOM + SUB_BITS
+MAX_LAT = 85.05112878
+WINDOWS = {"requests_5m": 300, "requests_1h": 3600}
+MAX_TILES = 256  # حد البلاطات في استعلام واحد
+
+
+# إحداثيات الخلية في أدق شبكة (Web Mercator عند GRID_ZOOM)
+def grid_of(lat, lng):
+    n = 1 << GRID_ZOOM
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+# created_at من قاعدة البيانات (نص ISO) إلى ثوان، أو None ليستخدم الوقت الحالي
+def _timestamp(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+def tile_of(lat, lng, z):
+    gx, gy = grid_of(lat, lng)
+    shift = GRID_ZOOM - z
+    return gx >> shift, gy >> shift
+
+
+# البلاطات التي تغطي المستطيل عند z، من الشمال الغربي إلى الجنوب الشرقي
+def tiles_in_bbox(min_lat, min_lng, max_lat, max_lng, z):
+    x0, y0 = tile_of(max_lat, min_lng, z)
+    x1, y1 = tile_of(min_lat, max_lng, z)
+    return [(x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+
+
+# طبقة واحدة: لكل مستوى {(x, y): {(sx, sy): العدد}}
+class _Layer:
+    def __init__(self):
+        self.tiles = {z: {} for z in range(MIN_ZOOM, MAX_ZOOM + 1)}
+        self.total = 0
+
+    def add(self, cell, delta):
+        gx, gy = cell
+        self.total += delta
+        mask = (1 << SUB_BITS) - 1
+        for z, tiles in self.tiles.items():
+            shift = GRID_ZOOM - z
+            key = (gx >> shift, gy >> shift)
+            sub = ((gx >> (shift - SUB_BITS)) & mask, (gy >> (shift - SUB_BITS)) & mask)
+            cells = tiles.get(key)
+            if cells is None:
+                cells = tiles[key] = {}
+            value = cells.get(sub, 0) + delta
+            if value:
+                cells[sub] = value
+            else:
+                del cells[sub]
+                if not cells:
+                    del tiles[key]
+
+    def tile(self, z, x, y):
+        cells = self.tiles[z].get((x, y))
+        return [[sx, sy, n] for (sx, sy), n in cells.items()] if cells else []
+
+
+class DemandHeatmap:
+    def __init__(self, windows=WINDOWS, clock=time.time):
+        self.clock = clock
+        self.windows = dict(windows)
+        self.layers = {name: _Layer() for name in ("pending", "drivers", *self.windows)}
+        self._recent = {name: deque() for name in self.windows}
+        self._drivers = {}
+        self._pending = {}
+        self._requested = set()
+        self.version = 0
+        self.counters = {"events": 0, "cell_updates": 0, "queries": 0, "tiles_served": 0}
+
+    def _add(self, layer, cell, delta):
+        self.layers[layer].add(cell, delta)
+        self.counters["cell_updates"] += MAX_ZOOM - MIN_ZOOM + 1
+        self.version += 1
+
+    # نفس قاعدة SurgeGrid.driver: المتاح بموقع يحسب، غيره يخرج
+    def driver(self, row):
+        self.counters["events"] += 1
+        # الموقع يتحقق منه قبل أي تعديل حتى لا يضيع العد القديم عند صف خاطئ
+        after = None
+        if row.get("status") == "available" and row.get("location"):
+            after = grid_of(float(row["location"]["lat"]), float(row["location"]["lng"]))
+        before = self._drivers.pop(row["id"], None)
+        if after is not None:
+            self._drivers[row["id"]] = after
+        if before == after:
+            return
+        if before is not None:
+            self._add("drivers", before, -1)
+        if after is not None:
+            self._add("drivers", after, 1)
+
+    def ride_requested(self, ride, ts=None):
+        self.advance()
+        if ride["id"] in self._pending:
+            return
+        self.counters["events"] += 1
+        cell = grid_of(ride["pickup"]["lat"], ride["pickup"]["lng"])
+        self._pending[ride["id"]] = cell
+        self._add("pending", cell, 1)
+        # نفس الطلب يحسب مرة واحدة في النوافذ حتى لو وصل الحدث مكررا بعد قبوله
+        if ride["id"] in self._requested:
+            return
+        self._requested.add(ride["id"])
+        ts = self.clock() if ts is None else ts
+        for name, recent in self._recent.items():
+            recent.append((ts, cell, ride["id"]))
+            self._add(name, cell, 1)
+
+    def ride_closed(self, ride_id):
+        self.counters["events"] += 1
+        cell = self._pending.pop(ride_id, None)
+        if cell is not None:
+            self._add("pending", cell, -1)
+        self.advance()
+
+    # إخراج الطلبات الأقدم من كل نافذة
+    def advance(self):
+        now = self.clock()
+        longest = max(self.windows.values(), default=0)
+        for name, recent in self._recent.items():
+            horizon = now - self.windows[name]
+            while recent and recent[0][0] <= horizon:
+                _, cell, ride_id = recent.popleft()
+                self._add(name, cell, -1)
+                if self.windows[name] == longest:
+                    self._requested.discard(ride_id)
+
+    # حدث postgres_changes من جدول drivers أو rides
+    def apply(self, change):
+        row = change.get("new") or {}
+        # الحذف يصل بـ new فارغ و old فيه المفتاح فقط: السائق يخرج والرحلة تغلق
+        if change.get("eventType") == "DELETE":
+            row = {"id": (change.get("old") or {}).get("id")}
+        if change.get("table") == "drivers":
+            self.driver(row)
+        elif row.get("status") == "pending":
+            self.ride_requested(row)
+        elif row.get("id"):
+            self.ride_closed(row["id"])
+
+    # لقطة البداية من قاعدة البيانات (السائقون المتاحون والرحلات المعلقة)
+    def load(self, drivers, pending_rides):
+        for row in drivers:
+            self.driver(row)
+        # نوافذ الطلبات بوقت إنشاء الرحلة لا بوقت التحميل، وإلا تضخم إعادة التشغيل requests_5m
+        for ride in pending_rides:
+            self.ride_requested(ride, _timestamp(ride.get("created_at")))
+
+    def tile(self, layer, z, x, y):
+        self.advance()
+        self.counters["queries"] += 1
+        self.counters["tiles_served"] += 1
+        return {"layer": layer, "z": z, "x": x, "y": y, "version": self.version, "cells": self.layers[layer].tile(z, x, y)}
+
+    # البلاطات غير الفارغة داخل المستطيل عند z: تكلفة بعدد البلاطات الظاهرة فقط
+    def view(self, layer, z, min_lat, min_lng, max_lat, max_lng):
+        self.advance()
+        z = max(MIN_ZOOM, min(MAX_ZOOM, z))
+        keys = tiles_in_bbox(min_lat, min_lng, max_lat, max_lng, z)
+        # منطقة أكبر من الحد: نصغر حتى تكفي البلاطات (لا نقص الرد أبدا)
+        while len(keys) > MAX_TILES and z > MIN_ZOOM:
+            z -= 1
+            keys = tiles_in_bbox(min_lat, min_lng, max_lat, max_lng, z)
+        if len(keys) > MAX_TILES:
+            raise ValueError(f"المستطيل أكبر من {MAX_TILES} بلاطة")
+        source = self.layers[layer]
+        tiles = [{"x": x, "y": y, "cells": cells} for x, y in keys for cells in [source.tile(z, x, y)] if cells]
+        self.counters["queries"] += 1
+        self.counters["tiles_served"] += len(tiles)
+        return {
+            "layer": layer,
+            "z": z,
+            "sub_bits": SUB_BITS,
+            "version": self.version,
+            "max": max((n for tile in tiles for *_, n in tile["cells"]), default=0),
+            "tiles": tiles,
+        }
+
+    def metrics(self):
+        return {
+            **self.counters,
+            "version": self.version,
+            "available_drivers": len(self._drivers),
+            "pending_rides": len(self._pending),
+            "layers": {name: {"total": layer.total, "tiles": len(layer.tiles[MAX_ZOOM])} for name, layer in self.layers.items()},
+        }
+
+
+# خادم HTTP بسيط:
+#   GET  /heatmap/{layer}?z=15&bbox=min_lat,min_lng,max_lat,max_lng  (البلاطات الظاهرة في طلب واحد)
+#   GET  /heatmap/{layer}/{z}/{x}/{y}  (بلاطة واحدة)
+#   POST /changes  (حدث postgres_changes أو قائمة أحداث)
+#   GET  /metrics
+def route(heatmap, method, target, body):
+    url = urlsplit(target)
+    parts = [p for p in url.path.split("/") if p]
+    if method == "POST" and parts == ["changes"]:
+        payload = json.loads(body)
+        changes = payload if isinstance(payload, list) else [payload]
+        for change in changes:
+            heatmap.apply(change)
+        return "200 OK", {"applied": len(changes), "version": heatmap.version}
+    if method == "GET" and parts == ["metrics"]:
+        return "200 OK", heatmap.metrics()
+    if method == "GET" and len(parts) in (2, 5) and parts[0] == "heatmap" and parts[1] in heatmap.layers:
+        if len(parts) == 5:
+            z, x, y = (int(p) for p in parts[2:])
+            if not MIN_ZOOM <= z <= MAX_ZOOM:
+                return "400 Bad Request", {"error": f"z بين {MIN_ZOOM} و {MAX_ZOOM}"}
+            return "200 OK", heatmap.tile(parts[1], z, x, y)
+        params = dict(parse_qsl(url.query))
+        min_lat, min_lng, max_lat, max_lng = (float(v) for v in params["bbox"].split(","))
+        return "200 OK", heatmap.view(parts[1], int(params.get("z", 15)), min_lat, min_lng, max_lat, max_lng)
+    return "404 Not Found", {"error": "not found"}
+
+
+async def serve(heatmap, host="127.0.0.1", port=8788, database=None):
+    if database:
+        dal = await connect(database)
+        heatmap.load(await dal.available_drivers(), await dal.pending_rides())
+        await dal.close()
+    await httpd.serve(httpd.json_routes(lambda *request: route(heatmap, *request)), host, port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="خدمة الخريطة الحرارية للطلب")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8788)
+    parser.add_argument("--database", help="postgres://... أو مسار SQLite لتحميل اللقطة الأولى")
+    args = parser.parse_args()
+
+    print(f"الخريطة الحرارية على http://{args.host}:{args.port}")
+    asyncio.run(serve(DemandHeatmap(), args.host, args.port, args.database))
@@ -0,0 +1,64 @@
+import asyncio
+import json
+from collections import namedtuple
+
+# خادم HTTP/1.1 صغير مشترك بين الخدمات (الاستقبال، الخريطة الحرارية، التجميع، البلاطات):
+# قراءة الطلب وكتابة الرد هنا، وكل خدمة تكتب جدول مساراتها فقط.
+#   respond(request) غير متزامنة ترجع (الحالة، الترويسات، البايتات)
+#   json_routes(route) تحول route(method, target, body) → (الحالة، dict) إلى respond بردود JSON
+
+Request = namedtuple("Request", "method target headers body")
+
+# أخطاء بيانات الطلب (JSON خاطئ، مفتاح ناقص، نوع غير متوقع) ترجع 400 بدل قطع الاتصال
+BAD_REQUEST = (ValueError, KeyError, TypeError, AttributeError)
+
+
+async def handle(respond, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            body = await reader.readexactly(length) if length else b""
+
+            status, extra, data = await respond(Request(method, target, headers, body))
+            head = "".join(f"{name}: {value}\r\n" for name, value in extra.items())
+            writer.write(
+                f"HTTP/1.1 {status}\r\nAccess-Control-Allow-Origin: *\r\n{head}Content-Length: {len(data)}\r\n\r\n".encode()
+                + data
+            )
+            await writer.drain()
+    except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def json_routes(route):
+    async def respond(request):
+        try:
+            status, response = route(request.method, request.target, request.body)
+        except BAD_REQUEST as e:
+            status, response = "400 Bad Request", {"error": str(e)}
+        return status, {"Content-Type": "application/json"}, json.dumps(response).encode()
+
+    return respond
+
+
+async def start(respond, host, port):
+    return await asyncio.start_server(lambda r, w: handle(respond, r, w), host, port)
+
+
+async def serve(respond, host, port):
+    server = await start(respond, host, port)
+    async with server:
+        await server.serve_forever()
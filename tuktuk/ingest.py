@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import json
+import time
+import urllib.request
+from collections import deque
+
+from . import httpd
+from .dal import connect
+from .metrics import percentile
+from .trajectory import TrajectoryStore
+
+# خدمة استقبال مواقع السائقين: تجمع النبضات في الذاكرة لكل سائق (آخر موقع فقط)
+# وتكتبها دفعة واحدة كل فترة بدلا من UPDATE لكل سائق كل 10 ثوان
+
+
+class LocationIngest:
+    # history: TrajectoryStore اختياري يحفظ كل نبضة مقبولة (المسار)، بينما sink يأخذ آخر موقع فقط
+    def __init__(self, sink, flush_interval=1.0, max_age=30.0, clock=time.time, history=None):
+        self.sink = sink
+        self.history = history
+        self.flush_interval = flush_interval
+        self.max_age = max_age
+        self.clock = clock
+        self._pending = {}
+        self._last_ts = {}
+        self._flush_ms = deque(maxlen=1000)
+        self._started = clock()
+        self.counters = {
+            "received": 0,
+            "accepted": 0,
+            "coalesced": 0,
+            "dropped_stale": 0,
+            "dropped_future": 0,
+            "dropped_out_of_order": 0,
+            "flushes": 0,
+            "rows_flushed": 0,
+            "flush_errors": 0,
+        }
+
+    # نبضة موقع واحدة؛ ترجع False إذا كانت قديمة أو وصلت بعد نبضة أحدث
+    def submit(self, driver_id, lat, lng, ts=None):
+        now = self.clock()
+        ts = now if ts is None else ts
+        self.counters["received"] += 1
+        if now - ts > self.max_age:
+            self.counters["dropped_stale"] += 1
+            return False
+        # ساعة جهاز متقدمة: لا نقبل ts في المستقبل وإلا رفضت كل النبضات الحقيقية بعدها كخارج الترتيب
+        if ts - now > self.max_age:
+            self.counters["dropped_future"] += 1
+            return False
+        ts = min(ts, now)
+        if ts <= self._last_ts.get(driver_id, float("-inf")):
+            self.counters["dropped_out_of_order"] += 1
+            return False
+        self._last_ts[driver_id] = ts
+        if driver_id in self._pending:
+            self.counters["coalesced"] += 1
+        self._pending[driver_id] = (lat, lng, ts)
+        if self.history is not None:
+            self.history.append(driver_id, lat, lng, ts)
+        self.counters["accepted"] += 1
+        return True
+
+    def submit_many(self, pings):
+        return sum(
+            self.submit(p["id"], p["location"]["lat"], p["location"]["lng"], p.get("ts")) for p in pings
+        )
+
+    # كتابة كل المواقع المعلقة دفعة واحدة
+    async def flush(self):
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        rows = [
+            {"id": driver_id, "location": {"lat": lat, "lng": lng}}
+            for driver_id, (lat, lng, _) in batch.items()
+        ]
+        start = time.perf_counter()
+        try:
+            await self.sink(rows)
+        except Exception:
+            self.counters["flush_errors"] += 1
+            # نعيد الدفعة إلى الانتظار ما لم تصل نبضات أحدث لنفس السائق
+            for driver_id, fix in batch.items():
+                self._pending.setdefault(driver_id, fix)
+            raise
+        self._flush_ms.append((time.perf_counter() - start) * 1000)
+        self.counters["flushes"] += 1
+        self.counters["rows_flushed"] += len(rows)
+        return len(rows)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"فشل تفريغ المواقع: {e}")
+            if self.history is not None:
+                self.history.seal_idle(self.clock())
+
+    def metrics(self):
+        elapsed = max(self.clock() - self._started, 1e-9)
+        flush_ms = list(self._flush_ms)
+        return {
+            **self.counters,
+            "pending": len(self._pending),
+            "ingest_per_s": self.counters["received"] / elapsed,
+            "flush_ms_p50": percentile(flush_ms, 50),
+            "flush_ms_p95": percentile(flush_ms, 95),
+            "flush_ms_p99": percentile(flush_ms, 99),
+        }
+
+
+# مخزن في الذاكرة للتجارب المحلية
+class MemorySink:
+    def __init__(self):
+        self.rows = {}
+        self.batches = 0
+
+    async def __call__(self, rows):
+        self.batches += 1
+        for row in rows:
+            self.rows[row["id"]] = row["location"]
+
+
+# upsert جماعي إلى PostgREST (Supabase): طلب واحد لكل دفعة
+def postgrest_sink(url, key, table="drivers"):
+    endpoint = f"{url.rstrip('/')}/rest/v1/{table}?on_conflict=id"
+    headers = {
+        "apikey": key,
+        "Authorization": f"Bearer {key}",
+        "Content-Type": "application/json",
+        "Prefer": "resolution=merge-duplicates,return=minimal",
+    }
+
+    def post(rows):
+        request = urllib.request.Request(endpoint, json.dumps(rows).encode(), headers, method="POST")
+        with urllib.request.urlopen(request, timeout=10) as response:
+            response.read()
+
+    async def sink(rows):
+        await asyncio.to_thread(post, rows)
+
+    return sink
+
+
+# كتابة مباشرة في قاعدة البيانات عبر طبقة الوصول (Postgres أو SQLite)، الاتصال عند أول دفعة
+def database_sink(url):
+    dal = None
+
+    async def sink(rows):
+        nonlocal dal
+        if dal is None:
+            dal = await connect(url)
+        await dal.update_locations(rows)
+
+    return sink
+
+
+# خادم HTTP بسيط: POST /location (نبضة أو قائمة نبضات) و GET /metrics
+def route(ingest, method, target, body):
+    if method == "POST" and target == "/location":
+        payload = json.loads(body)
+        return "200 OK", {"accepted": ingest.submit_many(payload if isinstance(payload, list) else [payload])}
+    if method == "GET" and target == "/metrics":
+        return "200 OK", ingest.metrics()
+    return "404 Not Found", {"error": "not found"}
+
+
+async def serve(ingest, host="127.0.0.1", port=8787):
+    server = await httpd.start(httpd.json_routes(lambda *request: route(ingest, *request)), host, port)
+    flusher = asyncio.create_task(ingest.run())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        # إيقاف التشغيل: آخر دفعة مواقع ثم كتابة الكتل المفتوحة للمسارات على القرص
+        flusher.cancel()
+        try:
+            await flusher
+        except asyncio.CancelledError:
+            pass
+        try:
+            await ingest.flush()
+        except Exception as e:
+            print(f"فشل تفريغ المواقع: {e}")
+        if ingest.history is not None:
+            ingest.history.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="خدمة استقبال مواقع السائقين")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--interval", type=float, default=1.0, help="فترة التفريغ بالثواني")
+    parser.add_argument("--max-age", type=float, default=30.0, help="تجاهل النبضات الأقدم من هذا")
+    parser.add_argument("--supabase-url", help="بدونه تحفظ المواقع في الذاكرة")
+    parser.add_argument("--supabase-key")
+    parser.add_argument("--database", help="postgres://... أو مسار SQLite للكتابة المباشرة")
+    parser.add_argument("--trajectory", help="مجلد لحفظ مسارات السائقين (كل النبضات)")
+    args = parser.parse_args()
+
+    if args.database:
+        sink = database_sink(args.database)
+    elif args.supabase_url:
+        sink = postgrest_sink(args.supabase_url, args.supabase_key)
+    else:
+        sink = MemorySink()
+    history = TrajectoryStore(args.trajectory) if args.trajectory else None
+    ingest = LocationIngest(sink, args.interval, args.max_age, history=history)
+    print(f"استقبال المواقع على http://{args.host}:{args.port}")
+    asyncio.run(serve(ingest, args.host, args.port))
@@ -0,0 +1,324 @@
+import argparse
+import heapq
+import itertools
+import json
+import random
+import re
+import time
+
+from .broadcast import cell_of, channel_name, neighbour_cells
+from .geo import calculate_distance, calculate_price, haversine_km
+from .localdb import LocalDB
+from .metrics import percentile
+
+# مولد حمل لدورة حياة الرحلة كما في UserDashboard/DriverDashboard:
+# تسجيل ← طلب ← قبول ← في الطريق ← انتهاء
+# يشغل آلاف الركاب والسائقين في محاكاة أحداث بزمن افتراضي على LocalDB داخل العملية،
+# ويقيس الزمن الحقيقي لكل خطوة (استعلامات + توزيع رسائل realtime) وعدد الرسائل لكل خطوة
+
+CENTER = (30.0444, 31.2357)
+SPREAD = 0.05
+SPEED_KMH = 20
+
+
+# أسماء الجداول ومراحل الرحلة مأخوذة من تعريف المشروع في app.py
+def project_definition():
+    import app
+
+    supabase_ts = app.files["services/supabase.ts"]
+    tables = {name.lower(): table for name, table in re.findall(r"export const (\w+)_TABLE = '(\w+)'", supabase_ts)}
+    ride_type = re.search(r"interface Ride \{(.*?)\}", app.files["types.ts"], re.S).group(1)
+    lifecycle = re.findall(r"'(\w+)'", re.search(r"status: ([^;]+);", ride_type).group(1))
+    return {"tables": tables, "lifecycle": lifecycle}
+
+
+def make_scenario(drivers, passengers, duration, seed):
+    rng = random.Random(seed)
+
+    def point():
+        return {"lat": CENTER[0] + rng.uniform(-SPREAD, SPREAD), "lng": CENTER[1] + rng.uniform(-SPREAD, SPREAD)}
+
+    return {
+        "seed": seed,
+        "duration": duration,
+        "drivers": [{"phone": f"010{i:08d}", "location": point()} for i in range(drivers)],
+        "passengers": [
+            {"phone": f"011{i:08d}", "at": rng.uniform(0, duration), "location": point(), "destination": point()}
+            for i in range(passengers)
+        ],
+    }
+
+
+class Simulation:
+    def __init__(self, scenario, definition, ping_interval=10.0):
+        self.scenario = scenario
+        self.tables = definition["tables"]
+        self.lifecycle = definition["lifecycle"]
+        self.ping_interval = ping_interval
+        self.db = LocalDB(tuple(self.tables.values()))
+        self.rng = random.Random(scenario["seed"])
+        self.now = 0.0
+        self._events = []
+        self._order = itertools.count()
+        self.latency = {}
+        self.fanout = {}
+        self.outcomes = {"completed": 0, "lost_accept": 0, "ignored_busy": 0, "unserved": 0}
+
+    def at(self, delay, fn, *args):
+        heapq.heappush(self._events, (self.now + delay, next(self._order), fn, args))
+
+    # تنفيذ خطوة مع قياس زمنها الحقيقي وعدد رسائل realtime التي ولدتها
+    def step(self, name, fn, *args):
+        before = self.db.counters["messages_delivered"]
+        start = time.perf_counter()
+        result = fn(*args)
+        self.latency.setdefault(name, []).append(time.perf_counter() - start)
+        self.fanout[name] = self.fanout.get(name, 0) + self.db.counters["messages_delivered"] - before
+        return result
+
+    def register(self, kind, person):
+        # Register.handleSubmit: بحث بالهاتف ثم إدخال
+        table = self.tables["users" if kind == "user" else "drivers"]
+        existing = self.db.table(table).select("*").eq("phone", person["phone"]).single().execute()["data"]
+        if existing:
+            return existing
+        payload = {"name": person["phone"], "phone": person["phone"], "location": person["location"]}
+        if kind == "driver":
+            payload.update(tuktuk_number=person["phone"][-4:], status="available", rating=5, total_rides=0)
+        return self.db.table(table).insert([payload]).select().single().execute()["data"]
+
+    def run(self):
+        for spec in self.scenario["drivers"]:
+            self.at(self.rng.uniform(0, 5), self.driver_online, spec)
+        for spec in self.scenario["passengers"]:
+            self.at(spec["at"], self.passenger_session, spec)
+        start = time.perf_counter()
+        # نترك ساعة افتراضية بعد آخر طلب حتى تكتمل الرحلات الجارية
+        end = self.scenario["duration"] + 3600
+        while self._events:
+            t, _, fn, args = heapq.heappop(self._events)
+            if t > end:
+                break
+            self.now = t
+            fn(*args)
+        self.wall = time.perf_counter() - start
+        return self
+
+    # ---------- السائق ----------
+    def driver_online(self, spec):
+        driver = self.step("register", self.register, "driver", spec)
+        state = {"row": driver, "location": driver["location"], "ride": None, "channels": []}
+        rides = self.tables["rides"]
+        self.at(self.ping_interval, self.driver_ping, state)
+
+        def on_assigned(payload):
+            ride = payload["new"]
+            if ride["status"] == "pending":
+                self.offer(state, ride)
+
+        def on_broadcast(message):
+            ride = message["payload"]
+            if ride["status"] == "pending" and not ride.get("driver_id"):
+                self.offer(state, ride)
+
+        state["on_broadcast"] = on_broadcast
+
+        def go_online():
+            self.db.table(rides).select("*").eq("driver_id", driver["id"]).neq("status", "finished").execute()
+            state["channels"].append(
+                self.db.channel(f"driver_rides:{driver['id']}")
+                .on("postgres_changes", {"event": "*", "table": rides, "filter": f"driver_id=eq.{driver['id']}"}, on_assigned)
+                .subscribe()
+            )
+            self.join_cells(state)
+
+        self.step("online", go_online)
+
+    # الاشتراك في قنوات خلية السائق والخلايا المجاورة (utils/geocell.ts)
+    def join_cells(self, state):
+        for channel in state["channels"][1:]:
+            self.db.remove_channel(channel)
+        del state["channels"][1:]
+        loc = state["location"]
+        for cell in neighbour_cells(loc["lat"], loc["lng"]):
+            state["channels"].append(
+                self.db.channel(channel_name(cell)).on("broadcast", {"event": "ride"}, state["on_broadcast"]).subscribe()
+            )
+
+    def driver_ping(self, state):
+        loc = state["location"]
+        loc = {"lat": loc["lat"] + self.rng.uniform(-0.001, 0.001), "lng": loc["lng"] + self.rng.uniform(-0.001, 0.001)}
+        old_cell = cell_of(state["location"]["lat"], state["location"]["lng"])
+        state["location"] = loc
+        self.step("location_ping", lambda: self.db.table(self.tables["drivers"]).update({"location": loc}).eq("id", state["row"]["id"]).execute())
+        if cell_of(loc["lat"], loc["lng"]) != old_cell:
+            self.join_cells(state)
+        if self.now < self.scenario["duration"]:
+            self.at(self.ping_interval, self.driver_ping, state)
+
+    def offer(self, state, ride):
+        if state["ride"] is not None:
+            if state["ride"] != ride["id"]:
+                self.outcomes["ignored_busy"] += 1
+            return
+        state["ride"] = ride["id"]
+        self.at(self.rng.uniform(2, 8), self.driver_accept, state, ride)
+
+    def driver_accept(self, state, ride):
+        rides = self.tables["rides"]
+
+        def accept():
+            # acceptRide → transitionRide في utils/rideState.ts: تحديث مشروط بأن الرحلة ما زالت pending
+            won = self.db.table(rides).update({"driver_id": state["row"]["id"], "status": "accepted"}).eq(
+                "id", ride["id"]
+            ).eq("status", "pending").select().execute()["data"]
+            if len(won) != 1:
+                return False
+            self.db.table(self.tables["users"]).select("name").eq("id", ride["passenger_id"]).single().execute()
+            return True
+
+        if not self.step("accept", accept):
+            self.outcomes["lost_accept"] += 1
+            state["ride"] = None
+            return
+        pickup_km = haversine_km(state["location"]["lat"], state["location"]["lng"], ride["pickup"]["lat"], ride["pickup"]["lng"])
+        self.at(pickup_km / SPEED_KMH * 3600, self.driver_update, state, ride, "on_the_way")
+
+    def driver_update(self, state, ride, status):
+        previous = self.lifecycle[self.lifecycle.index(status) - 1]
+        self.step(status, lambda: self.db.table(self.tables["rides"]).update({"status": status}).eq("id", ride["id"]).eq(
+            "status", previous
+        ).eq("driver_id", state["row"]["id"]).execute())
+        if status == "on_the_way":
+            self.at(ride["distance"] / SPEED_KMH * 3600, self.driver_update, state, ride, "finished")
+        else:
+            state["ride"] = None
+            state["location"] = ride["destination"]
+
+    # ---------- الراكب ----------
+    def passenger_session(self, spec):
+        user = self.step("register", self.register, "user", spec)
+        rides, drivers_table = self.tables["rides"], self.tables["drivers"]
+        state = {"user": user, "drivers": {}, "channels": [], "ride": None}
+
+        def on_driver(payload):
+            # applyDriverChange في utils/driverFeed.ts
+            row = payload["new"]
+            if row.get("status") == "available" and row.get("location"):
+                state["drivers"][row["id"]] = row
+            else:
+                state["drivers"].pop(row.get("id") or payload["old"].get("id"), None)
+
+        def on_ride(payload):
+            state["ride"] = payload["new"]
+            if payload["new"]["status"] == "finished":
+                self.outcomes["completed"] += 1
+                for channel in state["channels"]:
+                    self.db.remove_channel(channel)
+
+        def mount():
+            data = self.db.table(drivers_table).select("*").eq("status", "available").execute()["data"]
+            state["drivers"] = {d["id"]: d for d in data}
+            state["channels"].append(
+                self.db.channel("public:drivers").on("postgres_changes", {"event": "*", "table": drivers_table}, on_driver).subscribe()
+            )
+            self.db.table(rides).select("*").eq("passenger_id", user["id"]).in_("status", self.lifecycle[:-1]).order(
+                "created_at", ascending=False
+            ).limit(1).execute()
+            state["channels"].append(
+                self.db.channel(f"ride:{user['id']}")
+                .on("postgres_changes", {"event": "*", "table": rides, "filter": f"passenger_id=eq.{user['id']}"}, on_ride)
+                .subscribe()
+            )
+
+        def request():
+            # requestRide: أقرب سائق بحلقة خطية ثم إدخال الرحلة
+            loc = user["location"]
+            nearest, best = None, float("inf")
+            for d in state["drivers"].values():
+                dist = calculate_distance(loc, d["location"])
+                if dist < best:
+                    nearest, best = d, dist
+            distance = calculate_distance(loc, spec["destination"])
+            ride = self.db.table(rides).insert([{
+                "passenger_id": user["id"],
+                "driver_id": nearest["id"] if nearest else None,
+                "pickup": loc,
+                "destination": spec["destination"],
+                "status": self.lifecycle[0],
+                "price": calculate_price(distance),
+                "distance": distance,
+            }]).select().single().execute()["data"]
+            if not ride["driver_id"]:
+                self.db.channel(channel_name(cell_of(loc["lat"], loc["lng"]))).send(
+                    {"type": "broadcast", "event": "ride", "payload": ride}
+                )
+            state["ride"] = ride
+
+        self.step("mount", mount)
+        self.at(self.rng.uniform(5, 20), lambda: self.step("request", request))
+
+    def report(self):
+        total = sum(len(v) for v in self.latency.values())
+        pending = self.db.table(self.tables["rides"]).select("id").eq("status", self.lifecycle[0]).execute()["data"]
+        self.outcomes["unserved"] = len(pending)
+        rows = []
+        for name in ["register", "online", "mount", "request", "accept", "on_the_way", "finished", "location_ping"]:
+            values = self.latency.get(name)
+            if not values:
+                continue
+            rows.append({
+                "step": name,
+                "count": len(values),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "messages": self.fanout.get(name, 0),
+                "messages_per_op": self.fanout.get(name, 0) / len(values),
+            })
+        return {
+            "wall_s": self.wall,
+            "steps_per_s": total / self.wall,
+            "db": dict(self.db.counters),
+            "outcomes": dict(self.outcomes),
+            "steps": rows,
+        }
+
+
+def print_report(report):
+    print(f"الزمن الحقيقي {report['wall_s']:.2f}s | {report['steps_per_s']:,.0f} خطوة/ث | {report['db']}")
+    print(f"النتائج: {report['outcomes']}")
+    print(f"{'الخطوة':>14} {'العدد':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'رسائل':>11} {'رسائل/عملية':>12}")
+    for row in report["steps"]:
+        print(
+            f"{row['step']:>14} {row['count']:>8,} {row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f} "
+            f"{row['messages']:>11,} {row['messages_per_op']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="مولد حمل لدورة حياة رحلات TukTuk Go")
+    parser.add_argument("--drivers", type=int, default=300)
+    parser.add_argument("--passengers", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=300, help="مدة إرسال الطلبات بالثواني الافتراضية")
+    parser.add_argument("--ping-interval", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--record", metavar="FILE", help="حفظ السيناريو المولد لإعادة تشغيله")
+    parser.add_argument("--replay", metavar="FILE", help="إعادة تشغيل سيناريو محفوظ")
+    parser.add_argument("--json", action="store_true", help="طباعة التقرير بصيغة JSON")
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as f:
+            scenario = json.load(f)
+    else:
+        scenario = make_scenario(args.drivers, args.passengers, args.duration, args.seed)
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            json.dump(scenario, f)
+
+    report = Simulation(scenario, project_definition(), args.ping_interval).run().report()
+    if args.json:
+        print(json.dumps(report, indent=1))
+    else:
+        print_report(report)
@@ -0,0 +1,331 @@
+import copy
+import itertools
+import uuid
+from datetime import datetime, timezone
+
+# بديل محلي داخل العملية لجداول Supabase وقنوات realtime
+# يحاكي الجزء الذي تستخدمه الواجهات من supabase-js:
+#   db.table("rides").select("*").eq("passenger_id", x).in_("status", [...]).order("created_at", ascending=False).limit(1).single().execute()
+#   db.channel("ride:1").on("postgres_changes", {"event": "*", "table": "rides", "filter": "passenger_id=eq.1"}, cb).subscribe()
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Query:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.action = "select"
+        self.values = None
+        self.filters = []
+        self.columns = "*"
+        self.ordering = None
+        self.limit_count = None
+        self.want_single = False
+        self.returning = False
+
+    def select(self, columns="*"):
+        # بعد insert/update تعني select() إرجاع الصفوف المكتوبة
+        if self.action == "select":
+            self.columns = columns
+        else:
+            self.returning = True
+        return self
+
+    def insert(self, rows):
+        self.action, self.values = "insert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def update(self, values):
+        self.action, self.values = "update", values
+        return self
+
+    # INSERT ... ON CONFLICT (id) DO UPDATE
+    def upsert(self, rows):
+        self.action, self.values = "upsert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(("eq", column, value))
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(("neq", column, value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(("in", column, frozenset(values)))
+        return self
+
+    def order(self, column, ascending=True):
+        self.ordering = (column, ascending)
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def single(self):
+        self.want_single = True
+        return self
+
+    def execute(self):
+        return self.db.execute(self)
+
+
+# الشكل النصي للقيمة كما يظهر في فلاتر PostgREST (?status=eq.available)
+def as_text(value):
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return None
+    return str(value)
+
+
+# القيم القادمة من HTTP نصوص دائما، لذلك نقارن أيضا بالشكل النصي
+def _equal(current, value):
+    return current == value or (isinstance(value, str) and as_text(current) == value)
+
+
+def _matches(row, filters):
+    for op, column, value in filters:
+        current = row.get(column)
+        if op == "eq" and not _equal(current, value):
+            return False
+        # مثل SQL: NULL <> x ليست true، فالصف بقيمة NULL لا يطابق neq
+        if op == "neq" and (current is None or _equal(current, value)):
+            return False
+        if op == "in" and current not in value and as_text(current) not in value:
+            return False
+    return True
+
+
+# فلتر realtime بصيغة PostgREST: "column=eq.value"
+def parse_filter(text):
+    if not text:
+        return None
+    column, _, rest = text.partition("=")
+    op, _, value = rest.partition(".")
+    if op != "eq":
+        raise ValueError(f"فلتر غير مدعوم: {text}")
+    return column, value
+
+
+class Channel:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.bindings = []
+        self.subscribed = False
+
+    def on(self, kind, options, callback):
+        self.bindings.append((kind, options, callback))
+        return self
+
+    def subscribe(self, callback=None):
+        self.db._subscribe(self)
+        if callback:
+            callback("SUBSCRIBED")
+        return self
+
+    def send(self, message):
+        return self.db._broadcast(self.name, message.get("event"), message.get("payload"))
+
+
+class LocalDB:
+    def __init__(self, tables=("users", "drivers", "rides")):
+        self.tables = {name: {} for name in tables}
+        self._seq = itertools.count(1)
+        # اشتراكات postgres_changes مفهرسة حسب (الجدول، العمود، القيمة) حتى لا نمر على كل المشتركين
+        self._change_subs = {}
+        self._filter_columns = {}
+        self._broadcast_subs = {}
+        # فهارس ثانوية {الجدول: {العمود: {القيمة النصية: set(ids)}}} تبنى عند أول استعلام على العمود
+        self._indexes = {name: {} for name in tables}
+        self.counters = {"queries": 0, "writes": 0, "change_events": 0, "messages_delivered": 0}
+
+    def table(self, name):
+        return Query(self, name)
+
+    from_ = table
+
+    def channel(self, name):
+        return Channel(self, name)
+
+    def remove_channel(self, channel):
+        if not channel.subscribed:
+            return
+        channel.subscribed = False
+        for kind, options, callback in channel.bindings:
+            if kind == "postgres_changes":
+                key = self._change_key(options)
+                subs = self._change_subs.get(key, [])
+                subs[:] = [s for s in subs if s[2] is not callback]
+            elif kind == "broadcast":
+                subs = self._broadcast_subs.get(channel.name, [])
+                subs[:] = [s for s in subs if s[1] is not callback]
+
+    def _change_key(self, options):
+        parsed = parse_filter(options.get("filter"))
+        return (options["table"],) + (parsed if parsed else (None, None))
+
+    def _subscribe(self, channel):
+        channel.subscribed = True
+        for kind, options, callback in channel.bindings:
+            if kind == "postgres_changes":
+                key = self._change_key(options)
+                self._change_subs.setdefault(key, []).append((options.get("event", "*"), channel, callback))
+                if key[1] is not None:
+                    self._filter_columns.setdefault(key[0], set()).add(key[1])
+            elif kind == "broadcast":
+                self._broadcast_subs.setdefault(channel.name, []).append((options.get("event"), callback))
+
+    def _broadcast(self, name, event, payload):
+        delivered = 0
+        for wanted, callback in list(self._broadcast_subs.get(name, ())):
+            if wanted in (None, event):
+                callback({"event": event, "payload": payload})
+                delivered += 1
+        self.counters["messages_delivered"] += delivered
+        return delivered
+
+    def _emit(self, table, event, new, old):
+        self.counters["change_events"] += 1
+        payload = {
+            "schema": "public",
+            "table": table,
+            "eventType": event,
+            "new": new,
+            "old": {"id": old["id"]} if old else {},
+            "commit_timestamp": _now_iso(),
+        }
+        targets = list(self._change_subs.get((table, None, None), ()))
+        row = new or old
+        for column in self._filter_columns.get(table, ()):
+            targets.extend(self._change_subs.get((table, column, as_text(row.get(column))), ()))
+        for wanted, _, callback in targets:
+            if wanted in ("*", event):
+                callback(payload)
+                self.counters["messages_delivered"] += 1
+
+    def _index(self, table, column):
+        index = self._indexes[table].get(column)
+        if index is None:
+            index = self._indexes[table][column] = {}
+            for row_id, row in self.tables[table].items():
+                key = as_text(row.get(column))
+                if key is not None:
+                    index.setdefault(key, set()).add(row_id)
+        return index
+
+    def _reindex(self, table, row_id, old, new):
+        for column, index in self._indexes[table].items():
+            before = as_text(old.get(column)) if old else None
+            after = as_text(new.get(column))
+            if old is not None and before == after:
+                continue
+            if before is not None:
+                ids = index.get(before)
+                if ids:
+                    ids.discard(row_id)
+                    if not ids:
+                        del index[before]
+            if after is not None:
+                index.setdefault(after, set()).add(row_id)
+
+    # أصغر مجموعة صفوف مرشحة: المفتاح الأساسي أولا ثم أضيق فهرس ثانوي
+    def _candidates(self, table, filters):
+        rows = self.tables[table]
+        best = None
+        for op, column, value in filters:
+            if op == "eq" and column == "id":
+                row = rows.get(value)
+                return [row] if row is not None else []
+            if op == "eq":
+                index = self._index(table, column)
+                key = as_text(value) if not isinstance(value, str) else value
+                ids = index.get(key, ())
+            elif op == "in":
+                index = self._index(table, column)
+                ids = set()
+                for v in value:
+                    ids |= index.get(as_text(v) if not isinstance(v, str) else v, set())
+            else:
+                continue
+            if best is None or len(ids) < len(best):
+                best = ids
+        if best is None:
+            return rows.values()
+        # نفس ترتيب المسح الكامل (ترتيب الإدخال) حتى تبقى النتائج غير المرتبة ثابتة بين التشغيلات
+        return sorted((rows[i] for i in best), key=lambda r: r["_seq"])
+
+    def execute(self, query):
+        self.counters["queries"] += 1
+        if query.table not in self.tables:
+            return {"data": None, "error": {"message": f'relation "{query.table}" does not exist'}}
+        rows = self.tables[query.table]
+
+        if query.action == "insert":
+            data = [self._insert(query.table, values) for values in query.values]
+        elif query.action == "upsert":
+            data = []
+            for values in query.values:
+                row = rows.get(values.get("id"))
+                data.append(self._update(query.table, row, values) if row else self._insert(query.table, values))
+        elif query.action == "update":
+            matched = [r for r in self._candidates(query.table, query.filters) if _matches(r, query.filters)]
+            data = [self._update(query.table, row, query.values) for row in matched]
+        else:
+            data = [r for r in self._candidates(query.table, query.filters) if _matches(r, query.filters)]
+            if query.ordering:
+                column, ascending = query.ordering
+                # NULL في الآخر تصاعديا وفي الأول تنازليا (مثل Postgres). الصفوف هنا بترتيب الإدخال والترتيب
+                # ثابت في الاتجاهين (reverse لا يعكس المتساويات)، فالقيم المتساوية تبقى بترتيب الإدخال
+                data.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=not ascending)
+            if query.limit_count is not None:
+                data = data[: query.limit_count]
+            if query.columns == "*":
+                data = [self._public(r) for r in data]
+            else:
+                columns = [c.strip() for c in query.columns.split(",")]
+                data = [{c: r.get(c) for c in columns} for r in data]
+
+        if query.action != "select" and not query.returning:
+            data = None
+        if query.want_single:
+            if not data or len(data) != 1:
+                return {"data": None, "error": {"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned"}}
+            data = data[0]
+        return {"data": data, "error": None}
+
+    def _insert(self, table, values):
+        row = {"id": values.get("id") or str(uuid.uuid4()), "created_at": _now_iso(), **copy.deepcopy(values)}
+        row["_seq"] = next(self._seq)
+        self.tables[table][row["id"]] = row
+        self._reindex(table, row["id"], None, row)
+        self.counters["writes"] += 1
+        data = self._public(row)
+        self._emit(table, "INSERT", data, None)
+        return data
+
+    def _update(self, table, row, values):
+        old = self._public(row)
+        row.update(copy.deepcopy(values))
+        self._reindex(table, row["id"], old, row)
+        self.counters["writes"] += 1
+        data = self._public(row)
+        self._emit(table, "UPDATE", data, old)
+        return data
+
+    # القيم تنسخ عند الكتابة وتستبدل كاملة عند التحديث، فتكفي نسخة سطحية عند القراءة
+    # (القيم المتداخلة في النتائج للقراءة فقط)
+    @staticmethod
+    def _public(row):
+        data = row.copy()
+        del data["_seq"]
+        return data
+
@@ -0,0 +1,371 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+from .localdb import LocalDB, parse_filter
+
+# خادم محلي يحاكي Supabase فوق LocalDB للتشغيل والقياس بدون شبكة:
+#   REST:     /rest/v1/{table}  (select / eq / neq / in / order / limit / single / insert / update / upsert)
+#   Realtime: /realtime/v1/websocket  (بروتوكول Phoenix: postgres_changes و broadcast)
+#             /realtime/v1/api/broadcast  (channel.send قبل الاشتراك)
+# الواجهة تشير إليه عبر VITE_SUPABASE_URL=http://127.0.0.1:54321
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+SINGLE_OBJECT = "application/vnd.pgrst.object+json"
+
+CORS_HEADERS = (
+    "Access-Control-Allow-Origin: *\r\n"
+    "Access-Control-Allow-Methods: GET, POST, PATCH, OPTIONS\r\n"
+    "Access-Control-Allow-Headers: authorization, apikey, content-type, prefer, accept, accept-profile, "
+    "content-profile, range, x-client-info\r\n"
+    "Access-Control-Expose-Headers: content-range\r\n"
+)
+
+
+def _in_values(text):
+    # in.(a,"b c") → {"a", "b c"}
+    return [v.strip().strip('"') for v in text.strip("()").split(",") if v.strip()]
+
+
+# تحويل معاملات PostgREST في الرابط إلى Query على LocalDB
+def build_query(db, method, table, params, body, prefer):
+    query = db.table(table)
+    if method == "POST":
+        rows = json.loads(body or b"[]")
+        if "resolution=merge-duplicates" in prefer:
+            query.upsert(rows)
+        else:
+            query.insert(rows)
+    elif method == "PATCH":
+        query.update(json.loads(body or b"{}"))
+    query.returning = "return=representation" in prefer
+
+    for name, value in params:
+        if name == "select":
+            if method == "GET":
+                query.select(value)
+        elif name == "order":
+            column, _, direction = value.split(",")[0].partition(".")
+            query.order(column, not direction.startswith("desc"))
+        elif name == "limit":
+            query.limit(int(value))
+        elif name in ("on_conflict", "columns", "offset"):
+            continue
+        else:
+            op, _, operand = value.partition(".")
+            if op == "eq":
+                query.eq(name, operand)
+            elif op == "neq":
+                query.neq(name, operand)
+            elif op == "in":
+                query.in_(name, _in_values(operand))
+            else:
+                raise ValueError(f"عامل غير مدعوم: {name}={value}")
+    return query
+
+
+def _ws_frame(data, opcode=0x1):
+    n = len(data)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + data
+
+
+def _unmask(data, mask):
+    n = len(data)
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, "little") ^ int.from_bytes(key, "little")).to_bytes(n, "little")
+
+
+async def _read_ws_frame(reader):
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    data = await reader.readexactly(length)
+    return first & 0x80, first & 0x0F, _unmask(data, mask) if mask else data
+
+
+# اتصال websocket واحد من realtime-js؛ vsn 1.0.0 رسائل JSON ككائنات و 2.0.0 كمصفوفات
+class RealtimeConnection:
+    def __init__(self, server, writer, vsn):
+        self.server = server
+        self.writer = writer
+        self.arrays = vsn.startswith("2")
+        self.channels = {}
+
+    def push(self, topic, event, payload, ref=None, join_ref=None):
+        if self.arrays:
+            message = [join_ref, ref, topic, event, payload]
+        else:
+            message = {"topic": topic, "event": event, "payload": payload, "ref": ref, "join_ref": join_ref}
+        self.writer.write(_ws_frame(json.dumps(message).encode()))
+        self.server.counters["ws_messages_out"] += 1
+
+    def reply(self, topic, ref, join_ref, status="ok", response=None):
+        self.push(topic, "phx_reply", {"status": status, "response": response or {}}, ref, join_ref)
+
+    def receive(self, text):
+        self.server.counters["ws_messages_in"] += 1
+        message = json.loads(text)
+        if isinstance(message, list):
+            join_ref, ref, topic, event, payload = message
+        else:
+            topic, event, payload = message["topic"], message["event"], message.get("payload") or {}
+            ref, join_ref = message.get("ref"), message.get("join_ref")
+
+        if topic == "phoenix" and event == "heartbeat":
+            self.reply(topic, ref, join_ref)
+        elif event == "phx_join":
+            self.join(topic, payload, ref, join_ref)
+        elif event == "phx_leave":
+            self.leave(topic)
+            self.reply(topic, ref, join_ref)
+        elif event == "broadcast":
+            joined = self.channels.get(topic)
+            self.server.broadcast(topic, payload.get("event"), payload.get("payload"), sender=self)
+            if joined and joined[2]:
+                self.reply(topic, ref, join_ref)
+        elif event == "access_token":
+            pass
+        else:
+            self.reply(topic, ref, join_ref)
+
+    def join(self, topic, payload, ref, join_ref):
+        self.leave(topic)
+        config = payload.get("config") or {}
+        broadcast = config.get("broadcast") or {}
+        channel = self.server.db.channel(topic.partition(":")[2])
+        bindings = []
+        try:
+            for binding_id, spec in enumerate(config.get("postgres_changes") or [], 1):
+                parse_filter(spec.get("filter"))
+                channel.on("postgres_changes", spec, self._on_change(topic, binding_id, join_ref))
+                bindings.append({"id": binding_id, **spec})
+        except ValueError as e:
+            self.reply(topic, ref, join_ref, "error", {"reason": str(e)})
+            return
+        channel.on("broadcast", {}, self._on_broadcast(topic, join_ref, broadcast.get("self", False)))
+        channel.subscribe()
+        self.channels[topic] = (channel, join_ref, broadcast.get("ack", False))
+        self.reply(topic, ref, join_ref, response={"postgres_changes": bindings})
+
+    def leave(self, topic):
+        joined = self.channels.pop(topic, None)
+        if joined:
+            self.server.db.remove_channel(joined[0])
+
+    def close(self):
+        for topic in list(self.channels):
+            self.leave(topic)
+
+    def _on_change(self, topic, binding_id, join_ref):
+        def deliver(change):
+            self.push(topic, "postgres_changes", {
+                "ids": [binding_id],
+                "data": {
+                    "schema": change["schema"],
+                    "table": change["table"],
+                    "commit_timestamp": change["commit_timestamp"],
+                    "type": change["eventType"],
+                    "columns": [],
+                    "record": change["new"],
+                    "old_record": change["old"],
+                    "errors": None,
+                },
+            }, join_ref=join_ref)
+        return deliver
+
+    def _on_broadcast(self, topic, join_ref, to_self):
+        def deliver(message):
+            if self.server.sender is self and not to_self:
+                return
+            self.push(topic, "broadcast", {"type": "broadcast", **message}, join_ref=join_ref)
+        return deliver
+
+
+class LocalSupabase:
+    def __init__(self, db=None):
+        self.db = db if db is not None else LocalDB()
+        # الاتصال الذي يبث الآن، حتى لا تعود رسالة broadcast لمرسلها (إلا مع config.broadcast.self)
+        self.sender = None
+        self._started = time.time()
+        # JSON كل صف مخزن حتى يتغير: قائمة السائقين المتاحين آلاف الصفوف في كل طلب
+        self._encoded = {}
+        for table in self.db.tables:
+            self.db.channel(f"encoded:{table}").on("postgres_changes", {"event": "UPDATE", "table": table}, self._invalidate).subscribe()
+        self.counters = {"http_requests": 0, "http_errors": 0, "ws_connections": 0, "ws_messages_in": 0, "ws_messages_out": 0}
+
+    def _invalidate(self, change):
+        self._encoded.pop((change["table"], change["new"]["id"]), None)
+
+    def _encode_rows(self, table, rows):
+        parts = []
+        for row in rows:
+            key = (table, row.get("id"))
+            encoded = self._encoded.get(key)
+            if encoded is None:
+                encoded = self._encoded[key] = json.dumps(row).encode()
+            parts.append(encoded)
+        return b"[" + b",".join(parts) + b"]"
+
+    def broadcast(self, topic, event, payload, sender=None):
+        self.sender = sender
+        try:
+            return self.db._broadcast(topic.partition(":")[2] if topic.startswith("realtime:") else topic, event, payload)
+        finally:
+            self.sender = None
+
+    def metrics(self):
+        elapsed = max(time.time() - self._started, 1e-9)
+        return {**self.counters, **self.db.counters, "requests_per_s": self.counters["http_requests"] / elapsed}
+
+    # طلب HTTP واحد؛ يرجع (الحالة، ترويسات إضافية، الجسم)
+    def handle_http(self, method, target, headers, body):
+        self.counters["http_requests"] += 1
+        url = urlsplit(target)
+        path = url.path.rstrip("/")
+        if method == "OPTIONS":
+            return "204 No Content", "", b""
+        if path.startswith("/rest/v1/"):
+            return self._rest(method, path[len("/rest/v1/"):], parse_qsl(url.query, keep_blank_values=True), headers, body)
+        if method == "POST" and path == "/realtime/v1/api/broadcast":
+            for message in json.loads(body).get("messages", ()):
+                self.broadcast(message["topic"], message.get("event"), message.get("payload"))
+            return "202 Accepted", "", b""
+        if method == "GET" and path == "/metrics":
+            return "200 OK", "", json.dumps(self.metrics()).encode()
+        self.counters["http_errors"] += 1
+        return "404 Not Found", "", json.dumps({"message": "not found"}).encode()
+
+    def _rest(self, method, table, params, headers, body):
+        if method not in ("GET", "POST", "PATCH"):
+            self.counters["http_errors"] += 1
+            return "405 Method Not Allowed", "", b""
+        try:
+            query = build_query(self.db, method, table, params, body, headers.get("prefer", ""))
+        except ValueError as e:
+            self.counters["http_errors"] += 1
+            return "400 Bad Request", "", json.dumps({"code": "PGRST100", "message": str(e)}).encode()
+        if SINGLE_OBJECT in headers.get("accept", ""):
+            query.single()
+        result = query.execute()
+
+        error = result["error"]
+        if error:
+            self.counters["http_errors"] += 1
+            status = "406 Not Acceptable" if error.get("code") == "PGRST116" else "404 Not Found"
+            return status, "", json.dumps({"code": error.get("code", "42P01"), "message": error["message"], "details": None, "hint": None}).encode()
+        data = result["data"]
+        if data is None:
+            return ("201 Created" if method == "POST" else "204 No Content"), "", b""
+        if not isinstance(data, list):
+            return ("201 Created" if method == "POST" else "200 OK"), "", json.dumps(data).encode()
+        extra = f"Content-Range: {'0-' + str(len(data) - 1) if data else '*'}/*\r\n"
+        if method == "GET" and query.columns == "*":
+            return "200 OK", extra, self._encode_rows(table, data)
+        return ("201 Created" if method == "POST" else "200 OK"), extra, json.dumps(data).encode()
+
+    async def handle(self, reader, writer):
+        connection = None
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                if headers.get("upgrade", "").lower() == "websocket":
+                    connection = await self._upgrade(target, headers, writer)
+                    await self._websocket(connection, reader, writer)
+                    break
+
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+                status, extra, data = self.handle_http(method, target, headers, body)
+                content_type = "Content-Type: application/json\r\n" if data else ""
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n{CORS_HEADERS}{extra}{content_type}Content-Length: {len(data)}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+        except (ValueError, KeyError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if connection:
+                connection.close()
+            writer.close()
+
+    async def _upgrade(self, target, headers, writer):
+        accept = base64.b64encode(hashlib.sha1((headers["sec-websocket-key"] + WS_GUID).encode()).digest()).decode()
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+        )
+        await writer.drain()
+        self.counters["ws_connections"] += 1
+        vsn = dict(parse_qsl(urlsplit(target).query)).get("vsn", "1.0.0")
+        return RealtimeConnection(self, writer, vsn)
+
+    async def _websocket(self, connection, reader, writer):
+        fragments = []
+        while True:
+            final, opcode, data = await _read_ws_frame(reader)
+            if opcode == 0x8:
+                writer.write(_ws_frame(data[:2], 0x8))
+                await writer.drain()
+                return
+            if opcode == 0x9:
+                writer.write(_ws_frame(data, 0xA))
+            elif opcode in (0x0, 0x1):
+                fragments.append(data)
+                if final:
+                    text, fragments = b"".join(fragments).decode(), []
+                    connection.receive(text)
+            await writer.drain()
+
+
+async def serve(server, host="127.0.0.1", port=54321):
+    listener = await asyncio.start_server(server.handle, host, port)
+    async with listener:
+        await listener.serve_forever()
+
+
+def load_seed(db, path):
+    with open(path, encoding="utf-8") as f:
+        seed = json.load(f)
+    for table, rows in seed.items():
+        db.table(table).insert(rows).execute()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="خادم Supabase محلي في الذاكرة")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--seed", help='ملف JSON بالشكل {"drivers": [...], "users": [...]}')
+    args = parser.parse_args()
+
+    server = LocalSupabase()
+    if args.seed:
+        load_seed(server.db, args.seed)
+    print(f"Supabase المحلي على http://{args.host}:{args.port}")
+    asyncio.run(serve(server, args.host, args.port))
@@ -0,0 +1,265 @@
+import time
+
+from .dispatch import DriverIndex
+from .metrics import Histogram
+from .ridestate import RideStateMachine
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy اختياري: خوارزمية المجري أدناه تكفي لمكونات صغيرة
+    linear_sum_assignment = None
+
+# محرك مطابقة الرحلات: يجمع الطلبات المعلقة خلال نافذة قصيرة ثم يحل التوزيع دفعة واحدة
+# (أقل مجموع مسافات للوصول) بدلا من إعطاء كل طلب أقرب سائق لحظة إنشائه
+
+# تكلفة زوج غير مسموح (السائق أبعد من نصف القطر أو ليس من المرشحين)
+NO_EDGE = 1e9
+
+# ما ترجعه دالة commit عند الفشل لتحديد الطرف المتعارض (False وحدها تعامل كسائق مشغول)
+RIDE_TAKEN = "ride"
+DRIVER_BUSY = "driver"
+
+
+# خوارزمية المجري (Kuhn-Munkres) لمصفوفة عدد صفوفها <= عدد أعمدتها
+# ترجع لكل صف رقم العمود المخصص له
+def hungarian(cost):
+    n, m = len(cost), len(cost[0])
+    inf = float("inf")
+    u, v = [0.0] * (n + 1), [0.0] * (m + 1)
+    p, way = [0] * (m + 1), [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = p[j0], inf, 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j], way[j] = cur, j0
+                    if minv[j] < delta:
+                        delta, j1 = minv[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    result = [None] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            result[p[j] - 1] = j - 1
+    return result
+
+
+def solve_assignment(cost):
+    if not cost:
+        return []
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(cost)
+        result = [None] * len(cost)
+        for r, c in zip(rows, cols):
+            result[r] = c
+        return result
+    if len(cost) <= len(cost[0]):
+        return hungarian(cost)
+    # صفوف أكثر من الأعمدة: نحل المنقول
+    transposed = hungarian([list(col) for col in zip(*cost)])
+    result = [None] * len(cost)
+    for c, r in enumerate(transposed):
+        result[r] = c
+    return result
+
+
+# تقسيم الرسم (رحلة ← سائقون مرشحون) إلى مكونات مستقلة تحل كل منها وحدها
+def _components(candidates):
+    parent = {}
+
+    def find(x):
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for ride_id, options in candidates.items():
+        for driver_id, _ in options:
+            parent[find(("r", ride_id))] = find(("d", driver_id))
+        find(("r", ride_id))
+
+    groups = {}
+    for ride_id in candidates:
+        groups.setdefault(find(("r", ride_id)), []).append(ride_id)
+    return list(groups.values())
+
+
+class MatchingEngine:
+    def __init__(self, index, commit, window=1.5, candidates=8, max_km=5.0, clock=time.monotonic, router=None):
+        self.index = index if index is not None else DriverIndex()
+        self.router = router
+        self.commit = commit
+        self.window = window
+        self.candidates = candidates
+        self.max_km = max_km
+        self.clock = clock
+        self.pending = {}
+        self._window_start = None
+        # ذاكرة ثابتة مهما طال التشغيل
+        self.latencies = Histogram()
+        self.pickup_km_total = 0.0
+        self.counters = {"batches": 0, "matched": 0, "unmatched": 0, "commit_conflicts": 0}
+
+    def submit(self, ride):
+        self.pending[ride["id"]] = (ride, self.clock())
+        if self._window_start is None:
+            self._window_start = self.clock()
+
+    # يستدعى دوريا؛ يحل الدفعة عندما تنتهي النافذة
+    def tick(self):
+        if self._window_start is None or self.clock() - self._window_start < self.window:
+            return []
+        return self.match_batch()
+
+    def match_batch(self):
+        assignments = self._assignments()
+        return self._settle([(pair, self.commit(*pair[:2])) for pair in assignments])
+
+    # نفس الدفعة مع commit غير متزامن (DatabaseRides.commit)؛ الالتزامات بالترتيب لأن السائق قد يتكرر
+    async def match_batch_async(self):
+        assignments = self._assignments()
+        return self._settle([(pair, await self.commit(*pair[:2])) for pair in assignments])
+
+    async def tick_async(self):
+        if self._window_start is None or self.clock() - self._window_start < self.window:
+            return []
+        return await self.match_batch_async()
+
+    def _assignments(self):
+        self._window_start = None
+        if not self.pending:
+            return []
+        self.counters["batches"] += 1
+
+        candidates = {}
+        for ride_id, (ride, _) in self.pending.items():
+            pickup = ride["pickup"]
+            candidates[ride_id] = self.index.nearest(pickup["lat"], pickup["lng"], self.candidates, self.max_km)
+            if self.router is not None:
+                candidates[ride_id] = self._road_costs(pickup, candidates[ride_id])
+
+        assignments = []
+        for rides in _components(candidates):
+            drivers = sorted({d for r in rides for d, _ in candidates[r]})
+            if not drivers:
+                continue
+            column = {d: j for j, d in enumerate(drivers)}
+            cost = [[NO_EDGE] * len(drivers) for _ in rides]
+            for i, ride_id in enumerate(rides):
+                for driver_id, km in candidates[ride_id]:
+                    cost[i][column[driver_id]] = km
+            for i, j in enumerate(solve_assignment(cost)):
+                if j is not None and cost[i][j] < NO_EDGE:
+                    assignments.append((rides[i], drivers[j], cost[i][j]))
+        return assignments
+
+    # results: [((ride_id, driver_id, km), نتيجة commit)]
+    def _settle(self, results):
+        committed = []
+        now = self.clock()
+        for (ride_id, driver_id, km), result in results:
+            # الكتابة مشروطة: تفشل إذا أخذ أحد الرحلة أو السائق قبلنا
+            if result is not True:
+                # نخرج الطرف المتعارض حتى لا يقترح نفس الزوج في كل دفعة؛ الرحلة الباقية تجرب سائقا آخر
+                self.counters["commit_conflicts"] += 1
+                if result == RIDE_TAKEN:
+                    self.pending.pop(ride_id, None)
+                else:
+                    self.index.remove(driver_id)
+                continue
+            _, submitted = self.pending.pop(ride_id)
+            self.index.remove(driver_id)
+            self.latencies.record(now - submitted)
+            self.pickup_km_total += km
+            committed.append((ride_id, driver_id, km))
+
+        self.counters["matched"] += len(committed)
+        self.counters["unmatched"] = len(self.pending)
+        if self.pending:
+            self._window_start = now
+        return committed
+
+    # المرشحون بالخط المستقيم يعاد ترتيبهم بمسافة الطريق من السائق إلى نقطة الانطلاق
+    def _road_costs(self, pickup, options):
+        if not options:
+            return options
+        ids = [driver_id for driver_id, _ in options]
+        points = [self.index.location(driver_id) for driver_id in ids]
+        routes = self.router.many_to_one(points, pickup)
+        return [(driver_id, found[0]) for driver_id, found in zip(ids, routes) if found is not None]
+
+    def metrics(self):
+        return {
+            **self.counters,
+            "latency_p50": self.latencies.percentile(50),
+            "latency_p95": self.latencies.percentile(95),
+            "latency_p99": self.latencies.percentile(99),
+            "avg_pickup_km": self.pickup_km_total / self.counters["matched"] if self.counters["matched"] else 0.0,
+        }
+
+
+# القاعدة الحالية في requestRide: أقرب سائق لحظة الطلب
+def greedy_assign(index, ride, max_km=None):
+    pickup = ride["pickup"]
+    found = index.nearest(pickup["lat"], pickup["lng"], 1, max_km)
+    if not found:
+        return None
+    driver_id, km = found[0]
+    index.remove(driver_id)
+    return driver_id, km
+
+
+# التزام في الذاكرة (بديل UPDATE ... WHERE status = 'pending' AND driver_id IS NULL)
+class MemoryRides:
+    def __init__(self):
+        self.rides = {}
+        self.busy = set()
+
+    def add(self, ride):
+        self.rides[ride["id"]] = dict(ride)
+
+    def commit(self, ride_id, driver_id, status="accepted"):
+        ride = self.rides.get(ride_id)
+        if ride is None or ride["status"] != "pending" or ride.get("driver_id"):
+            return RIDE_TAKEN
+        if driver_id in self.busy:
+            return DRIVER_BUSY
+        ride["driver_id"] = driver_id
+        ride["status"] = status
+        self.busy.add(driver_id)
+        return True
+
+
+# التزام في قاعدة البيانات عبر آلة الحالات: pending → accepted مشروط (compare-and-set) في رحلة واحدة،
+# ثم السائق يصبح busy فيخرج من الفهرس عند المزامنة التالية
+class DatabaseRides:
+    def __init__(self, dal):
+        self.dal = dal
+        self.machine = RideStateMachine(dal)
+
+    async def commit(self, ride_id, driver_id):
+        if await self.dal.driver_on_ride(driver_id):
+            return DRIVER_BUSY
+        if await self.machine.accept(ride_id, driver_id) is None:
+            return RIDE_TAKEN
+        await self.dal.set_driver_status(driver_id, "busy")
+        return True
@@ -0,0 +1,49 @@
+# أدوات قياس مشتركة بين الخدمات
+import bisect
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+# مدرج تكراري للزمن بفئات لوغاريتمية (كل فئة أوسع من السابقة بـ 2^(1/4)): ذاكرة ثابتة مهما طال التشغيل،
+# والنسب المئوية تقريبية بخطأ أقل من 19%
+class Histogram:
+    GROWTH = 2 ** 0.25
+
+    def __init__(self, smallest=0.01, buckets=96):
+        self.bounds = [smallest * self.GROWTH ** i for i in range(buckets)]
+        self.counts = [0] * (buckets + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rank = min(self.count - 1, int(p / 100 * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen > rank:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+# ذاكرة مؤقتة لملفات الركاب والسائقين بالمعرف، نسخة بايثون من utils/profileCache.ts:
+# الطلبات في نفس دورة الحلقة تخرج كاستعلام واحد (get_many)، والطلبات المتزامنة لنفس المعرف
+# تنتظر نفس النتيجة (single-flight)، وأحداث postgres_changes تحدث المدخلات أو تحذفها
+
+TTL = 600  # ثوان
+USER_FIELDS = ("id", "name", "phone")
+DRIVER_FIELDS = ("id", "name", "phone", "rating", "total_rides", "tuktuk_number")
+
+
+class ProfileCache:
+    def __init__(self, load_many, fields=None, ttl=TTL, capacity=100_000, clock=time.time):
+        # load_many(ids) → قائمة صفوف بنفس الترتيب (None للمفقود)، مثل DataAccess.get_many
+        self.load_many = load_many
+        self.fields = fields
+        self.ttl = ttl
+        self.capacity = capacity
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._queued = []
+        self._flusher = None
+        self.counters = {"hits": 0, "misses": 0, "shared": 0, "batches": 0, "invalidations": 0, "evictions": 0}
+
+    @classmethod
+    def for_table(cls, dal, table, fields=None, **options):
+        return cls(lambda ids: dal.get_many(table, ids), fields, **options)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _slim(self, row):
+        if row is None or self.fields is None:
+            return row
+        return {field: row.get(field) for field in self.fields}
+
+    def _store(self, profile_id, value):
+        self._entries[profile_id] = (value, self.clock())
+        self._entries.move_to_end(profile_id)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _fresh(self, profile_id):
+        entry = self._entries.get(profile_id)
+        if entry is None or self.clock() - entry[1] > self.ttl:
+            return None
+        self._entries.move_to_end(profile_id)
+        return entry
+
+    # قراءة بدون انتظار: None إذا لم يحمل بعد
+    def peek(self, profile_id):
+        entry = self._fresh(profile_id)
+        return entry and entry[0]
+
+    def get(self, profile_id):
+        entry = self._fresh(profile_id)
+        loop = asyncio.get_running_loop()
+        if entry is not None:
+            self.counters["hits"] += 1
+            future = loop.create_future()
+            future.set_result(entry[0])
+            return future
+        future = self._inflight.get(profile_id)
+        if future is not None:
+            self.counters["shared"] += 1
+            return future
+        self.counters["misses"] += 1
+        future = self._inflight[profile_id] = loop.create_future()
+        self._queued.append(profile_id)
+        if len(self._queued) == 1:
+            self._flusher = loop.create_task(self._flush())
+        return future
+
+    async def get_many(self, ids):
+        return await asyncio.gather(*(self.get(i) for i in ids))
+
+    async def _flush(self):
+        ids, self._queued = self._queued, []
+        self.counters["batches"] += 1
+        try:
+            rows = await self.load_many(ids)
+        except Exception as e:
+            for profile_id in ids:
+                future = self._inflight.pop(profile_id)
+                if not future.done():
+                    future.set_exception(e)
+                    # لا نترك استثناء غير مستلم إذا لم ينتظره أحد
+                    future.exception()
+            return
+        for profile_id, row in zip(ids, rows):
+            value = self._slim(row)
+            self._store(profile_id, value)
+            future = self._inflight.pop(profile_id)
+            if not future.done():
+                future.set_result(value)
+
+    def prime(self, rows):
+        for row in rows:
+            self._store(row["id"], self._slim(row))
+
+    # حدث postgres_changes: دمج التعديل في المدخل المحفوظ أو حذفه
+    def apply(self, change):
+        new, old = change.get("new") or {}, change.get("old") or {}
+        profile_id = new.get("id") or old.get("id")
+        entry = self._entries.get(profile_id)
+        if entry is None:
+            return
+        self.counters["invalidations"] += 1
+        if change.get("eventType") == "DELETE" or entry[0] is None:
+            del self._entries[profile_id]
+        else:
+            merged = {**entry[0], **{k: v for k, v in new.items() if self.fields is None or k in self.fields}}
+            self._store(profile_id, merged)
+
+    def metrics(self):
+        lookups = self.counters["hits"] + self.counters["misses"] + self.counters["shared"]
+        served = self.counters["hits"] + self.counters["shared"]
+        return {**self.counters, "size": len(self._entries), "hit_rate": served / lookups if lookups else 0.0}
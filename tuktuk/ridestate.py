@@ -0,0 +1,65 @@
+import time
+
+from .metrics import Histogram
+
+# آلة حالات الرحلة: pending → accepted → on_the_way → finished فقط، وكل انتقال compare-and-set
+# مشروط بالحالة الحالية (الحالات تتقدم ولا ترجع، فالحالة نفسها تعمل كرقم نسخة).
+# عند التنافس يفوز طلب واحد في رحلة واحدة إلى القاعدة، والباقون يعرفون أنهم خسروا فورا
+# نفس القاعدة في utils/rideState.ts
+
+LIFECYCLE = ("pending", "accepted", "on_the_way", "finished")
+NEXT_STATUS = dict(zip(LIFECYCLE, LIFECYCLE[1:]))
+
+
+class IllegalTransition(ValueError):
+    pass
+
+
+def check_transition(current, target):
+    if NEXT_STATUS.get(current) != target:
+        raise IllegalTransition(f"انتقال غير مسموح: {current} → {target}")
+
+
+class RideStateMachine:
+    def __init__(self, dal):
+        self.dal = dal
+        self.counters = {"attempts": 0, "applied": 0, "conflicts": 0, "illegal": 0}
+        self.transitions = {}
+        self.latency = Histogram()
+
+    def _count(self, current, target, outcome):
+        self.counters[outcome] += 1
+        stats = self.transitions.setdefault(f"{current}→{target}", {"applied": 0, "conflicts": 0})
+        stats[outcome] += 1
+
+    # الصف بعد الانتقال، أو None إذا سبقنا طلب آخر (الحالة تغيرت أو الرحلة لسائق آخر)
+    async def transition(self, ride_id, current, target, driver_id):
+        self.counters["attempts"] += 1
+        try:
+            check_transition(current, target)
+        except IllegalTransition:
+            self.counters["illegal"] += 1
+            raise
+        start = time.perf_counter()
+        row = await self.dal.transition_ride(ride_id, current, target, driver_id)
+        self.latency.record((time.perf_counter() - start) * 1000)
+        self._count(current, target, "applied" if row is not None else "conflicts")
+        return row
+
+    async def accept(self, ride_id, driver_id):
+        return await self.transition(ride_id, "pending", "accepted", driver_id)
+
+    async def arrive(self, ride_id, driver_id):
+        return await self.transition(ride_id, "accepted", "on_the_way", driver_id)
+
+    async def finish(self, ride_id, driver_id):
+        return await self.transition(ride_id, "on_the_way", "finished", driver_id)
+
+    def metrics(self):
+        attempts = self.counters["attempts"] - self.counters["illegal"]
+        return {
+            **self.counters,
+            "conflict_rate": self.counters["conflicts"] / attempts if attempts else 0.0,
+            "transitions": {name: dict(stats) for name, stats in self.transitions.items()},
+            "cas_ms": self.latency.snapshot(),
+        }
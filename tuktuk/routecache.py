@@ -0,0 +1,150 @@
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+
+from .geo import calculate_price, haversine_km, to_fixed
+
+# ذاكرة مؤقتة للمسافة والزمن بين أزواج الخلايا الجغرافية: معظم الطلبات تتكرر بين نفس الأحياء،
+# فنحسب الطريق مرة واحدة بين مركزي الخليتين ونعيده لكل نقطتين داخلهما.
+# يستخدمها تقدير الأجرة والمطابقة معا (نفس واجهة Router: route / many_to_one / distance / price)
+
+CELL_DEG = 0.002  # ~220 متر: خطأ التقريب أقل من عرض شارعين
+AVG_SPEED_KMH = 20  # بدون محرك طرق: الزمن من الخط المستقيم
+
+
+def _cell(lat, lng, cell_deg):
+    return math.floor(lat / cell_deg), math.floor(lng / cell_deg)
+
+
+def _centre(cell, cell_deg):
+    return {"lat": (cell[0] + 0.5) * cell_deg, "lng": (cell[1] + 0.5) * cell_deg}
+
+
+# بديل Router عند عدم توفر رسم الطرق
+class StraightLine:
+    def route(self, a, b):
+        km = haversine_km(a["lat"], a["lng"], b["lat"], b["lng"])
+        return km, km / AVG_SPEED_KMH * 60
+
+    def many_to_one(self, points, b):
+        return [self.route(p, b) for p in points]
+
+
+class RouteCache:
+    def __init__(self, router=None, cell_deg=CELL_DEG, capacity=100_000, ttl=6 * 3600, clock=time.time):
+        self.router = router if router is not None else StraightLine()
+        self.cell_deg = cell_deg
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        # (خلية الأصل، خلية الوجهة) → (كم، دقائق، وقت الحساب)؛ الترتيب = الأقدم استخداما أولا
+        self._entries = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "same_cell": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, a, b):
+        return _cell(a["lat"], a["lng"], self.cell_deg) + _cell(b["lat"], b["lng"], self.cell_deg)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        if self.clock() - entry[2] > self.ttl:
+            del self._entries[key]
+            self.counters["expired"] += 1
+            self.counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return entry
+
+    def _store(self, key, found):
+        km, minutes = found if found is not None else (None, None)
+        self._entries[key] = (km, minutes, self.clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _points(self, key):
+        return _centre(key[:2], self.cell_deg), _centre(key[2:], self.cell_deg)
+
+    # (كم، دقائق) أو None إذا لا يوجد طريق (النتيجة السلبية تخزن أيضا)
+    def route(self, a, b):
+        key = self.key(a, b)
+        # داخل نفس الخلية مركزها لا يمثل الرحلة: نحسب مباشرة
+        if key[:2] == key[2:]:
+            self.counters["same_cell"] += 1
+            return self.router.route(a, b)
+        entry = self._lookup(key)
+        if entry is None:
+            self._store(key, self.router.route(*self._points(key)))
+            entry = self._entries[key]
+        return None if entry[0] is None else entry[:2]
+
+    # عدة سائقين إلى نقطة انطلاق واحدة: الغائب من الذاكرة يحسب دفعة واحدة
+    def many_to_one(self, points, b):
+        keys = [self.key(p, b) for p in points]
+        known = {}
+        for i, key in enumerate(keys):
+            if key[:2] == key[2:]:
+                self.counters["same_cell"] += 1
+                keys[i] = i
+                known[i] = self.router.route(points[i], b) or (None, None)
+        for key in dict.fromkeys(keys):
+            if key in known:
+                continue
+            entry = self._lookup(key)
+            if entry is not None:
+                known[key] = entry[:2]
+        missing = [key for key in dict.fromkeys(keys) if key not in known]
+        if missing:
+            target = _centre(missing[0][2:], self.cell_deg)
+            found = self.router.many_to_one([_centre(k[:2], self.cell_deg) for k in missing], target)
+            for key, result in zip(missing, found):
+                self._store(key, result)
+                known[key] = result if result is not None else (None, None)
+        return [None if known[key][0] is None else known[key] for key in keys]
+
+    def distance(self, a, b):
+        found = self.route(a, b)
+        return None if found is None else to_fixed(found[0])
+
+    def price(self, a, b):
+        distance = self.distance(a, b)
+        return None if distance is None else calculate_price(distance)
+
+    def metrics(self):
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {**self.counters, "size": len(self._entries), "hit_rate": self.counters["hits"] / lookups if lookups else 0.0}
+
+    # ملف البدء الدافئ: المدخلات غير المنتهية فقط، بترتيب الاستخدام
+    def save(self, path):
+        now = self.clock()
+        entries = [[*key, km, minutes, at] for key, (km, minutes, at) in self._entries.items() if now - at <= self.ttl]
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"cell_deg": self.cell_deg, "entries": entries}, f)
+        os.replace(tmp, path)
+        return len(entries)
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("cell_deg") != self.cell_deg:
+            return 0
+        now, loaded = self.clock(), 0
+        for i1, j1, i2, j2, km, minutes, at in data["entries"]:
+            if now - at <= self.ttl:
+                self._entries[(i1, j1, i2, j2)] = (km, minutes, at)
+                loaded += 1
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return loaded
@@ -0,0 +1,641 @@
+import argparse
+import bz2
+import gzip
+import heapq
+import json
+import math
+import time
+import xml.etree.ElementTree as ET
+from array import array
+
+from .geo import calculate_distance, calculate_price, haversine_km, to_fixed
+
+# حساب المسافة والزمن على شبكة الطرق بدلا من الخط المستقيم (Haversine):
+# الرسم يحمل من ملف OSM محلي إلى مصفوفات CSR، ويجهز مرة واحدة بـ contraction hierarchies
+# فيصبح الاستعلام بحثا ثنائي الاتجاه صغيرا؛ بدون تجهيز نستخدم A*
+# التجهيز:  python -m tuktuk.routing build cairo.osm.bz2 cairo.graph
+# الاستعلام: python -m tuktuk.routing route cairo.graph 30.04 31.23 30.06 31.25
+
+# سرعات تقريبية للتوكتوك حسب تصنيف الطريق (كم/س)
+SPEEDS = {
+    "trunk": 40,
+    "primary": 35,
+    "secondary": 30,
+    "tertiary": 30,
+    "unclassified": 25,
+    "road": 20,
+    "residential": 20,
+    "living_street": 10,
+    "service": 10,
+}
+MAX_SPEED_MS = max(SPEEDS.values()) / 3.6
+METERS_PER_DEG = 111_320
+INF = float("inf")
+
+
+def _csr(n, edges, typecodes):
+    edges = sorted(edges, key=lambda e: e[0])
+    offsets = array("i", [0]) * (n + 1)
+    for e in edges:
+        offsets[e[0] + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    targets = array("i", (e[1] for e in edges))
+    columns = [array(typecode, (e[2 + k] for e in edges)) for k, typecode in enumerate(typecodes)]
+    return offsets, targets, columns
+
+
+def _find(offsets, targets, u, v):
+    for i in range(offsets[u], offsets[u + 1]):
+        if targets[i] == v:
+            return i
+    return -1
+
+
+# رسم الطرق: العقد (lat/lng) والحواف الموجهة بالطول (متر) والزمن (ثانية)
+class RoadGraph:
+    def __init__(self, lat, lng, edges):
+        self.lat = array("d", lat)
+        self.lng = array("d", lng)
+        self.offsets, self.targets, (self.meters, self.seconds) = _csr(len(self.lat), edges, "ff")
+
+    @property
+    def n(self):
+        return len(self.lat)
+
+    def edges(self):
+        for u in range(self.n):
+            for i in range(self.offsets[u], self.offsets[u + 1]):
+                yield u, self.targets[i], self.meters[i], self.seconds[i]
+
+    # (متر، ثانية) للحافة u→v أو None
+    def edge(self, u, v):
+        i = _find(self.offsets, self.targets, u, v)
+        return None if i < 0 else (self.meters[i], self.seconds[i])
+
+    def arrays(self):
+        return {"lat": self.lat, "lng": self.lng, "offsets": self.offsets, "targets": self.targets,
+                "meters": self.meters, "seconds": self.seconds}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        graph = cls.__new__(cls)
+        for name in ("lat", "lng", "offsets", "targets", "meters", "seconds"):
+            setattr(graph, name, arrays[name])
+        return graph
+
+
+def _open(path):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+# مستخرج OSM بصيغة XML (.osm / .osm.bz2 / .osm.gz)؛ فقط الطرق الصالحة للتوكتوك
+def load_osm(path):
+    coords = {}
+    ways = []
+    with _open(path) as f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag == "node":
+                coords[elem.get("id")] = (float(elem.get("lat")), float(elem.get("lon")))
+                elem.clear()
+            elif elem.tag == "way":
+                tags = {t.get("k"): t.get("v") for t in elem.iter("tag")}
+                highway = (tags.get("highway") or "").removesuffix("_link")
+                if highway in SPEEDS:
+                    refs = [nd.get("ref") for nd in elem.iter("nd")]
+                    ways.append((refs, highway, tags))
+                elem.clear()
+
+    index, lat, lng, edges = {}, [], [], []
+
+    def node(ref):
+        i = index.get(ref)
+        if i is None:
+            i = index[ref] = len(lat)
+            lat.append(coords[ref][0])
+            lng.append(coords[ref][1])
+        return i
+
+    for refs, highway, tags in ways:
+        speed = SPEEDS[highway]
+        maxspeed = tags.get("maxspeed", "")
+        if maxspeed.isdigit():
+            speed = min(speed, int(maxspeed))
+        oneway = tags.get("oneway")
+        forward = oneway != "-1"
+        backward = oneway not in ("yes", "true", "1", "-1") and tags.get("junction") != "roundabout"
+        if oneway == "-1":
+            backward = True
+        for a, b in zip(refs, refs[1:]):
+            if a not in coords or b not in coords or a == b:
+                continue
+            u, v = node(a), node(b)
+            meters = haversine_km(*coords[a], *coords[b]) * 1000
+            seconds = meters / (speed / 3.6)
+            if forward:
+                edges.append((u, v, meters, seconds))
+            if backward:
+                edges.append((v, u, meters, seconds))
+    return RoadGraph(lat, lng, edges)
+
+
+# A* على الرسم الأصلي (بدون تجهيز) بالزمن؛ المصادر والأهداف قوائم (عقدة، ثوان، أمتار) من الالتقاط
+def astar(graph, sources, targets):
+    goal = {}
+    for node, s, m in targets:
+        if s < goal.get(node, (INF,))[0]:
+            goal[node] = (s, m)
+    goal_points = [(graph.lat[t], graph.lng[t]) for t in goal]
+
+    def h(v):
+        lat, lng = graph.lat[v], graph.lng[v]
+        return min(haversine_km(lat, lng, a, b) for a, b in goal_points) * 1000 / MAX_SPEED_MS
+
+    dist, heap = {}, []
+    for node, s, m in sources:
+        if s < dist.get(node, (INF,))[0]:
+            dist[node] = (s, m)
+            heapq.heappush(heap, (s + h(node), s, node))
+    best = (INF, INF)
+    offsets, tg, meters, seconds = graph.offsets, graph.targets, graph.meters, graph.seconds
+    while heap:
+        f, d, v = heapq.heappop(heap)
+        if f >= best[0]:
+            break
+        if d > dist[v][0]:
+            continue
+        m = dist[v][1]
+        if v in goal and d + goal[v][0] < best[0]:
+            best = (d + goal[v][0], m + goal[v][1])
+        for i in range(offsets[v], offsets[v + 1]):
+            x, nd = tg[i], d + seconds[i]
+            if nd < dist.get(x, (INF,))[0]:
+                dist[x] = (nd, m + meters[i])
+                heapq.heappush(heap, (nd + h(x), nd, x))
+    return None if best[0] == INF else best
+
+
+class ContractionHierarchy:
+    # up: حواف من كل عقدة إلى عقد أعلى رتبة (للبحث الأمامي)
+    # down: عند كل عقدة الحواف الداخلة إليها من عقد أعلى رتبة (للبحث الخلفي)
+    # via: العقدة الوسطى للاختصار (-1 للحافة الأصلية) لفك المسار
+    def __init__(self, rank, up, down):
+        self.rank = rank
+        self.up = up
+        self.down = down
+
+    @classmethod
+    def build(cls, graph, settle_limit=200, progress=None):
+        n = graph.n
+        out = [{} for _ in range(n)]
+        inc = [{} for _ in range(n)]
+        for u, v, m, s in graph.edges():
+            if u != v and s < out[u].get(v, (INF,))[0]:
+                out[u][v] = inc[v][u] = (s, m, -1)
+        deleted = [0] * n
+        level = [0] * n
+
+        # بحث شاهد محدود: هل يوجد طريق من u إلى كل هدف لا يمر بـ skip وليس أطول من الاختصار؟
+        def witness(u, skip, limit, wanted):
+            dist, heap, settled = {u: 0.0}, [(0.0, u)], 0
+            while heap and wanted:
+                d, x = heapq.heappop(heap)
+                if d > dist[x]:
+                    continue
+                wanted.discard(x)
+                settled += 1
+                if d > limit or settled > settle_limit:
+                    break
+                for y, (s, _, _) in out[x].items():
+                    if y != skip and d + s < dist.get(y, INF):
+                        dist[y] = d + s
+                        heapq.heappush(heap, (d + s, y))
+            return dist
+
+        def shortcuts(v):
+            adds = []
+            outs = out[v]
+            if not outs:
+                return adds
+            for u, (s1, m1, _) in inc[v].items():
+                others = [(x, e) for x, e in outs.items() if x != u]
+                if not others:
+                    continue
+                limit = s1 + max(e[0] for _, e in others)
+                dist = witness(u, v, limit, {x for x, _ in others})
+                for x, (s2, m2, _) in others:
+                    if dist.get(x, INF) > s1 + s2:
+                        adds.append((u, x, s1 + s2, m1 + m2, v))
+            return adds
+
+        # فرق الحواف + الجيران المحذوفين + العمق: يوزع التجهيز بالتساوي ويقصر مسافات البحث
+        def priority(v, adds):
+            return 2 * (len(adds) - len(inc[v]) - len(out[v])) + deleted[v] + level[v]
+
+        heap = [(priority(v, shortcuts(v)), v) for v in range(n)]
+        heapq.heapify(heap)
+        rank = array("i", [0]) * n
+        up_edges, down_edges = [], []
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            adds = shortcuts(v)
+            p = priority(v, adds)
+            # أولوية كسولة: إذا ساءت العقدة منذ حسابها نعيدها للطابور
+            if heap and p > heap[0][0]:
+                heapq.heappush(heap, (p, v))
+                continue
+            rank[v] = order
+            order += 1
+            for x, (s, m, via) in out[v].items():
+                up_edges.append((v, x, s, m, via))
+                del inc[x][v]
+                deleted[x] += 1
+                level[x] = max(level[x], level[v] + 1)
+            for u, (s, m, via) in inc[v].items():
+                down_edges.append((v, u, s, m, via))
+                del out[u][v]
+                deleted[u] += 1
+                level[u] = max(level[u], level[v] + 1)
+            out[v], inc[v] = {}, {}
+            for u, x, s, m, via in adds:
+                if s < out[u].get(x, (INF,))[0]:
+                    out[u][x] = inc[x][u] = (s, m, via)
+            if progress and order % 10_000 == 0:
+                progress(order, n)
+
+        up = _csr(n, up_edges, "ffi")
+        down = _csr(n, down_edges, "ffi")
+        return cls(rank, (up[0], up[1], *up[2]), (down[0], down[1], *down[2]))
+
+    def _seed(self, seeds):
+        dist, meta, heap = {}, {}, []
+        for node, s, m in seeds:
+            if s < dist.get(node, INF):
+                dist[node] = s
+                meta[node] = (m, -1, -1)
+                heapq.heappush(heap, (s, node))
+        return dist, meta, heap
+
+    @staticmethod
+    def _stalled(dist, d, v, offsets, tg, seconds):
+        for i in range(offsets[v], offsets[v + 1]):
+            if dist.get(tg[i], INF) + seconds[i] < d:
+                return True
+        return False
+
+    # بحث ثنائي الاتجاه على الرسم الصاعد؛ يرجع (ثوان، أمتار، عقدة الالتقاء، البحثين) أو None
+    # مع stall-on-demand: عقدة يصلها طريق أقصر عبر عقدة أعلى رتبة لا نوسعها
+    def query(self, sources, targets):
+        fdist, fmeta, fh = self._seed(sources)
+        bdist, bmeta, bh = self._seed(targets)
+        best, meet = INF, -1
+        while fh or bh:
+            if fh and (not bh or fh[0][0] <= bh[0][0]):
+                heap, dist, meta, other = fh, fdist, fmeta, bdist
+                offsets, tg, seconds, meters, _ = self.up
+                s_offsets, s_tg, s_seconds = self.down[:3]
+            else:
+                heap, dist, meta, other = bh, bdist, bmeta, fdist
+                offsets, tg, seconds, meters, _ = self.down
+                s_offsets, s_tg, s_seconds = self.up[:3]
+            d, v = heapq.heappop(heap)
+            if d >= best:
+                heap.clear()
+                continue
+            if d > dist[v]:
+                continue
+            if v in other and d + other[v] < best:
+                best, meet = d + other[v], v
+            if self._stalled(dist, d, v, s_offsets, s_tg, s_seconds):
+                continue
+            m = meta[v][0]
+            for i in range(offsets[v], offsets[v + 1]):
+                nd = d + seconds[i]
+                x = tg[i]
+                if nd < dist.get(x, INF):
+                    dist[x] = nd
+                    meta[x] = (m + meters[i], v, i)
+                    heapq.heappush(heap, (nd, x))
+        if meet < 0:
+            return None
+        return best, fmeta[meet][0] + bmeta[meet][0], meet, fmeta, bmeta
+
+    # مصدر واحد إلى أهداف كثيرة: بحث أمامي كامل مرة واحدة ثم بحث خلفي صغير لكل هدف
+    # مع reverse=True العكس: one بذور هدف واحد و many بذور مصادر كثيرة (سائقون إلى نقطة انطلاق)
+    def one_to_many(self, one, many, reverse=False):
+        first, second = (self.down, self.up) if reverse else (self.up, self.down)
+        fdist, fmeta, heap = self._seed(one)
+        offsets, tg, seconds, meters, _ = first
+        s_offsets, s_tg, s_seconds = second[:3]
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > fdist[v]:
+                continue
+            if self._stalled(fdist, d, v, s_offsets, s_tg, s_seconds):
+                continue
+            m = fmeta[v][0]
+            for i in range(offsets[v], offsets[v + 1]):
+                nd = d + seconds[i]
+                x = tg[i]
+                if nd < fdist.get(x, INF):
+                    fdist[x] = nd
+                    fmeta[x] = (m + meters[i], v, i)
+                    heapq.heappush(heap, (nd, x))
+
+        offsets, tg, seconds, meters, _ = second
+        s_offsets, s_tg, s_seconds = first[:3]
+        results = []
+        for seeds in many:
+            bdist, bmeta, heap = self._seed(seeds)
+            best, best_m = INF, INF
+            while heap:
+                d, v = heapq.heappop(heap)
+                if d >= best:
+                    break
+                if d > bdist[v]:
+                    continue
+                m = bmeta[v][0]
+                if v in fdist and d + fdist[v] < best:
+                    best, best_m = d + fdist[v], m + fmeta[v][0]
+                if self._stalled(bdist, d, v, s_offsets, s_tg, s_seconds):
+                    continue
+                for i in range(offsets[v], offsets[v + 1]):
+                    nd = d + seconds[i]
+                    x = tg[i]
+                    if nd < bdist.get(x, INF):
+                        bdist[x] = nd
+                        bmeta[x] = (m + meters[i], v, i)
+                        heapq.heappush(heap, (nd, x))
+            results.append(None if best == INF else (best, best_m))
+        return results
+
+    # فك الاختصارات إلى عقد الرسم الأصلي
+    def _unpack(self, u, x, via, nodes):
+        if via < 0:
+            nodes.append(x)
+            return
+        i = _find(self.down[0], self.down[1], via, u)
+        self._unpack(u, via, self.down[4][i], nodes)
+        j = _find(self.up[0], self.up[1], via, x)
+        self._unpack(via, x, self.up[4][j], nodes)
+
+    def path(self, result):
+        _, _, meet, fwd, bwd = result
+        hops = []
+        v = meet
+        while fwd[v][1] >= 0:
+            _, parent, i = fwd[v]
+            hops.append((parent, v, self.up[4][i]))
+            v = parent
+        hops.reverse()
+        nodes = [v]
+        v = meet
+        while bwd[v][1] >= 0:
+            _, parent, i = bwd[v]
+            hops.append((v, parent, self.down[4][i]))
+            v = parent
+        for u, x, via in hops:
+            self._unpack(u, x, via, nodes)
+        return nodes
+
+    def arrays(self):
+        out = {"rank": self.rank}
+        for prefix, part in (("up", self.up), ("down", self.down)):
+            for name, column in zip(("offsets", "targets", "seconds", "meters", "via"), part):
+                out[f"{prefix}_{name}"] = column
+        return out
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        names = ("offsets", "targets", "seconds", "meters", "via")
+        return cls(
+            arrays["rank"],
+            tuple(arrays[f"up_{name}"] for name in names),
+            tuple(arrays[f"down_{name}"] for name in names),
+        )
+
+
+# فهرس شبكي للمقاطع لالتقاط نقطة على أقرب طريق
+class SnapIndex:
+    def __init__(self, graph, cell_deg=0.002):
+        self.graph = graph
+        self.cell_deg = cell_deg
+        self.cells = {}
+        seen = set()
+        for u, v, _, _ in graph.edges():
+            key = (min(u, v), max(u, v))
+            if key in seen:
+                continue
+            seen.add(key)
+            lat1, lng1, lat2, lng2 = graph.lat[u], graph.lng[u], graph.lat[v], graph.lng[v]
+            for i in range(math.floor(min(lat1, lat2) / cell_deg), math.floor(max(lat1, lat2) / cell_deg) + 1):
+                for j in range(math.floor(min(lng1, lng2) / cell_deg), math.floor(max(lng1, lng2) / cell_deg) + 1):
+                    self.cells.setdefault((i, j), []).append(key)
+
+    # أقرب مقطع: (u, v, t, متر) حيث النقطة الملتقطة = u + t·(v − u)
+    def snap(self, lat, lng, max_m=500):
+        graph = self.graph
+        kx = METERS_PER_DEG * math.cos(math.radians(lat))
+        ky = METERS_PER_DEG
+        ring_m = self.cell_deg * min(kx, ky)
+        ci, cj = math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+        # المسافة من النقطة إلى أقرب حد لخليتها: كل ما خارج الحلقة r أبعد من هذا + r خلايا
+        inner = min(
+            (lat - ci * self.cell_deg) * ky, ((ci + 1) * self.cell_deg - lat) * ky,
+            (lng - cj * self.cell_deg) * kx, ((cj + 1) * self.cell_deg - lng) * kx,
+        )
+        best, best_m, seen = None, INF, set()
+        for r in range(math.ceil(max_m / ring_m) + 1):
+            for i in range(ci - r, ci + r + 1):
+                for j in range(cj - r, cj + r + 1):
+                    if max(abs(i - ci), abs(j - cj)) != r:
+                        continue
+                    for u, v in self.cells.get((i, j), ()):
+                        if (u, v) in seen:
+                            continue
+                        seen.add((u, v))
+                        ax, ay = (graph.lng[u] - lng) * kx, (graph.lat[u] - lat) * ky
+                        bx, by = (graph.lng[v] - lng) * kx, (graph.lat[v] - lat) * ky
+                        dx, dy = bx - ax, by - ay
+                        length2 = dx * dx + dy * dy
+                        t = 0.0 if length2 == 0 else min(1.0, max(0.0, -(ax * dx + ay * dy) / length2))
+                        px, py = ax + t * dx, ay + t * dy
+                        d = math.hypot(px, py)
+                        if d < best_m:
+                            best, best_m = (u, v, t), d
+            if best is not None and best_m <= inner + r * ring_m:
+                break
+        if best is None or best_m > max_m:
+            return None
+        return (*best, best_m)
+
+
+class Router:
+    def __init__(self, graph, ch=None, cell_deg=0.002):
+        self.graph = graph
+        self.ch = ch
+        self.snapper = SnapIndex(graph, cell_deg)
+
+    # من النقطة الملتقطة إلى طرفي المقطع (حسب اتجاهات السير المسموحة)
+    def _seeds(self, snap, leaving):
+        u, v, t, _ = snap
+        seeds = []
+        for a, b, share in ((u, v, t), (v, u, 1 - t)):
+            edge = self.graph.edge(a, b)
+            if edge is None:
+                continue
+            meters, seconds = edge
+            if leaving:
+                seeds.append((b, (1 - share) * seconds, (1 - share) * meters))
+            else:
+                seeds.append((a, share * seconds, share * meters))
+        return seeds
+
+    # النقطتان على نفس المقطع: السير المباشر إن كان في الاتجاه المسموح
+    def _direct(self, a, b):
+        if (a[0], a[1]) != (b[0], b[1]):
+            return None
+        u, v = a[0], a[1]
+        best = None
+        for x, y, ta, tb in ((u, v, a[2], b[2]), (v, u, 1 - a[2], 1 - b[2])):
+            edge = self.graph.edge(x, y)
+            if edge and tb >= ta:
+                candidate = ((tb - ta) * edge[1], (tb - ta) * edge[0])
+                if best is None or candidate[0] < best[0]:
+                    best = candidate
+        return best
+
+    def _query(self, sources, targets):
+        if self.ch is not None:
+            result = self.ch.query(sources, targets)
+            return None if result is None else result[:2]
+        return astar(self.graph, sources, targets)
+
+    # (كم، دقائق) على الطريق أو None إذا تعذر الالتقاط أو لا يوجد طريق
+    def route(self, a, b):
+        snap_a = self.snapper.snap(a["lat"], a["lng"])
+        snap_b = self.snapper.snap(b["lat"], b["lng"])
+        if snap_a is None or snap_b is None:
+            return None
+        best = self._query(self._seeds(snap_a, True), self._seeds(snap_b, False))
+        direct = self._direct(snap_a, snap_b)
+        if direct and (best is None or direct[0] < best[0]):
+            best = direct
+        return None if best is None else (best[1] / 1000, best[0] / 60)
+
+    # من نقطة واحدة إلى عدة نقاط، أو من عدة نقاط إلى نقطة واحدة مع reverse=True
+    def one_to_many(self, a, points, reverse=False):
+        snap_a = self.snapper.snap(a["lat"], a["lng"])
+        snaps = [self.snapper.snap(p["lat"], p["lng"]) for p in points]
+        if snap_a is None:
+            return [None] * len(points)
+        one = self._seeds(snap_a, not reverse)
+        many = [self._seeds(s, reverse) if s else [] for s in snaps]
+        if self.ch is not None:
+            raw = self.ch.one_to_many(one, many, reverse)
+        elif reverse:
+            raw = [astar(self.graph, seeds, one) if seeds else None for seeds in many]
+        else:
+            raw = [astar(self.graph, one, seeds) if seeds else None for seeds in many]
+        out = []
+        for snap, best in zip(snaps, raw):
+            direct = None
+            if snap:
+                direct = self._direct(snap, snap_a) if reverse else self._direct(snap_a, snap)
+            if direct and (best is None or direct[0] < best[0]):
+                best = direct
+            out.append(None if best is None else (best[1] / 1000, best[0] / 60))
+        return out
+
+    # السائقون إلى نقطة الانطلاق (الاتجاه مهم في الشوارع ذات الاتجاه الواحد)
+    def many_to_one(self, points, b):
+        return self.one_to_many(b, points, reverse=True)
+
+    # نقاط المسار للرسم على الخريطة
+    def path(self, a, b):
+        if self.ch is None:
+            raise RuntimeError("المسار يحتاج رسما مجهزا (build)")
+        snap_a = self.snapper.snap(a["lat"], a["lng"])
+        snap_b = self.snapper.snap(b["lat"], b["lng"])
+        if snap_a is None or snap_b is None:
+            return None
+        result = self.ch.query(self._seeds(snap_a, True), self._seeds(snap_b, False))
+        if result is None:
+            return None
+        return [{"lat": self.graph.lat[v], "lng": self.graph.lng[v]} for v in self.ch.path(result)]
+
+    # بديل calculateDistance: مسافة الطريق مقربة لرقمين، والخط المستقيم إذا تعذر الطريق
+    def distance(self, a, b):
+        found = self.route(a, b)
+        return calculate_distance(a, b) if found is None else to_fixed(found[0])
+
+    def price(self, a, b):
+        return calculate_price(self.distance(a, b))
+
+    def save(self, path):
+        save_arrays(path, {**self.graph.arrays(), **(self.ch.arrays() if self.ch else {})})
+
+    @classmethod
+    def load(cls, path):
+        arrays = load_arrays(path)
+        ch = ContractionHierarchy.from_arrays(arrays) if "rank" in arrays else None
+        return cls(RoadGraph.from_arrays(arrays), ch)
+
+
+# ملف ثنائي: سطر JSON بأسماء المصفوفات وأنواعها وأطوالها ثم بايتاتها بالترتيب
+def save_arrays(path, arrays):
+    header = [[name, column.typecode, len(column)] for name, column in arrays.items()]
+    with open(path, "wb") as f:
+        f.write(json.dumps(header).encode() + b"\n")
+        for column in arrays.values():
+            column.tofile(f)
+
+
+def load_arrays(path):
+    arrays = {}
+    with open(path, "rb") as f:
+        for name, typecode, length in json.loads(f.readline()):
+            column = array(typecode)
+            column.fromfile(f, length)
+            arrays[name] = column
+    return arrays
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="حساب المسافة والزمن على شبكة الطرق")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="تحميل ملف OSM وتجهيزه")
+    build.add_argument("osm")
+    build.add_argument("out")
+    build.add_argument("--no-ch", action="store_true", help="بدون contraction hierarchies (A* فقط)")
+    route = sub.add_parser("route", help="مسافة وزمن بين نقطتين")
+    route.add_argument("graph")
+    route.add_argument("coords", type=float, nargs=4, metavar=("LAT1", "LNG1", "LAT2", "LNG2"))
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        graph = load_osm(args.osm)
+        print(f"الرسم: {graph.n:,} عقدة، {len(graph.targets):,} حافة ({time.perf_counter() - start:.1f}s)")
+        ch = None
+        if not args.no_ch:
+            start = time.perf_counter()
+            ch = ContractionHierarchy.build(graph, progress=lambda done, n: print(f"  {done:,}/{n:,}"))
+            print(f"التجهيز: {len(ch.up[1]) + len(ch.down[1]):,} حافة صاعدة ({time.perf_counter() - start:.1f}s)")
+        Router(graph, ch).save(args.out)
+        print(f"تم الحفظ في {args.out}")
+    else:
+        router = Router.load(args.graph)
+        lat1, lng1, lat2, lng2 = args.coords
+        a, b = {"lat": lat1, "lng": lng1}, {"lat": lat2, "lng": lng2}
+        found = router.route(a, b)
+        straight = calculate_distance(a, b)
+        if found is None:
+            print(f"لا يوجد طريق (خط مستقيم {straight} كم)")
+        else:
+            print(f"الطريق: {found[0]:.2f} كم، {found[1]:.1f} دقيقة (خط مستقيم {straight} كم)، السعر {router.price(a, b)} جنيه")
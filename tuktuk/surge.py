@@ -0,0 +1,190 @@
+import math
+import time
+from collections import deque
+
+from .broadcast import CELL_DEG, cell_of
+from .geo import _require_numpy, batch_distance, batch_price, calculate_distance, calculate_price, np
+
+# التسعير الديناميكي: لكل خلية جغرافية عدد الطلبات في نافذة منزلقة (مع الطلبات التي ما زالت معلقة)
+# مقابل عدد السائقين المتاحين الآن، في الخلية وجيرانها. كل حدث يعيد حساب معامل الخلايا التسع
+# المتأثرة فقط بدلا من مسح الجداول، والسعر النهائي = ceil(calculatePrice(المسافة) × المعامل)
+
+WINDOW = 300  # ثوان
+THRESHOLD = 1.0  # طلب لكل سائق في النافذة قبل بدء الزيادة
+SENSITIVITY = 0.5
+MAX_SURGE = 3.0
+STEP = 0.1  # تقريب المعامل حتى لا يتغير السعر مع كل حدث صغير
+
+
+def surge_multiplier(demand, supply):
+    ratio = demand / (supply + 1)
+    raw = 1 + SENSITIVITY * (ratio - THRESHOLD)
+    return min(MAX_SURGE, max(1.0, math.floor(raw / STEP + 1e-9) * STEP))
+
+
+class SurgeGrid:
+    def __init__(self, cell_deg=CELL_DEG, window=WINDOW, clock=time.time, distance=None):
+        self.cell_deg = cell_deg
+        self.window = window
+        self.clock = clock
+        # مسافة الطريق (مثلا RouteCache.distance)؛ بدونها الخط المستقيم مثل calculateDistance
+        self.distance = distance
+        self.demand = {}
+        self.supply = {}
+        self.multipliers = {}
+        self._drivers = {}
+        self._rides = {}
+        self._window = deque()
+        self.counters = {"events": 0, "cells_updated": 0, "quotes": 0}
+
+    def _cell(self, lat, lng):
+        return cell_of(lat, lng, self.cell_deg)
+
+    def _bump(self, counts, cell, delta):
+        value = counts.get(cell, 0) + delta
+        if value:
+            counts[cell] = value
+        else:
+            counts.pop(cell, None)
+
+    # إعادة حساب معاملات الخلية وجيرانها فقط (كل خلية تنظر إلى 3×3 حولها):
+    # نقرأ مربع 5×5 مرة واحدة ونجمع منه التسع
+    def _touch(self, cell):
+        ci, cj = cell
+        demand_get, supply_get = self.demand.get, self.supply.get
+        block = [
+            [(demand_get((i, j), 0), supply_get((i, j), 0)) for j in range(cj - 2, cj + 3)]
+            for i in range(ci - 2, ci + 3)
+        ]
+        for a in range(3):
+            for b in range(3):
+                demand = supply = 0
+                for row in block[a:a + 3]:
+                    for d, s in row[b:b + 3]:
+                        demand += d
+                        supply += s
+                key = (ci + a - 1, cj + b - 1)
+                value = surge_multiplier(demand, supply) if demand else 1.0
+                if value > 1.0:
+                    self.multipliers[key] = value
+                else:
+                    self.multipliers.pop(key, None)
+        self.counters["cells_updated"] += 9
+
+    # نفس قاعدة DriverIndex.sync: المتاح بموقع يحسب، غيره يخرج
+    def driver(self, row):
+        self.counters["events"] += 1
+        before = self._drivers.pop(row["id"], None)
+        after = None
+        if row.get("status") == "available" and row.get("location"):
+            after = self._cell(row["location"]["lat"], row["location"]["lng"])
+            self._drivers[row["id"]] = after
+        if before == after:
+            return
+        if before is not None:
+            self._bump(self.supply, before, -1)
+            self._touch(before)
+        if after is not None:
+            self._bump(self.supply, after, 1)
+            self._touch(after)
+
+    def ride_requested(self, ride, ts=None):
+        self.advance()
+        if ride["id"] in self._rides:
+            return
+        self.counters["events"] += 1
+        cell = self._cell(ride["pickup"]["lat"], ride["pickup"]["lng"])
+        ts = self.clock() if ts is None else ts
+        # [الخلية، مفتوحة؟، داخل النافذة؟]
+        self._rides[ride["id"]] = [cell, True, True]
+        self._window.append((ts, ride["id"]))
+        self._bump(self.demand, cell, 1)
+        self._touch(cell)
+
+    # قبول أو إلغاء أو انتهاء: الطلب يبقى محسوبا حتى يخرج من النافذة
+    def ride_closed(self, ride_id):
+        self.counters["events"] += 1
+        entry = self._rides.get(ride_id)
+        if entry is None or not entry[1]:
+            return
+        entry[1] = False
+        if not entry[2]:
+            del self._rides[ride_id]
+            self._bump(self.demand, entry[0], -1)
+            self._touch(entry[0])
+        self.advance()
+
+    def advance(self):
+        horizon = self.clock() - self.window
+        while self._window and self._window[0][0] <= horizon:
+            _, ride_id = self._window.popleft()
+            entry = self._rides.get(ride_id)
+            if entry is None:
+                continue
+            entry[2] = False
+            # الطلب الذي ما زال معلقا يبقى طلبا قائما حتى يغلق
+            if not entry[1]:
+                del self._rides[ride_id]
+                self._bump(self.demand, entry[0], -1)
+                self._touch(entry[0])
+
+    # حدث postgres_changes من جدول drivers أو rides
+    def apply(self, change):
+        row = change.get("new") or {}
+        # الحذف يصل بـ new فارغ و old فيه المفتاح فقط: السائق يخرج والرحلة تغلق
+        if change.get("eventType") == "DELETE":
+            row = {"id": (change.get("old") or {}).get("id")}
+        if change.get("table") == "drivers":
+            self.driver(row)
+        elif row.get("status") == "pending":
+            self.ride_requested(row)
+        elif row.get("id"):
+            self.ride_closed(row["id"])
+
+    # بدون طريق معروف نعود للخط المستقيم حتى لا يفشل العرض
+    def _distance(self, a, b):
+        distance = self.distance(a, b) if self.distance is not None else None
+        return calculate_distance(a, b) if distance is None else distance
+
+    def multiplier(self, lat, lng):
+        return self.multipliers.get(self._cell(lat, lng), 1.0)
+
+    def quote(self, pickup, destination):
+        self.advance()
+        self.counters["quotes"] += 1
+        distance = self._distance(pickup, destination)
+        base = calculate_price(distance)
+        surge = self.multiplier(pickup["lat"], pickup["lng"])
+        return {"distance": distance, "base_price": base, "surge": surge, "price": math.ceil(base * surge - 1e-9)}
+
+    # آلاف العروض دفعة واحدة: مصفوفات numpy للمسافة والسعر الأساسي والمعامل والسعر
+    def quote_batch(self, pickup_lat, pickup_lng, dest_lat, dest_lng):
+        _require_numpy()
+        self.advance()
+        pickup_lat, pickup_lng = np.asarray(pickup_lat, dtype=np.float64), np.asarray(pickup_lng, dtype=np.float64)
+        dest_lat, dest_lng = np.asarray(dest_lat, dtype=np.float64), np.asarray(dest_lng, dtype=np.float64)
+        self.counters["quotes"] += len(pickup_lat)
+        if self.distance is None:
+            distance = batch_distance(pickup_lat, pickup_lng, dest_lat, dest_lng)
+        else:
+            distance = np.array([
+                self._distance({"lat": a, "lng": b}, {"lat": c, "lng": d})
+                for a, b, c, d in zip(pickup_lat.tolist(), pickup_lng.tolist(), dest_lat.tolist(), dest_lng.tolist())
+            ], dtype=np.float64)
+        base = batch_price(distance)
+        surge = np.ones(len(pickup_lat))
+        if self.multipliers:
+            rows = np.floor(pickup_lat / self.cell_deg).astype(np.int64).tolist()
+            cols = np.floor(pickup_lng / self.cell_deg).astype(np.int64).tolist()
+            get = self.multipliers.get
+            surge = np.array([get(cell, 1.0) for cell in zip(rows, cols)])
+        return distance, base, surge, np.ceil(base * surge - 1e-9)
+
+    def metrics(self):
+        return {
+            **self.counters,
+            "open_rides": sum(1 for entry in self._rides.values() if entry[1]),
+            "available_drivers": len(self._drivers),
+            "surging_cells": len(self.multipliers),
+            "max_surge": max(self.multipliers.values(), default=1.0),
+        }
@@ -0,0 +1,267 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from . import httpd
+from .heatmap import tiles_in_bbox
+
+# مخزن محلي لبلاطات الخريطة بصيغة MBTiles (SQLite) مع خادم صغير لها، بدل تحميل نفس بلاطات
+# المدينة من tile.openstreetmap.org في كل جلسة وعلى اتصالات السائقين الضعيفة.
+#   prefetch: يملأ المخزن لمستطيل منطقة الخدمة ومدى تكبير من مصدر محلي (مجلد z/x/y.png أو خادم بلاطات خاص؛
+#             سياسة OSM تمنع التحميل الجماعي من خوادمها)
+#   الخادم:   GET /{z}/{x}/{y}.png مع ETag و Cache-Control immutable، و 304 عند If-None-Match
+# الواجهة تشير إليه عبر VITE_TILE_URL=http://127.0.0.1:8790/{z}/{x}/{y}.png
+
+SERVICE_AREA = (29.90, 31.10, 30.20, 31.45)  # القاهرة الكبرى: min_lat, min_lng, max_lat, max_lng
+ZOOMS = (10, 16)
+MAX_AGE = 7 * 86400
+BATCH = 500
+MAX_TILE_ZOOM = 22
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row);
+"""
+
+
+# MBTiles يرقم الصفوف من الجنوب (TMS) بينما Leaflet من الشمال (XYZ)
+def _tms_row(z, y):
+    return (1 << z) - 1 - y
+
+
+def etag_of(data):
+    return '"' + hashlib.blake2b(data, digest_size=8).hexdigest() + '"'
+
+
+class TileStore:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+
+    def get(self, z, x, y):
+        row = self.conn.execute(
+            "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+            (z, x, _tms_row(z, y)),
+        ).fetchone()
+        return row[0] if row else None
+
+    def has_many(self, z, keys):
+        rows = self.conn.execute("SELECT tile_column, tile_row FROM tiles WHERE zoom_level = ?", (z,))
+        existing = {(x, _tms_row(z, row)) for x, row in rows}
+        return existing & set(keys)
+
+    # tiles: [(z, x, y, data)] في معاملة واحدة
+    def put_many(self, tiles):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)",
+                [(z, x, _tms_row(z, y), data) for z, x, y, data in tiles],
+            )
+
+    def put(self, z, x, y, data):
+        self.put_many([(z, x, y, data)])
+
+    def set_metadata(self, **values):
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)", values.items())
+
+    def metadata(self):
+        return dict(self.conn.execute("SELECT name, value FROM metadata"))
+
+    def close(self):
+        self.conn.close()
+
+
+# مصادر البلاطات: دالة (z, x, y) ترجع البايتات أو None
+def directory_source(root, suffix=".png"):
+    def fetch(z, x, y):
+        path = os.path.join(root, str(z), str(x), f"{y}{suffix}")
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    return fetch
+
+
+def url_source(template, timeout=10):
+    headers = {"User-Agent": "tuktuk-tiles/1.0"}
+
+    def fetch(z, x, y):
+        request = urllib.request.Request(template.format(z=z, x=x, y=y), headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    return fetch
+
+
+# ملء المخزن لكل البلاطات التي تغطي bbox من zooms[0] إلى zooms[1]؛ الموجود يتخطى.
+# خطأ شبكة أو خادم في بلاطة يحسب في errors ولا يوقف الملء، وتشغيل prefetch مرة أخرى يعيد المحاولة
+def prefetch(store, source, bbox=SERVICE_AREA, zooms=ZOOMS, workers=8, progress=None):
+    counters = {"planned": 0, "skipped": 0, "fetched": 0, "missing": 0, "errors": 0, "bytes": 0}
+
+    def fetch(z, key):
+        try:
+            return source(z, *key)
+        except OSError as e:  # URLError و HTTPError و timeout كلها OSError
+            return e
+
+    min_zoom, max_zoom = zooms
+    with ThreadPoolExecutor(workers) as pool:
+        for z in range(min_zoom, max_zoom + 1):
+            keys = tiles_in_bbox(*bbox, z)
+            existing = store.has_many(z, keys)
+            counters["planned"] += len(keys)
+            counters["skipped"] += len(existing)
+            todo = [key for key in keys if key not in existing]
+            for start in range(0, len(todo), BATCH):
+                chunk = todo[start:start + BATCH]
+                found = []
+                for (x, y), data in zip(chunk, pool.map(lambda key: fetch(z, key), chunk)):
+                    if data is None:
+                        counters["missing"] += 1
+                    elif isinstance(data, OSError):
+                        counters["errors"] += 1
+                    else:
+                        found.append((z, x, y, data))
+                        counters["bytes"] += len(data)
+                store.put_many(found)
+                counters["fetched"] += len(found)
+                if progress:
+                    progress(z, counters)
+    store.set_metadata(
+        name="tuktuk", format="png", minzoom=str(min_zoom), maxzoom=str(max_zoom),
+        bounds=",".join(str(v) for v in (bbox[1], bbox[0], bbox[3], bbox[2])),
+    )
+    return counters
+
+
+class TileServer:
+    def __init__(self, store, upstream=None, max_age=MAX_AGE):
+        self.store = store
+        # مصدر اختياري للبلاطات غير الموجودة (تحفظ بعد أول طلب)
+        self.upstream = upstream
+        self.max_age = max_age
+        self._etags = {}
+        self._started = time.time()
+        self.counters = {"requests": 0, "hits": 0, "not_modified": 0, "misses": 0, "upstream": 0, "upstream_errors": 0, "bytes_served": 0}
+
+    # ترجع (الحالة، الترويسات، البايتات)
+    async def tile(self, z, x, y, if_none_match=None):
+        self.counters["requests"] += 1
+        key = (z, x, y)
+        etag = self._etags.get(key)
+        if etag is not None and if_none_match == etag:
+            self.counters["not_modified"] += 1
+            return "304 Not Modified", self._headers(etag), b""
+        data = self.store.get(z, x, y)
+        outcome = "hits"
+        if data is None and self.upstream is not None:
+            try:
+                data = await asyncio.to_thread(self.upstream, z, x, y)
+            except OSError:
+                self.counters["upstream_errors"] += 1
+                return "502 Bad Gateway", {"Cache-Control": "no-store"}, b""
+            if data is not None:
+                outcome = "upstream"
+                self.store.put(z, x, y, data)
+        if data is None:
+            self.counters["misses"] += 1
+            return "404 Not Found", {"Cache-Control": "no-store"}, b""
+        etag = self._etags[key] = etag_of(data)
+        if if_none_match == etag:
+            self.counters["not_modified"] += 1
+            return "304 Not Modified", self._headers(etag), b""
+        self.counters[outcome] += 1
+        self.counters["bytes_served"] += len(data)
+        return "200 OK", {**self._headers(etag), "Content-Type": "image/png"}, data
+
+    def _headers(self, etag):
+        return {"ETag": etag, "Cache-Control": f"public, max-age={self.max_age}, immutable"}
+
+    def metrics(self):
+        # الإصابة = رد من المخزن أو 304، بدون ما جلب من المصدر عند الطلب
+        served = self.counters["hits"] + self.counters["not_modified"]
+        return {
+            **self.counters,
+            "hit_rate": served / self.counters["requests"] if self.counters["requests"] else 0.0,
+            "bytes_per_s": self.counters["bytes_served"] / max(time.time() - self._started, 1e-9),
+        }
+
+
+def _parse_tile(path):
+    parts = path.strip("/").split("/")
+    if len(parts) != 3:
+        return None
+    try:
+        return int(parts[0]), int(parts[1]), int(parts[2].split(".")[0])
+    except ValueError:
+        return None
+
+
+def _valid_tile(z, x, y):
+    return 0 <= z <= MAX_TILE_ZOOM and 0 <= x < (1 << z) and 0 <= y < (1 << z)
+
+
+# GET /{z}/{x}/{y}.png و GET /metrics
+def routes(server):
+    async def respond(request):
+        path = request.target.split("?")[0]
+        if request.method == "GET" and path == "/metrics":
+            return "200 OK", {"Content-Type": "application/json"}, json.dumps(server.metrics()).encode()
+        key = _parse_tile(path) if request.method == "GET" else None
+        if key is None:
+            return "404 Not Found", {}, b""
+        if not _valid_tile(*key):
+            message = f"z بين 0 و {MAX_TILE_ZOOM}، x و y بين 0 و 2^z - 1"
+            return "400 Bad Request", {"Content-Type": "text/plain; charset=utf-8"}, message.encode()
+        return await server.tile(*key, request.headers.get("if-none-match"))
+
+    return respond
+
+
+async def serve(server, host="127.0.0.1", port=8790):
+    await httpd.serve(routes(server), host, port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="مخزن وخادم بلاطات الخريطة (MBTiles)")
+    parser.add_argument("mbtiles", help="ملف MBTiles (ينشأ إن لم يوجد)")
+    parser.add_argument("--prefetch", metavar="SOURCE", help="مجلد z/x/y.png أو قالب رابط http://.../{z}/{x}/{y}.png")
+    parser.add_argument("--bbox", nargs=4, type=float, default=SERVICE_AREA, metavar=("MIN_LAT", "MIN_LNG", "MAX_LAT", "MAX_LNG"))
+    parser.add_argument("--zooms", nargs=2, type=int, default=ZOOMS, metavar=("MIN", "MAX"))
+    parser.add_argument("--upstream", help="قالب رابط لجلب البلاطات الناقصة عند الطلب")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--max-age", type=int, default=MAX_AGE, help="مدة التخزين في المتصفح بالثواني")
+    args = parser.parse_args()
+
+    store = TileStore(args.mbtiles)
+    if args.prefetch:
+        source = url_source(args.prefetch) if "://" in args.prefetch else directory_source(args.prefetch)
+        result = prefetch(store, source, args.bbox, args.zooms,
+                          progress=lambda z, c: print(f"z{z}: {c['fetched']:,} جديدة، {c['skipped']:,} موجودة"))
+        print(f"تم: {result}")
+    else:
+        upstream = url_source(args.upstream) if args.upstream else None
+        print(f"{len(store):,} بلاطة على http://{args.host}:{args.port}/{{z}}/{{x}}/{{y}}.png")
+        asyncio.run(serve(TileServer(store, upstream, args.max_age), args.host, args.port))
@@ -0,0 +1,339 @@
+import argparse
+import bisect
+import itertools
+import mmap
+import os
+import struct
+
+from .geo import np
+
+# مخزن مسارات السائقين (append-only): كل نبضة موقع تحفظ بدل أن تستبدل drivers.location.
+# النقاط تجمع في كتل لكل سائق؛ داخل الكتلة الفروق (الزمن، خط العرض، خط الطول) بعد zigzag + varint،
+# فالنبضة كل 10 ثوان تأخذ ~5 بايت بدل 24. الكتل تكتب في ملفات segments تقرأ عبر mmap،
+# ولكل كتلة في الذاكرة: المدى الزمني والمستطيل المحيط، فاستعلام الزمن أو المنطقة يفك الكتل المتقاطعة فقط
+
+SCALE = 1_000_000  # 1e-6 درجة (~11 سم)
+BLOCK_POINTS = 256
+BLOCK_SECONDS = 900  # كتلة لا تبقى مفتوحة أكثر من ربع ساعة
+SEGMENT_BYTES = 64 << 20
+SEGMENT_SUFFIX = ".trj"
+TIME_BUCKET = 3600  # فهرس زمني للكتل بالساعة حسب أول زمن
+
+# magic, طول المعرف, عدد النقاط, طول البيانات, أول زمن, آخر زمن, المستطيل (min_lat, max_lat, min_lng, max_lng)
+HEADER = struct.Struct("<2sBHIqqiiii")
+MAGIC = b"TB"
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _put_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _varints(payload):
+    values, value, shift = [], 0, 0
+    for byte in payload:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append((value >> 1) ^ -(value & 1))
+            value = shift = 0
+    return values
+
+
+# نفس الفك متجها: نهاية كل varint بايت أقل من 0x80، ومجموع أجزائه reduceat
+def _varints_np(payload):
+    data = np.frombuffer(payload, dtype=np.uint8)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    position = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    parts = (data & 0x7F).astype(np.int64) << (7 * position)
+    values = np.add.reduceat(parts, starts)
+    return (values >> 1) ^ -(values & 1)
+
+
+# (الأزمنة، خطوط العرض، خطوط الطول): مصفوفات numpy إن وجدت وإلا قوائم
+def decode_block(payload, t_first):
+    if np is not None:
+        points = np.cumsum(_varints_np(payload).reshape(-1, 3), axis=0)
+        return points[:, 0] + t_first, points[:, 1] / SCALE, points[:, 2] / SCALE
+    values = _varints(payload)
+    times = list(itertools.accumulate(values[0::3], initial=t_first))[1:]
+    lats = [v / SCALE for v in itertools.accumulate(values[1::3])]
+    lngs = [v / SCALE for v in itertools.accumulate(values[2::3])]
+    return times, lats, lngs
+
+
+# النقاط داخل المدى الزمني (والمستطيل إن وجد) كقائمة (زمن، lat، lng)
+def select_points(points, start, end, box=None):
+    times, lats, lngs = points
+    if np is not None and isinstance(times, np.ndarray):
+        mask = (times >= start) & (times <= end)
+        if box is not None:
+            mask &= (lats >= box[0]) & (lats <= box[2]) & (lngs >= box[1]) & (lngs <= box[3])
+        return list(zip(times[mask].tolist(), lats[mask].tolist(), lngs[mask].tolist()))
+    return [
+        (t, lat, lng) for t, lat, lng in zip(times, lats, lngs)
+        if start <= t <= end and (box is None or (box[0] <= lat <= box[2] and box[1] <= lng <= box[3]))
+    ]
+
+
+# كتلة مفتوحة لسائق واحد: تكتب الفروق فور وصول النقطة
+class _OpenBlock:
+    __slots__ = ("payload", "count", "t_first", "t", "lat", "lng", "bbox")
+
+    def __init__(self, t):
+        self.payload = bytearray()
+        self.count = 0
+        self.t_first = self.t = t
+        self.lat = self.lng = 0
+        self.bbox = [2**31 - 1, -(2**31), 2**31 - 1, -(2**31)]
+
+    def add(self, t, lat, lng):
+        _put_varint(self.payload, _zigzag(t - self.t))
+        _put_varint(self.payload, _zigzag(lat - self.lat))
+        _put_varint(self.payload, _zigzag(lng - self.lng))
+        self.t, self.lat, self.lng = t, lat, lng
+        self.count += 1
+        bbox = self.bbox
+        if lat < bbox[0]:
+            bbox[0] = lat
+        if lat > bbox[1]:
+            bbox[1] = lat
+        if lng < bbox[2]:
+            bbox[2] = lng
+        if lng > bbox[3]:
+            bbox[3] = lng
+
+
+class TrajectoryStore:
+    def __init__(self, directory, block_points=BLOCK_POINTS, block_seconds=BLOCK_SECONDS, segment_bytes=SEGMENT_BYTES):
+        self.directory = directory
+        self.block_points = block_points
+        self.block_seconds = block_seconds
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._open = {}
+        self._last = {}
+        # فهرس الكتل المكتوبة: (أول زمن، آخر زمن، segment، الإزاحة، الطول، العدد، المستطيل، السائق)
+        self._blocks = []
+        self._by_driver = {}
+        self._by_hour = {}
+        self._span = 0
+        self._maps = {}
+        self._segment = None
+        self._file = None
+        self.counters = {"points": 0, "dropped_out_of_order": 0, "blocks": 0, "sealed_points": 0, "bytes": 0}
+        self._recover()
+
+    # ---------- الكتابة ----------
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{number:06d}{SEGMENT_SUFFIX}")
+
+    def _segments(self):
+        return sorted(int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX))
+
+    # إعادة بناء الفهرس من ملفات segments؛ كتلة ناقصة في آخر ملف (توقف أثناء الكتابة) تقص
+    def _recover(self):
+        segments = self._segments()
+        for number in segments:
+            path = self._segment_path(number)
+            with open(path, "rb") as f:
+                data = f.read()
+            offset = 0
+            while offset + HEADER.size <= len(data):
+                magic, id_len, count, length, t_first, t_last, *bbox = HEADER.unpack_from(data, offset)
+                end = offset + HEADER.size + id_len + length
+                if magic != MAGIC or end > len(data):
+                    break
+                driver_id = data[offset + HEADER.size:offset + HEADER.size + id_len].decode()
+                self._index(driver_id, (t_first, t_last, number, offset, end - offset, count, tuple(bbox)))
+                self.counters["points"] += count
+                self._last[driver_id] = max(self._last.get(driver_id, t_last), t_last)
+                offset = end
+            if offset < len(data):
+                with open(path, "r+b") as f:
+                    f.truncate(offset)
+        self._segment = segments[-1] if segments else 0
+
+    def _index(self, driver_id, entry):
+        entry = (*entry, driver_id)
+        self._blocks.append(entry)
+        blocks = self._by_driver.setdefault(driver_id, [])
+        # الكتل تصل بترتيب الزمن لكل سائق إلا نادرا
+        if blocks and blocks[-1][0] > entry[0]:
+            bisect.insort(blocks, entry)
+        else:
+            blocks.append(entry)
+        self._by_hour.setdefault(entry[0] // TIME_BUCKET, []).append(entry)
+        self._span = max(self._span, entry[1] - entry[0])
+        self.counters["blocks"] += 1
+        self.counters["sealed_points"] += entry[5]
+        self.counters["bytes"] += entry[4]
+
+    def _writer(self, size):
+        if self._file is not None and 0 < self._file.tell() and self._file.tell() + size > self.segment_bytes:
+            self._file.close()
+            self._file = None
+            self._segment += 1
+        if self._file is None:
+            self._segment = max(self._segment, 1)
+            self._file = open(self._segment_path(self._segment), "ab")
+        return self._file
+
+    def _seal(self, driver_id):
+        block = self._open.pop(driver_id, None)
+        if block is None or not block.count:
+            return
+        key = driver_id.encode()
+        header = HEADER.pack(MAGIC, len(key), block.count, len(block.payload), block.t_first, block.t, *block.bbox)
+        record = header + key + block.payload
+        f = self._writer(len(record))
+        offset = f.tell()
+        f.write(record)
+        self._index(driver_id, (block.t_first, block.t, self._segment, offset, len(record), block.count, tuple(block.bbox)))
+
+    # ts بالثواني؛ النبضة الأقدم من آخر نبضة لنفس السائق ترفض (نفس قاعدة LocationIngest)
+    def append(self, driver_id, lat, lng, ts):
+        t = int(ts)
+        if t < self._last.get(driver_id, -(2**62)):
+            self.counters["dropped_out_of_order"] += 1
+            return False
+        self._last[driver_id] = t
+        block = self._open.get(driver_id)
+        if block is not None and (block.count >= self.block_points or t - block.t_first >= self.block_seconds):
+            self._seal(driver_id)
+            block = None
+        if block is None:
+            block = self._open[driver_id] = _OpenBlock(t)
+        block.add(t, round(lat * SCALE), round(lng * SCALE))
+        self.counters["points"] += 1
+        return True
+
+    def append_many(self, pings):
+        return sum(self.append(p["id"], p["location"]["lat"], p["location"]["lng"], p["ts"]) for p in pings)
+
+    # كتابة الكتل التي لم تصلها نقاط منذ block_seconds (السائق توقف)
+    def seal_idle(self, now):
+        idle = [d for d, block in self._open.items() if now - block.t >= self.block_seconds]
+        for driver_id in idle:
+            self._seal(driver_id)
+        if self._file is not None:
+            self._file.flush()
+            if idle:
+                os.fsync(self._file.fileno())
+
+    def flush(self):
+        for driver_id in list(self._open):
+            self._seal(driver_id)
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for m in self._maps.values():
+            m.close()
+        self._maps = {}
+
+    # ---------- القراءة ----------
+    def _read(self, segment, offset, length):
+        m = self._maps.get(segment)
+        if m is None or offset + length > len(m):
+            if m is not None:
+                m.close()
+            if segment == self._segment and self._file is not None:
+                self._file.flush()
+            with open(self._segment_path(segment), "rb") as f:
+                m = self._maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return m[offset + HEADER.size + m[offset + 2]:offset + length]
+
+    def _decode(self, entry):
+        return decode_block(self._read(*entry[2:5]), entry[0])
+
+    def _open_points(self, driver_id):
+        block = self._open.get(driver_id)
+        if block is None or not block.count:
+            return [], [], []
+        return decode_block(bytes(block.payload), block.t_first)
+
+    # مسار سائق واحد بين start و end (شاملة): قائمة (زمن، lat، lng)
+    def track(self, driver_id, start=None, end=None):
+        start = -(2**62) if start is None else start
+        end = 2**62 if end is None else end
+        points = []
+        blocks = self._by_driver.get(driver_id, [])
+        # الكتل مرتبة بأول زمن: نبدأ من أول كتلة قد تحتوي start
+        first = max(0, bisect.bisect_right(blocks, (start,)) - 1)
+        for entry in blocks[first:]:
+            if entry[0] > end:
+                break
+            if entry[1] >= start:
+                points += select_points(self._decode(entry), start, end)
+        return points + select_points(self._open_points(driver_id), start, end)
+
+    # الكتل التي قد تتقاطع مع المدى: الساعات من (start - أطول كتلة) حتى end، أو كل الكتل لمدى مفتوح
+    def _candidates(self, start, end):
+        first, last = (start - self._span) // TIME_BUCKET, end // TIME_BUCKET
+        if last - first >= len(self._by_hour):
+            return self._blocks
+        return itertools.chain.from_iterable(self._by_hour.get(hour, ()) for hour in range(first, last + 1))
+
+    # كل النقاط داخل المستطيل والمدى الزمني: (السائق، زمن، lat، lng)
+    def within(self, min_lat, min_lng, max_lat, max_lng, start=None, end=None):
+        start = -(2**62) if start is None else start
+        end = 2**62 if end is None else end
+        box = (min_lat, min_lng, max_lat, max_lng)
+        lo_lat, hi_lat = round(min_lat * SCALE), round(max_lat * SCALE)
+        lo_lng, hi_lng = round(min_lng * SCALE), round(max_lng * SCALE)
+        for entry in self._candidates(start, end):
+            t_first, t_last, bbox, driver_id = entry[0], entry[1], entry[6], entry[7]
+            if t_first > end or t_last < start or bbox[0] > hi_lat or bbox[1] < lo_lat or bbox[2] > hi_lng or bbox[3] < lo_lng:
+                continue
+            for t, lat, lng in select_points(self._decode(entry), start, end, box):
+                yield driver_id, t, lat, lng
+        for driver_id in list(self._open):
+            for t, lat, lng in select_points(self._open_points(driver_id), start, end, box):
+                yield driver_id, t, lat, lng
+
+    def metrics(self):
+        stored = self.counters["sealed_points"]
+        return {
+            **self.counters,
+            "open_blocks": len(self._open),
+            "drivers": len(self._last),
+            "segments": len(self._segments()),
+            # مقارنة بتخزين (زمن int64، lat float64، lng float64) لكل نقطة
+            "bytes_per_point": self.counters["bytes"] / stored if stored else 0.0,
+            "compression_ratio": 24 * stored / self.counters["bytes"] if self.counters["bytes"] else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="استعلام مخزن مسارات السائقين")
+    parser.add_argument("directory")
+    parser.add_argument("--driver", help="مسار سائق واحد")
+    parser.add_argument("--bbox", nargs=4, type=float, metavar=("MIN_LAT", "MIN_LNG", "MAX_LAT", "MAX_LNG"))
+    parser.add_argument("--start", type=int)
+    parser.add_argument("--end", type=int)
+    args = parser.parse_args()
+
+    store = TrajectoryStore(args.directory)
+    print(store.metrics())
+    if args.driver:
+        for t, lat, lng in store.track(args.driver, args.start, args.end):
+            print(t, lat, lng)
+    elif args.bbox:
+        for driver_id, t, lat, lng in store.within(*args.bbox, args.start, args.end):
+            print(driver_id, t, lat, lng)
@@ -0,0 +1,53 @@
+/// <reference types="vite/client" />
+import L from 'leaflet';
+import { Driver, GeoLocation } from '../types';
+
+// Server-side driver clustering. Keep in sync with tuktuk/clusters.py
+// The service keeps per-zoom cluster cells up to date as drivers move, so the map asks
+// for its bounding box and draws a few dozen markers instead of one per driver.
+// Run it with `python -m tuktuk.clusters` and set VITE_CLUSTERS_URL=http://127.0.0.1:8789
+export const CLUSTERS_URL: string | undefined = import.meta.env.VITE_CLUSTERS_URL;
+
+export interface DriverCluster extends GeoLocation {
+  count: number;
+}
+
+export type DriverPoint = Pick<Driver, 'id' | 'name' | 'rating' | 'location'>;
+
+export interface ClusterView {
+  z: number;
+  version: number;
+  clusters: DriverCluster[];
+  points: DriverPoint[];
+}
+
+export const fetchClusters = async (
+  zoom: number,
+  [minLat, minLng, maxLat, maxLng]: [number, number, number, number],
+): Promise<ClusterView | null> => {
+  if (!CLUSTERS_URL) return null;
+  const bbox = [minLat, minLng, maxLat, maxLng].map(v => v.toFixed(5)).join(',');
+  const response = await fetch(`${CLUSTERS_URL}/clusters?z=${Math.round(zoom)}&bbox=${bbox}`);
+  if (!response.ok) throw new Error(`clusters ${response.status}`);
+  return response.json();
+};
+
+// One icon per size bucket and label, reused across refreshes
+const icons = new Map<string, L.DivIcon>();
+
+export const clusterIcon = (count: number): L.DivIcon => {
+  const label = count >= 1000 ? `${Math.floor(count / 1000)}k` : String(count);
+  const size = count < 10 ? 30 : count < 100 ? 36 : 44;
+  const key = `${label}:${size}`;
+  let icon = icons.get(key);
+  if (!icon) {
+    icon = new L.DivIcon({
+      className: 'custom-icon',
+      html: `<div style="background-color: #FFD700; border: 2px solid black; border-radius: 50%; width: ${size}px; height: ${size}px; display: flex; align-items: center; justify-content: center; font-weight: bold; color: black; box-shadow: 0 2px 5px rgba(0,0,0,0.5);">🛺${label}</div>`,
+      iconSize: [size, size],
+      iconAnchor: [size / 2, size / 2],
+    });
+    icons.set(key, icon);
+  }
+  return icon;
+};
\ No newline at end of file
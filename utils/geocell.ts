@@ -0,0 +1,38 @@
+import { GeoLocation, Ride } from '../types';
+import { supabase } from '../services/supabase';
+
+// Geo-partitioned ride broadcast. Keep in sync with tuktuk/broadcast.py
+export const CELL_DEG = 0.02; // ~2.2 km
+export const NEIGHBOUR_RING = 1; // 3x3 channels per driver
+
+export const cellOf = (loc: GeoLocation): [number, number] => [
+  Math.floor(loc.lat / CELL_DEG),
+  Math.floor(loc.lng / CELL_DEG),
+];
+
+export const cellKey = (loc: GeoLocation): string => cellOf(loc).join(':');
+
+export const channelName = ([i, j]: [number, number]): string => `rides:cell:${i}:${j}`;
+
+// A driver listens on its own cell plus the neighbouring ones
+export const neighbourChannels = (loc: GeoLocation, ring = NEIGHBOUR_RING): string[] => {
+  const [ci, cj] = cellOf(loc);
+  const names: string[] = [];
+  for (let i = ci - ring; i <= ci + ring; i++) {
+    for (let j = cj - ring; j <= cj + ring; j++) {
+      names.push(channelName([i, j]));
+    }
+  }
+  return names;
+};
+
+// A pending ride goes only to the channel of its pickup cell; the channel is removed once
+// the message is sent so repeated requests in one session don't pile up channels
+export const broadcastRide = async (ride: Ride) => {
+  const channel = supabase.channel(channelName(cellOf(ride.pickup)));
+  try {
+    return await channel.send({ type: 'broadcast', event: 'ride', payload: ride });
+  } finally {
+    supabase.removeChannel(channel);
+  }
+};
\ No newline at end of file
@@ -1,8 +1,11 @@
 import React, { useState, useEffect } from 'react';
 import { Driver, Ride } from '../types';
-import { supabase, RIDES_TABLE, DRIVERS_TABLE, USERS_TABLE } from '../services/supabase';
+import { supabase, RIDES_TABLE, DRIVERS_TABLE } from '../services/supabase';
 import { Navigation, MapPin, Check, X, Phone } from 'lucide-react';
 import { calculateDistance } from '../utils/geo';
+import { cellKey, neighbourChannels } from '../utils/geocell';
+import { userProfiles, useProfile } from '../utils/profileCache';
+import { transitionRide } from '../utils/rideState';
 
 interface DriverDashboardProps {
   driver: Driver;
@@ -12,7 +15,9 @@ const DriverDashboard: React.FC<DriverDashboardProps> = ({ driver }) => {
   const [isOnline, setIsOnline] = useState(driver.status === 'available');
   const [incomingRide, setIncomingRide] = useState<Ride | null>(null);
   const [currentRide, setCurrentRide] = useState<Ride | null>(null);
-  const [passengerName, setPassengerName] = useState('');
+  const [location, setLocation] = useState(driver.location);
+  const passenger = useProfile(userProfiles, currentRide?.passenger_id);
+  const cell = cellKey(location);
 
   // Update status in DB
   const toggleStatus = async () => {
@@ -32,75 +37,84 @@ const DriverDashboard: React.FC<DriverDashboardProps> = ({ driver }) => {
     // Check for existing active ride
     const checkActive = async () => {
       const { data } = await supabase.from(RIDES_TABLE).select('*').eq('driver_id', driver.id).neq('status', 'finished').single();
-      if (data) {
-        setCurrentRide(data);
-        fetchPassenger(data.passenger_id);
-      }
+      if (data) setCurrentRide(data);
     };
     checkActive();
 
-    // Subscription
+    // Subscription: only rides assigned to me
     const channel = supabase
-      .channel('driver_rides')
-      .on('postgres_changes', { event: '*', schema: 'public', table: RIDES_TABLE }, (payload) => {
+      .channel(`driver_rides:${driver.id}`)
+      .on('postgres_changes', { event: '*', schema: 'public', table: RIDES_TABLE, filter: `driver_id=eq.${driver.id}` }, (payload) => {
         const newRide = payload.new as Ride;
-        
-        // If I am assigned explicitly
-        if (newRide.driver_id === driver.id && newRide.status !== 'finished') {
+        if (newRide.status !== 'finished') {
           setCurrentRide(newRide);
           setIncomingRide(null); // clear request if it was pending
-          fetchPassenger(newRide.passenger_id);
-        }
-        // If it's a pending ride and I'm available (Simple broadcast logic)
-        else if (newRide.status === 'pending' && !newRide.driver_id && !currentRide) {
-            // Check distance, if close enough, show.
-            // For demo: show all pending.
-            setIncomingRide(newRide);
         }
       })
       .subscribe();
 
     return () => { supabase.removeChannel(channel); };
-  }, [driver.id, isOnline, currentRide]);
+  }, [driver.id, isOnline]);
+
+  // Pending rides: listen on my geocell and its neighbours, resubscribe when I change cell
+  useEffect(() => {
+    if (!isOnline || currentRide) return;
+
+    const channels = neighbourChannels(location).map(name =>
+      supabase
+        .channel(name)
+        .on('broadcast', { event: 'ride' }, ({ payload }) => {
+          const newRide = payload as Ride;
+          if (newRide.status === 'pending' && !newRide.driver_id) {
+            setIncomingRide(newRide);
+            userProfiles.get(newRide.passenger_id).catch(() => {}); // warm the cache before accepting
+          }
+        })
+        .subscribe()
+    );
+
+    return () => { channels.forEach(c => supabase.removeChannel(c)); };
+  }, [isOnline, currentRide, cell]);
 
   // Location Simulator (Driver moving)
   useEffect(() => {
     if (!isOnline) return;
     const interval = setInterval(() => {
       navigator.geolocation.getCurrentPosition(async (pos) => {
+        const loc = { lat: pos.coords.latitude, lng: pos.coords.longitude };
+        setLocation(loc);
         await supabase.from(DRIVERS_TABLE).update({
-          location: { lat: pos.coords.latitude, lng: pos.coords.longitude }
+          location: loc
         }).eq('id', driver.id);
       });
     }, 10000);
     return () => clearInterval(interval);
   }, [isOnline, driver.id]);
 
-  const fetchPassenger = async (id: string) => {
-    const { data } = await supabase.from(USERS_TABLE).select('name').eq('id', id).single();
-    if (data) setPassengerName(data.name);
-  };
-
   const acceptRide = async () => {
     if (!incomingRide) return;
-    await supabase
-      .from(RIDES_TABLE)
-      .update({ driver_id: driver.id, status: 'accepted' })
-      .eq('id', incomingRide.id);
-    
-    setCurrentRide({...incomingRide, driver_id: driver.id, status: 'accepted'});
+    const accepted = await transitionRide(incomingRide, 'accepted', driver.id).catch(() => null);
     setIncomingRide(null);
-    fetchPassenger(incomingRide.passenger_id);
+    if (!accepted) {
+      alert('تم قبول هذا الطلب من سائق آخر');
+      return;
+    }
+    setCurrentRide(accepted);
   };
 
   const updateRideStatus = async (status: Ride['status']) => {
     if (!currentRide) return;
-    await supabase.from(RIDES_TABLE).update({ status }).eq('id', currentRide.id);
+    const updated = await transitionRide(currentRide, status, driver.id).catch(() => null);
+    if (!updated) {
+      // Someone else moved the ride on; show what the server has now
+      const { data } = await supabase.from(RIDES_TABLE).select('*').eq('id', currentRide.id).single();
+      setCurrentRide(data && data.status !== 'finished' ? data : null);
+      return;
+    }
     if (status === 'finished') {
       setCurrentRide(null);
-      setPassengerName('');
     } else {
-      setCurrentRide({ ...currentRide, status });
+      setCurrentRide(updated);
     }
   };
 
@@ -129,7 +143,7 @@ const DriverDashboard: React.FC<DriverDashboardProps> = ({ driver }) => {
         <div className="bg-brand-yellow text-black p-6 rounded-2xl shadow-2xl animate-pulse">
           <h3 className="text-2xl font-black mb-2">🔔 طلب جديد!</h3>
           <div className="flex justify-between mb-4 text-lg">
-             <span>المسافة: {calculateDistance(driver.location, incomingRide.pickup)} كم</span>
+             <span>المسافة: {calculateDistance(location, incomingRide.pickup)} كم</span>
              <span className="font-bold">{incomingRide.price} ج.م</span>
           </div>
           <div className="flex gap-3">
@@ -153,7 +167,7 @@ const DriverDashboard: React.FC<DriverDashboardProps> = ({ driver }) => {
                 <div className="bg-blue-500 p-2 rounded-full mt-1"><MapPin size={16} /></div>
                 <div>
                   <p className="text-gray-400 text-sm">نقطة الانطلاق</p>
-                  <p className="font-bold">{passengerName || 'الراكب'}</p>
+                  <p className="font-bold">{passenger?.name || 'الراكب'}</p>
                 </div>
              </div>
              
@@ -180,7 +194,7 @@ const DriverDashboard: React.FC<DriverDashboardProps> = ({ driver }) => {
                </button>
              )}
              <a 
-               href={`tel:${driver.phone}`} // Ideally passenger phone, simpler for demo
+               href={`tel:${passenger?.phone || ''}`}
                className="w-full bg-gray-700 py-3 rounded-xl font-bold text-center flex items-center justify-center gap-2"
              >
                <Phone size={18} /> اتصل بالراكب
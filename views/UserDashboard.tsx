@@ -1,8 +1,11 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useMemo } from 'react';
 import { User, Driver, Ride, GeoLocation } from '../types';
 import MapComponent from '../components/MapComponent';
 import { supabase, DRIVERS_TABLE, RIDES_TABLE } from '../services/supabase';
 import { calculateDistance, calculatePrice } from '../utils/geo';
+import { DriverMap, applyDriverChange, toDriverMap } from '../utils/driverFeed';
+import { broadcastRide } from '../utils/geocell';
+import { driverProfiles, useProfile } from '../utils/profileCache';
 import { Phone, Star, Loader2 } from 'lucide-react';
 
 interface UserDashboardProps {
@@ -10,11 +13,13 @@ interface UserDashboardProps {
 }
 
 const UserDashboard: React.FC<UserDashboardProps> = ({ user }) => {
-  const [drivers, setDrivers] = useState<Driver[]>([]);
+  const [driverMap, setDriverMap] = useState<DriverMap>({});
+  const drivers = useMemo(() => Object.values(driverMap), [driverMap]);
   const [activeRide, setActiveRide] = useState<Ride | null>(null);
   const [destination, setDestination] = useState<GeoLocation | null>(null);
   const [estimatedPrice, setEstimatedPrice] = useState<number>(0);
   const [statusMessage, setStatusMessage] = useState('');
+  const assignedDriver = useProfile(driverProfiles, activeRide?.driver_id);
 
   // 1. Fetch Nearby Drivers Realtime
   useEffect(() => {
@@ -23,22 +28,25 @@ const UserDashboard: React.FC<UserDashboardProps> = ({ user }) => {
         .from(DRIVERS_TABLE)
         .select('*')
         .eq('status', 'available');
-      if (data) setDrivers(data);
+      if (data) {
+        driverProfiles.prime(data);
+        setDriverMap(toDriverMap(data, user.location));
+      }
     };
 
-    fetchDrivers();
-
-    // Subscribe to drivers changes (simplified: polling or realtime)
+    // Apply each change as a delta; full snapshot only when (re)subscribed
     const channel = supabase
       .channel('public:drivers')
       .on('postgres_changes', { event: '*', schema: 'public', table: DRIVERS_TABLE }, (payload) => {
-          // Basic refresh logic
-          fetchDrivers();
+          driverProfiles.apply(payload as any);
+          setDriverMap(prev => applyDriverChange(prev, payload as any, user.location));
       })
-      .subscribe();
+      .subscribe((status) => {
+          if (status === 'SUBSCRIBED') fetchDrivers();
+      });
 
     return () => { supabase.removeChannel(channel); };
-  }, []);
+  }, [user.location]);
 
   // 2. Check for active rides
   useEffect(() => {
@@ -122,6 +130,7 @@ const UserDashboard: React.FC<UserDashboardProps> = ({ user }) => {
       alert('Error requesting ride');
     } else {
       setActiveRide(data);
+      if (!data.driver_id) broadcastRide(data);
       setStatusMessage(nearestDriver ? 'جاري الاتصال بالسائق...' : 'في انتظار سائق متاح...');
     }
   };
@@ -185,15 +194,15 @@ const UserDashboard: React.FC<UserDashboardProps> = ({ user }) => {
                 <div className="flex items-center gap-4 bg-gray-800 p-4 rounded-xl border border-gray-700">
                    <div className="w-12 h-12 bg-brand-yellow rounded-full flex items-center justify-center text-2xl">👨‍✈️</div>
                    <div className="flex-1">
-                      {/* In a real app, we'd fetch driver details here based on ID. For now just static/placeholder or cached */}
-                      <h3 className="font-bold text-lg">سائق التوك توك</h3>
+                      <h3 className="font-bold text-lg">{assignedDriver?.name || 'سائق التوك توك'}</h3>
                       <div className="flex items-center gap-1 text-yellow-400 text-sm">
-                        <Star size={14} fill="currentColor" /> 4.8
+                        <Star size={14} fill="currentColor" /> {assignedDriver?.rating != null ? Number(assignedDriver.rating).toFixed(1) : '—'}
+                        {assignedDriver?.tuktuk_number && <span className="text-gray-400 mr-2">{assignedDriver.tuktuk_number}</span>}
                       </div>
                    </div>
-                   <button className="bg-green-600 p-3 rounded-full hover:bg-green-700">
+                   <a href={`tel:${assignedDriver?.phone || ''}`} className="bg-green-600 p-3 rounded-full hover:bg-green-700">
                      <Phone size={20} />
-                   </button>
+                   </a>
                 </div>
               )}
 